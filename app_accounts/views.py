@@ -10,14 +10,14 @@ from app_accounts.models import User
 
 class AdminRequiredMixin(LoginRequiredMixin):
     def dispatch(self, request, *args, **kwargs):
-        response = super().dispatch(request, *args, **kwargs)
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            if not request.user.is_admin:
-                messages.error(
-                    request, 'Acesso restrito a administradores.',
-                )
-                return redirect('/')
-        return response
+        # Check before running the view so non-admins never trigger its
+        # queries or side effects.
+        if request.user.is_authenticated and not request.user.is_admin:
+            messages.error(
+                request, 'Acesso restrito a administradores.',
+            )
+            return redirect('/')
+        return super().dispatch(request, *args, **kwargs)
 
 
 class LoginView(View):
@@ -8,6 +8,8 @@ from app_accounts.models import User
 from app_accounts.views import AdminRequiredMixin
 from app_projects.forms import ProjectForm, ProjectAddMemberForm
 from app_projects.models import Project
+from app_tickets.stats import daily_trend
+from helpdesk.pagination import EstimatedCountPaginator
 
 
 class ProjectListView(LoginRequiredMixin, ListView):
@@ -15,6 +17,7 @@ class ProjectListView(LoginRequiredMixin, ListView):
     template_name = 'projects/list.html'
     context_object_name = 'projects'
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
     
     def get_queryset(self):
         user = self.request.user
@@ -37,6 +40,7 @@ class ProjectDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['members'] = self.object.members.all().order_by('first_name')
+        context['trend'] = daily_trend(30, project=self.object)
         return context
 
 
@@ -75,6 +79,7 @@ class AdminProjectDetailView(AdminRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['members'] = self.object.members.all().order_by('first_name')
+        context['trend'] = daily_trend(30, project=self.object)
         context['add_member_form'] = ProjectAddMemberForm(project_instance=self.object)
         context['is_admin_view'] = True
         return context
@@ -9,6 +9,7 @@ from app_accounts.models import User
 from app_accounts.views import AdminRequiredMixin
 from app_teams.forms import TeamForm, AddMemberForm
 from app_teams.models import Team, TeamMember
+from helpdesk.pagination import EstimatedCountPaginator
 
 
 class TeamListView(LoginRequiredMixin, ListView):
@@ -16,6 +17,7 @@ class TeamListView(LoginRequiredMixin, ListView):
     template_name = 'teams/list.html'
     context_object_name = 'teams'
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from app_tickets.models import ACTIVE_STATUSES, Comment, Ticket
+
+# Author role -> marker holding that role's latest comment.
+COMMENT_MARKERS = {
+    'ADMIN': 'last_admin_comment_at',
+    'CUSTOMER': 'last_customer_comment_at',
+}
+
+
+def _latest(field, at):
+    return Greatest(Coalesce(field, Value(at)), Value(at))
+
+
+def record_comment(comment, role):
+    """Fold a new ``comment`` by a ``role`` author into its ticket's markers.
+
+    One ``UPDATE`` with column arithmetic, so concurrent comments on the
+    same ticket neither lose counts nor move a marker backwards.
+    """
+    changes = {
+        'comment_count': F('comment_count') + 1,
+        'last_activity_at': _latest('last_activity_at', comment.created_at),
+    }
+    marker = COMMENT_MARKERS.get(role)
+    if marker:
+        changes[marker] = _latest(marker, comment.created_at)
+    Ticket.objects.filter(pk=comment.ticket_id).update(**changes)
+
+
+def needs_reply(queryset):
+    """Active tickets whose customer spoke last."""
+    return queryset.filter(
+        Q(last_admin_comment_at__isnull=True)
+        | Q(last_customer_comment_at__gt=F('last_admin_comment_at')),
+        status__in=ACTIVE_STATUSES,
+        last_customer_comment_at__isnull=False,
+    )
+
+
+def rebuild_comment_markers(chunk_size=500, queryset=None):
+    """Recompute the comment markers from the comments themselves.
+
+    Works through tickets by primary key, one aggregate query and one
+    ``bulk_update`` per chunk. Returns the number of tickets processed.
+    """
+    if queryset is None:
+        queryset = Ticket.objects.all()
+    queryset = queryset.order_by('pk').only('pk', 'created_at')
+
+    total = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            tickets = list(
+                queryset.filter(pk__gt=last_pk).select_for_update()
+                [:chunk_size]
+            )
+            if not tickets:
+                return total
+            stats = {
+                row['ticket']: row
+                for row in Comment.objects.filter(ticket__in=tickets)
+                .values('ticket')
+                .annotate(
+                    count=Count('id'),
+                    latest=Max('created_at'),
+                    **{
+                        marker: Max(
+                            'created_at', filter=Q(author__role=role),
+                        )
+                        for role, marker in COMMENT_MARKERS.items()
+                    },
+                )
+                .order_by()
+            }
+            for ticket in tickets:
+                row = stats.get(ticket.pk, {})
+                ticket.comment_count = row.get('count', 0)
+                for marker in COMMENT_MARKERS.values():
+                    setattr(ticket, marker, row.get(marker))
+                ticket.last_activity_at = max(
+                    ticket.created_at,
+                    row.get('latest') or ticket.created_at,
+                )
+            Ticket.objects.bulk_update(tickets, [
+                'comment_count',
+                *COMMENT_MARKERS.values(),
+                'last_activity_at',
+            ])
+        total += len(tickets)
+        last_pk = tickets[-1].pk
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from app_tickets.models import AuditLog, Comment, Ticket
+from app_tickets.models import AuditArchive, AuditLog, Comment, EventCursor, IdempotencyKey, SlaPolicy, Ticket, TicketDailyStats, TicketEvent
+from helpdesk.pagination import EstimatedCountPaginator
 
 
 class CommentInline(admin.TabularInline):
@@ -23,6 +24,8 @@ class TicketAdmin(admin.ModelAdmin):
     raw_id_fields = ['created_by', 'assigned_agent']
     readonly_fields = ['created_at', 'updated_at', 'first_response_at', 'resolved_at', 'closed_at', 'rt_breached_at']
     inlines = [CommentInline, AuditLogInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Comment)
@@ -38,3 +41,43 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_filter = ['new_status', 'created_at']
     raw_id_fields = ['ticket', 'changed_by']
     readonly_fields = ['created_at']
+
+
+@admin.register(TicketDailyStats)
+class TicketDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'project', 'priority', 'category', 'opened', 'resolved', 'breached']
+    list_filter = ['priority', 'category', 'date']
+
+
+@admin.register(SlaPolicy)
+class SlaPolicyAdmin(admin.ModelAdmin):
+    list_display = ['project', 'category', 'priority', 'frt_target', 'rt_target']
+    list_filter = ['priority', 'category', 'project']
+
+
+@admin.register(TicketEvent)
+class TicketEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'ticket', 'kind', 'created_at']
+    list_filter = ['kind']
+    raw_id_fields = ['ticket']
+    readonly_fields = ['ticket', 'kind', 'payload', 'created_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(EventCursor)
+class EventCursorAdmin(admin.ModelAdmin):
+    list_display = ['name', 'position', 'updated_at']
+
+
+@admin.register(AuditArchive)
+class AuditArchiveAdmin(admin.ModelAdmin):
+    list_display = ['month', 'rows', 'path', 'created_at']
+    readonly_fields = ['month', 'path', 'rows', 'last_id', 'created_at']
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'user', 'ticket', 'created_at', 'expires_at']
+    readonly_fields = ['user', 'key', 'ticket', 'created_at', 'expires_at']
+    search_fields = ['key']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppTicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_tickets'
+
+    def ready(self):
+        from app_tickets import signals  # noqa: F401
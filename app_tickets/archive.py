@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from app_tickets.models import AuditArchive, AuditLog
+from app_tickets.reports import month_bounds
+
+ARCHIVE_FIELDS = [
+    'id',
+    'ticket_id',
+    'changed_by_id',
+    'changed_by_name',
+    'old_status',
+    'new_status',
+    'reason',
+    'created_at',
+    'updated_at',
+]
+
+
+def _isoformat(value):
+    # Full precision, unlike DjangoJSONEncoder's milliseconds.
+    return value.isoformat()
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archivable_months(hot_months=None):
+    """First days of the months before the hot window that still have rows."""
+    if hot_months is None:
+        hot_months = settings.AUDIT_HOT_MONTHS
+    cutoff = _add_months(timezone.localdate().replace(day=1), -hot_months)
+    oldest = (
+        AuditLog.objects.filter(created_at__lt=month_bounds(cutoff)[0])
+        .order_by('created_at')
+        .values_list('created_at', flat=True)
+        .first()
+    )
+    if oldest is None:
+        return []
+    month = timezone.localtime(oldest).date().replace(day=1)
+    months = []
+    while month < cutoff:
+        months.append(month)
+        month = _add_months(month, 1)
+    return months
+
+
+def archive_month(month, directory=None, chunk_size=2000):
+    """Move the audit rows of ``month`` to ``auditlog-YYYY-MM.ndjson.gz``.
+
+    Rows are streamed from a server-side cursor into the gzip file, so
+    memory stays flat whatever the month's size. The file is synced and
+    recorded in :class:`AuditArchive` before any row is deleted, and
+    deletion runs in ``chunk_size`` batches; re-running after an
+    interruption only finishes the deletion. Returns the rows archived.
+    """
+    month = month.replace(day=1)
+    start, end = month_bounds(month)
+    rows = AuditLog.objects.filter(created_at__gte=start, created_at__lt=end)
+
+    archive = AuditArchive.objects.filter(month=month).first()
+    if archive is None:
+        directory = Path(directory or settings.AUDIT_ARCHIVE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'auditlog-{month:%Y-%m}.ndjson.gz'
+        partial = path.with_name(path.name + '.partial')
+        count = last_id = 0
+        with open(partial, 'wb') as raw:
+            with gzip.open(raw, 'wt', encoding='utf-8') as out:
+                for row in (
+                    rows.order_by('created_at', 'id')
+                    .values(*ARCHIVE_FIELDS)
+                    .iterator(chunk_size=chunk_size)
+                ):
+                    out.write(json.dumps(
+                        row, default=_isoformat, ensure_ascii=False,
+                    ))
+                    out.write('\n')
+                    count += 1
+                    last_id = max(last_id, row['id'])
+            raw.flush()
+            os.fsync(raw.fileno())
+        if not count:
+            partial.unlink()
+            return 0
+        os.replace(partial, path)
+        archive = AuditArchive.objects.create(
+            month=month, path=str(path), rows=count, last_id=last_id,
+        )
+
+    rows = rows.filter(id__lte=archive.last_id)
+    while True:
+        with transaction.atomic():
+            ids = list(rows.values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return archive.rows
+            AuditLog.objects.filter(id__in=ids).delete()
+
+
+def archive_old_audit_logs(hot_months=None, directory=None, chunk_size=2000):
+    """Archive every month before the hot window.
+
+    Returns ``(rows, files)``.
+    """
+    rows = files = 0
+    for month in archivable_months(hot_months):
+        archived = archive_month(month, directory, chunk_size)
+        if archived:
+            rows += archived
+            files += 1
+    return rows, files
+
+
+def _archives_for(ticket):
+    # A ticket only gets audit rows between its creation and closing.
+    first = timezone.localtime(ticket.created_at).date().replace(day=1)
+    archives = AuditArchive.objects.filter(month__gte=first)
+    if ticket.closed_at:
+        archives = archives.filter(
+            month__lte=timezone.localtime(ticket.closed_at).date(),
+        )
+    return archives
+
+
+def has_archived_history(ticket):
+    return _archives_for(ticket).exists()
+
+
+def archived_history(ticket):
+    """``ticket``'s archived audit rows as unsaved :class:`AuditLog`.
+
+    Only the archive files of months the ticket was open in are read,
+    line by line; lines of other tickets are skipped before parsing.
+    """
+    marker = f'"ticket_id": {ticket.pk},'
+    logs = {}
+    for archive in _archives_for(ticket).order_by('month'):
+        with gzip.open(archive.path, 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                if marker not in line:
+                    continue
+                row = json.loads(line)
+                for field in ('created_at', 'updated_at'):
+                    row[field] = parse_datetime(row[field])
+                logs[row['id']] = AuditLog(**row)
+    return list(logs.values())
+
+
+def audit_history(ticket, archived=False):
+    """``ticket``'s audit log oldest first, optionally with archived rows."""
+    logs = list(ticket.audit_logs.order_by('created_at', 'id'))
+    if archived:
+        hot = {log.pk for log in logs}
+        logs += [log for log in archived_history(ticket) if log.pk not in hot]
+        logs.sort(key=lambda log: (log.created_at, log.pk))
+    return logs
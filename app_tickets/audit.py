@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app_tickets.models import AuditLog
+
+_pending = ContextVar('pending_audit_logs', default=None)
+
+
+@contextmanager
+def buffered_audit():
+    """Collect :func:`audit_log` entries and insert them together at exit.
+
+    Meant to sit just inside the transaction of a write path, so every
+    entry of the change costs one ``bulk_create`` and still commits or
+    rolls back with it. Nested blocks join the outermost one. Nothing
+    is written if the block raises.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    entries = []
+    token = _pending.set(entries)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    if entries:
+        AuditLog.objects.bulk_create(entries)
+
+
+def audit_log(ticket, old_status, new_status, reason, user=None):
+    """Record an audit entry, buffered if inside :func:`buffered_audit`.
+
+    Without ``user`` the change is attributed to the system.
+    """
+    entry = AuditLog(
+        ticket=ticket,
+        changed_by=user,
+        changed_by_name=(user.full_name or user.email) if user else 'SYSTEM',
+        old_status=old_status,
+        new_status=new_status,
+        reason=reason,
+    )
+    entries = _pending.get()
+    if entries is None:
+        entry.save()
+    else:
+        entries.append(entry)
+    return entry
@@ -0,0 +1,246 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from functools import lru_cache
+from itertools import accumulate
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+def easter(year):
+    """Return Easter Sunday of ``year`` (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    weekday = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * weekday) // 451
+    month, day = divmod(h + weekday - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def national_holidays(year):
+    """Brazilian national holidays of ``year``."""
+    holidays = {
+        date(year, 1, 1),
+        easter(year) - timedelta(days=2),  # Sexta-feira Santa
+        date(year, 4, 21),
+        date(year, 5, 1),
+        date(year, 9, 7),
+        date(year, 10, 12),
+        date(year, 11, 2),
+        date(year, 11, 15),
+        date(year, 12, 25),
+    }
+    if year >= 2024:
+        holidays.add(date(year, 11, 20))
+    return holidays
+
+
+class ContinuousCalendar:
+    """Wall-clock SLA time: every second counts."""
+
+    def elapsed(self, start, end):
+        return end - start
+
+    def add(self, start, duration):
+        return start + duration
+
+    def elapsed_many(self, starts, ends):
+        return [(e - s).total_seconds() for s, e in zip(starts, ends)]
+
+    def add_many(self, starts, seconds):
+        return [s + timedelta(seconds=n) for s, n in zip(starts, seconds)]
+
+
+class BusinessCalendar:
+    """SLA time that only runs during working hours.
+
+    ``hours`` maps a weekday (0 is Monday) to ``(start, end)`` local
+    time pairs and ``holidays`` are extra non-working dates on top of
+    the national ones. Working intervals are compiled once per range of
+    years into sorted arrays of UTC timestamps with a prefix sum of the
+    business seconds before each interval, so converting an instant to
+    "business seconds since the start of the table" is one binary
+    search, and elapsed time or a deadline is two such lookups.
+    """
+
+    def __init__(self, hours, holidays=(), tz=None):
+        self.hours = {
+            weekday: [
+                (time.fromisoformat(a), time.fromisoformat(b))
+                for a, b in spans
+            ]
+            for weekday, spans in hours.items()
+        }
+        self.holidays = set(holidays)
+        self.tz = ZoneInfo(tz or settings.TIME_ZONE)
+        self._table = None
+
+    def _compile(self, first_year, last_year):
+        starts, ends = [], []
+        day = date(first_year, 1, 1)
+        end = date(last_year, 12, 31)
+        holidays = set(self.holidays)
+        for year in range(first_year, last_year + 1):
+            holidays |= national_holidays(year)
+        while day <= end:
+            if day not in holidays:
+                for a, b in self.hours.get(day.weekday(), ()):
+                    starts.append(
+                        datetime.combine(day, a, self.tz).timestamp(),
+                    )
+                    ends.append(
+                        datetime.combine(day, b, self.tz).timestamp(),
+                    )
+            day += timedelta(days=1)
+        if not starts:
+            raise ValueError('O calendário de SLA não tem horário útil.')
+        before = [0.0, *accumulate(e - s for s, e in zip(starts, ends))]
+        columns = (starts, ends, before[:-1], before[1:])
+        arrays = (
+            tuple(np.array(column) for column in columns)
+            if np is not None else None
+        )
+        self._table = (first_year, last_year, *columns, arrays)
+
+    def _cover(self, *timestamps):
+        years = [
+            datetime.fromtimestamp(ts, self.tz).year for ts in timestamps
+        ]
+        lo, hi = min(years) - 1, max(years) + 1
+        if self._table is None:
+            self._compile(lo, hi)
+        elif lo < self._table[0] or hi > self._table[1]:
+            self._compile(min(lo, self._table[0]), max(hi, self._table[1]))
+        return self._table
+
+    def _offset(self, ts, table):
+        _, _, starts, ends, before, _, _ = table
+        i = bisect_right(starts, ts) - 1
+        if i < 0:
+            return 0.0
+        return before[i] + min(ts, ends[i]) - starts[i]
+
+    def elapsed(self, start, end):
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        table = self._cover(start_ts, end_ts)
+        return timedelta(
+            seconds=self._offset(end_ts, table)
+            - self._offset(start_ts, table),
+        )
+
+    def add(self, start, duration):
+        seconds = duration.total_seconds()
+        if seconds <= 0:
+            return start
+        start_ts = start.timestamp()
+        # A year of calendar holds far more than any SLA target; widen
+        # the table until the target fits.
+        horizon = start_ts + seconds * 7
+        while True:
+            table = self._cover(start_ts, horizon)
+            _, _, starts, _, before, upto, _ = table
+            target = self._offset(start_ts, table) + seconds
+            i = bisect_left(upto, target)
+            if i < len(upto):
+                return _from_timestamp(starts[i] + target - before[i])
+            horizon += 366 * 86400
+
+    def elapsed_many(self, starts, ends):
+        """Business seconds between each pair, evaluated in bulk."""
+        start_ts = [s.timestamp() for s in starts]
+        end_ts = [e.timestamp() for e in ends]
+        if not start_ts:
+            return []
+        table = self._cover(min(start_ts), max(end_ts))
+        if np is None:
+            return [
+                self._offset(e, table) - self._offset(s, table)
+                for s, e in zip(start_ts, end_ts)
+            ]
+        arrays = table[-1]
+        return (
+            _offsets(arrays, np.array(end_ts))
+            - _offsets(arrays, np.array(start_ts))
+        ).tolist()
+
+    def add_many(self, starts, seconds):
+        """Deadline ``seconds`` of business time after each start."""
+        if np is None or not starts:
+            return [
+                self.add(s, timedelta(seconds=n))
+                for s, n in zip(starts, seconds)
+            ]
+        start_ts = np.array([s.timestamp() for s in starts])
+        seconds = np.array(seconds, dtype=float)
+        arrays = self._cover(
+            start_ts.min(), (start_ts + seconds * 7).max(),
+        )[-1]
+        interval_starts, _, before, upto = arrays
+        target = _offsets(arrays, start_ts) + seconds
+        index = np.searchsorted(upto, target, side='left')
+        if (index >= len(upto)).any():
+            return [
+                self.add(s, timedelta(seconds=n))
+                for s, n in zip(starts, seconds.tolist())
+            ]
+        due = interval_starts[index] + target - before[index]
+        return [
+            start if n <= 0 else _from_timestamp(ts)
+            for start, n, ts in zip(starts, seconds.tolist(), due.tolist())
+        ]
+
+
+def _offsets(arrays, ts):
+    starts, ends, before, _ = arrays
+    index = np.searchsorted(starts, ts, side='right') - 1
+    clipped = np.maximum(index, 0)
+    offsets = (
+        before[clipped]
+        + np.minimum(ts, ends[clipped])
+        - starts[clipped]
+    )
+    return np.where(index < 0, 0.0, offsets)
+
+
+def _from_timestamp(ts):
+    return datetime.fromtimestamp(round(ts, 6), dt_timezone.utc)
+
+
+@lru_cache(maxsize=8)
+def _build(kind, hours, holidays, tz):
+    if kind == '24x7':
+        return ContinuousCalendar()
+    if kind == 'business':
+        return BusinessCalendar(
+            {weekday: spans for weekday, spans in hours},
+            holidays,
+            tz,
+        )
+    raise ValueError(f'Calendário de SLA desconhecido: {kind!r}.')
+
+
+def get_calendar():
+    """Return the SLA calendar configured in settings."""
+    return _build(
+        settings.SLA_CALENDAR,
+        tuple(sorted(
+            (weekday, tuple(spans))
+            for weekday, spans in settings.SLA_BUSINESS_HOURS.items()
+        )),
+        tuple(sorted(
+            date.fromisoformat(d) if isinstance(d, str) else d
+            for d in settings.SLA_HOLIDAYS
+        )),
+        settings.TIME_ZONE,
+    )
@@ -1,8 +1,150 @@
+import time
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
 from django.views.generic import TemplateView
 
 from app_tickets.models import Ticket
+from app_tickets.stats import daily_trend
+
+
+OPEN_STATUSES = [
+    Ticket.Status.OPEN,
+    Ticket.Status.TRIAGE,
+    Ticket.Status.IN_PROGRESS,
+    Ticket.Status.WAITING_CUSTOMER,
+]
+
+
+def build_summary(qs):
+    """Return every dashboard counter for ``qs`` in a single query.
+
+    All counters and both breakdowns are conditional aggregates over one
+    scan of the ticket table.
+    """
+    aggregates = {
+        'total': Count('id'),
+        'open_count': Count('id', filter=Q(status__in=OPEN_STATUSES)),
+        'resolved_count': Count(
+            'id', filter=Q(status=Ticket.Status.RESOLVED),
+        ),
+        'closed_count': Count(
+            'id', filter=Q(status=Ticket.Status.CLOSED),
+        ),
+        'breached_count': Count(
+            'id',
+            filter=(
+                Q(rt_breached_at__isnull=False)
+                & ~Q(status=Ticket.Status.CLOSED)
+            ),
+        ),
+    }
+    for status in Ticket.Status.values:
+        aggregates[f'status_{status}'] = Count(
+            'id', filter=Q(status=status),
+        )
+    for priority in Ticket.Priority.values:
+        aggregates[f'priority_{priority}'] = Count(
+            'id', filter=Q(priority=priority),
+        )
+
+    row = qs.aggregate(**aggregates)
+    return {
+        'total': row['total'],
+        'open_count': row['open_count'],
+        'resolved_count': row['resolved_count'],
+        'closed_count': row['closed_count'],
+        'breached_count': row['breached_count'],
+        'by_status': {
+            s: row[f'status_{s}'] for s in Ticket.Status.values
+        },
+        'by_priority': {
+            p: row[f'priority_{p}'] for p in Ticket.Priority.values
+        },
+    }
+
+
+# How long a request waits for another worker's recomputation before
+# computing the summary itself.
+SUMMARY_WAIT_SECONDS = 2
+SUMMARY_LOCK_SECONDS = 30
+
+
+def _scope(user):
+    if user.is_customer:
+        return f'user:{user.pk}'
+    return 'global'
+
+
+def _version_key(scope):
+    return f'dashboard:version:{scope}'
+
+
+def _current_version(scope):
+    return cache.get_or_set(_version_key(scope), time.time_ns(), None)
+
+
+def get_summary(user, qs):
+    """Return the cached summary for ``user``'s scope.
+
+    Admins share the global scope, customers get one scope each. Each
+    scope has a version number that :func:`invalidate_summary` bumps,
+    so a summary computed before a change is never stored as current.
+    On a miss only the request holding the scope lock recomputes; the
+    others serve the previous summary or wait for the new one.
+    """
+    scope = _scope(user)
+    version = _current_version(scope)
+    key = f'dashboard:summary:{scope}:{version}'
+    stale_key = f'dashboard:summary:{scope}:stale'
+
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, SUMMARY_LOCK_SECONDS):
+        try:
+            summary = build_summary(qs)
+            cache.set(key, summary, settings.DASHBOARD_CACHE_TTL)
+            cache.set(stale_key, summary, None)
+        finally:
+            cache.delete(lock_key)
+        return summary
+
+    summary = cache.get(stale_key)
+    if summary is not None:
+        return summary
+
+    deadline = time.monotonic() + SUMMARY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        summary = cache.get(key)
+        if summary is not None:
+            return summary
+    return build_summary(qs)
+
+
+def invalidate_summary(*tickets):
+    """Expire the global summary and those of the tickets' creators.
+
+    Runs after the surrounding transaction commits so a recomputation
+    can never read the pre-change state.
+    """
+    scopes = ['global']
+    scopes += sorted({f'user:{t.created_by_id}' for t in tickets})
+
+    def bump():
+        for scope in scopes:
+            try:
+                cache.incr(_version_key(scope))
+            except ValueError:
+                cache.set(_version_key(scope), time.time_ns(), None)
+
+    transaction.on_commit(bump)
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -16,43 +158,13 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         if user.is_customer:
             qs = qs.filter(created_by=user)
 
-        ctx['total'] = qs.count()
-        ctx['open_count'] = qs.filter(
-            status__in=[
-                Ticket.Status.OPEN,
-                Ticket.Status.TRIAGE,
-                Ticket.Status.IN_PROGRESS,
-                Ticket.Status.WAITING_CUSTOMER,
-            ],
-        ).count()
-        ctx['resolved_count'] = qs.filter(
-            status=Ticket.Status.RESOLVED,
-        ).count()
-        ctx['closed_count'] = qs.filter(
-            status=Ticket.Status.CLOSED,
-        ).count()
-        ctx['breached_count'] = qs.filter(
-            rt_breached_at__isnull=False,
-        ).exclude(
-            status=Ticket.Status.CLOSED,
-        ).count()
-
-        by_status = qs.values('status').annotate(
-            count=Count('id'),
-        ).order_by('status')
-        ctx['by_status'] = {
-            s['status']: s['count'] for s in by_status
-        }
+        ctx.update(get_summary(user, qs))
         ctx['status_choices'] = Ticket.Status.choices
-
-        by_priority = qs.values('priority').annotate(
-            count=Count('id'),
-        ).order_by('priority')
-        ctx['by_priority'] = {
-            p['priority']: p['count'] for p in by_priority
-        }
         ctx['priority_choices'] = Ticket.Priority.choices
 
+        if user.is_admin:
+            ctx['trend'] = daily_trend()
+
         ctx['recent_tickets'] = (
             qs.select_related(
                 'created_by', 'assigned_agent',
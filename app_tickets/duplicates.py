@@ -0,0 +1,292 @@
+import random
+import re
+import threading
+import zlib
+from array import array
+from collections import defaultdict
+from datetime import timedelta
+from operator import eq
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Max
+from django.utils import timezone
+
+from app_tickets.events import read_events
+from app_tickets.forms import CATEGORY_TITLES
+from app_tickets.models import ACTIVE_STATUSES, Ticket, TicketEvent
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+# Character shingles survive rewording far better than word shingles:
+# two reports of the same outage typed by different people share most
+# 5-grams (service name, error, environment) but few word triples.
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# h_i(x) = (a_i * x + b_i) mod p over 32-bit shingle hashes, with p
+# the largest prime below 2**32. With a, b and x below 2**32 the sums
+# fit in 64 bits, so the numpy path and the pure Python one compute
+# the same signatures. The seed is fixed so signatures do not depend
+# on the process that computed them.
+_PRIME = 4294967291
+_rng = random.Random(1729)
+_A = [_rng.randrange(1, 2**32) for _ in range(NUM_PERM)]
+_B = [_rng.randrange(0, 2**32) for _ in range(NUM_PERM)]
+if np is not None:
+    _A_NP = np.array(_A, dtype=np.uint64)[:, None]
+    _B_NP = np.array(_B, dtype=np.uint64)[:, None]
+    _PRIME_NP = np.uint64(_PRIME)
+
+_WORD = re.compile(r'\w+')
+
+
+def ticket_text(ticket):
+    """The part of ``ticket``'s text that tells it apart from others.
+
+    Category forms build the title, headings and field labels from
+    fixed text (see their ``compose_description``), which would make
+    any two tickets of a category look alike; only the values typed
+    into the fields are kept for them.
+    """
+    if ticket.category not in CATEGORY_TITLES:
+        return f'{ticket.title}\n{ticket.description}'
+    return '\n'.join(
+        value
+        for _, sep, value in (
+            line.partition(': ')
+            for line in ticket.description.splitlines()
+        )
+        if sep
+    )
+
+
+def _scope(ticket):
+    # Only tickets of the same project and category are compared.
+    return ticket.project_id, ticket.category
+
+
+def shingles(text):
+    """32-bit hashes of the character shingles of normalized ``text``."""
+    text = ' '.join(_WORD.findall(text.lower()))
+    return {
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode())
+        for i in range(max(1, len(text) - SHINGLE_SIZE + 1))
+    } if text else set()
+
+
+def signature(hashes):
+    """MinHash signature of a set of shingle hashes, or None if empty."""
+    if not hashes:
+        return None
+    if np is not None:
+        x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        return array(
+            'I', ((_A_NP * x + _B_NP) % _PRIME_NP).min(axis=1).tolist(),
+        )
+    return array('I', [
+        min((a * x + b) % _PRIME for x in hashes)
+        for a, b in zip(_A, _B)
+    ])
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(map(eq, a, b)) / NUM_PERM
+
+
+def _band_keys(sig):
+    return [
+        hash((band, *sig[band * ROWS:(band + 1) * ROWS]))
+        for band in range(BANDS)
+    ]
+
+
+class DuplicateIndex:
+    """LSH index over the MinHash signatures of the active tickets.
+
+    Lives in process memory. :meth:`refresh` applies the ticket events
+    written since the index last looked, by any process, so every
+    worker converges on the same set of active tickets without
+    rebuilding.
+    """
+
+    def __init__(self):
+        # ticket id -> ((project id, category), created_at, signature)
+        self.entries = {}
+        self.buckets = defaultdict(set)
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def add(self, pk, scope, created_at, sig):
+        self.remove(pk)
+        if sig is None:
+            return
+        self.entries[pk] = (scope, created_at, sig)
+        for key in _band_keys(sig):
+            self.buckets[key].add(pk)
+
+    def remove(self, pk):
+        entry = self.entries.pop(pk, None)
+        if entry is None:
+            return
+        for key in _band_keys(entry[2]):
+            bucket = self.buckets[key]
+            bucket.discard(pk)
+            if not bucket:
+                del self.buckets[key]
+
+    def _load(self, tickets):
+        for ticket in tickets:
+            if ticket.status in ACTIVE_STATUSES:
+                self.add(
+                    ticket.pk, _scope(ticket), ticket.created_at,
+                    signature(shingles(ticket_text(ticket))),
+                )
+            else:
+                self.remove(ticket.pk)
+
+    def build(self, chunk_size=2000):
+        """Index every active ticket, then catch up on recent events.
+
+        The starting position is the last event old enough to have
+        settled (see :func:`app_tickets.events.read_events`), so events
+        still being committed while the tickets are read get replayed.
+        """
+        settled = timezone.now() - timedelta(
+            seconds=settings.TICKET_EVENT_SETTLE_SECONDS,
+        )
+        with self.lock:
+            self.entries.clear()
+            self.buckets.clear()
+            self.position = TicketEvent.objects.filter(
+                created_at__lte=settled,
+            ).aggregate(last=Max('id'))['last'] or 0
+            self._load(
+                Ticket.objects.filter(status__in=ACTIVE_STATUSES)
+                .only(
+                    'pk', 'project_id', 'category', 'status',
+                    'created_at', 'title', 'description',
+                )
+                .iterator(chunk_size=chunk_size)
+            )
+        self.refresh()
+
+    def refresh(self, batch_size=500):
+        """Apply the creations and transitions since the last refresh."""
+        kinds = {TicketEvent.Kind.CREATED, TicketEvent.Kind.TRANSITIONED}
+        with self.lock:
+            while True:
+                events = read_events(self.position, batch_size)
+                if not events:
+                    return
+                ids = {e.ticket_id for e in events if e.kind in kinds}
+                tickets = list(Ticket.objects.filter(pk__in=ids).only(
+                    'pk', 'project_id', 'category', 'status',
+                    'created_at', 'title', 'description',
+                ))
+                self._load(tickets)
+                for pk in ids - {ticket.pk for ticket in tickets}:
+                    self.remove(pk)
+                self.position = events[-1].id
+                if len(events) < batch_size:
+                    return
+
+    def query(self, sig, scope, threshold, limit=5):
+        """Near matches of ``sig`` within ``scope``, most similar first.
+
+        Returns ``[(id, created_at, similarity)]`` with similarity at
+        least ``threshold``. Only tickets sharing an LSH band with
+        ``sig`` are compared, so the cost follows the number of near
+        matches, not the size of the index.
+        """
+        if sig is None:
+            return []
+        with self.lock:
+            candidates = set().union(*(
+                self.buckets.get(key, ()) for key in _band_keys(sig)
+            ))
+            scored = []
+            for pk in candidates:
+                entry_scope, created_at, other = self.entries[pk]
+                if entry_scope != scope:
+                    continue
+                score = similarity(sig, other)
+                if score >= threshold:
+                    scored.append((pk, created_at, score))
+        scored.sort(key=lambda item: (-item[2], item[0]))
+        return scored[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def duplicate_index():
+    """This process's :class:`DuplicateIndex`, built on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = DuplicateIndex()
+            index.build()
+            _index = index
+    return _index
+
+
+def warm_up():
+    """Start building the index ahead of the first submission.
+
+    Called as each web worker starts. The build runs in a background
+    thread so the worker serves requests meanwhile; a submission that
+    arrives first waits for it in :func:`duplicate_index`. If the
+    database cannot be reached yet, the index is built on first use
+    instead. Returns the thread.
+    """
+    thread = threading.Thread(
+        target=_warm_up, name='duplicate-index', daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def _warm_up():
+    try:
+        duplicate_index()
+    except DatabaseError:
+        pass
+    finally:
+        # The thread's own connection would otherwise stay open.
+        connection.close()
+
+
+def find_duplicates(ticket, limit=5):
+    """Active tickets of ``ticket``'s project and category that read alike.
+
+    ``ticket`` may be unsaved. Returns ``[(Ticket, similarity)]``, most
+    similar first, with similarity at least
+    ``TICKET_DUPLICATE_THRESHOLD``. Matches are checked against their
+    rows, so an entry the index has not caught up on is dropped.
+    """
+    index = duplicate_index()
+    index.refresh()
+    matches = index.query(
+        signature(shingles(ticket_text(ticket))),
+        _scope(ticket),
+        settings.TICKET_DUPLICATE_THRESHOLD,
+        limit,
+    )
+    if not matches:
+        return []
+    tickets = Ticket.objects.in_bulk([pk for pk, _, _ in matches])
+    return [
+        (tickets[pk], score)
+        for pk, created_at, score in matches
+        if pk in tickets
+        and tickets[pk].created_at == created_at
+        and tickets[pk].status in ACTIVE_STATUSES
+    ]
@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.utils import timezone
+
+from app_teams.models import Team
+from app_tickets.audit import audit_log, buffered_audit
+from app_tickets.dashboard import invalidate_summary
+from app_tickets.events import emit_many
+from app_tickets.models import Ticket, TicketEvent
+from app_tickets.sla import rt_breached_tickets
+from app_tickets.stats import record_ticket_events
+
+
+ESCALATION_REASON = (
+    'RT_BREACHED_ESCALATED — SLA estourado, escalonado para N2.'
+)
+
+
+def escalate_tickets(ticket_ids, now=None, chunk_size=500):
+    """Escalate ``ticket_ids`` to N2 in chunks. Returns the escalated ids.
+
+    Each chunk is one transaction: the rows are locked (rows already
+    locked by another worker are skipped), then updated with a single
+    ``bulk_update`` and audited with a single buffered insert. The
+    breach is checked again on the locked rows, so tickets escalated,
+    resolved or given a later deadline in the meantime are left alone,
+    and so are rows another worker holds; callers can tell both apart
+    from the escalated ones by the ids returned.
+    """
+    now = now or timezone.now()
+    ticket_ids = list(ticket_ids)
+    n2_team = Team.objects.filter(level=Team.Level.N2).first()
+
+    escalated = []
+    for start in range(0, len(ticket_ids), chunk_size):
+        chunk = ticket_ids[start:start + chunk_size]
+        with transaction.atomic(), buffered_audit():
+            tickets = list(
+                rt_breached_tickets(now)
+                .select_for_update(skip_locked=True)
+                .filter(pk__in=chunk)
+                .order_by('pk')
+            )
+            if not tickets:
+                continue
+
+            for ticket in tickets:
+                ticket.rt_breached_at = now
+                ticket.is_escalated = True
+                ticket.version += 1
+                ticket.updated_at = now
+                if n2_team:
+                    ticket.assigned_team = n2_team
+                audit_log(
+                    ticket, ticket.status, ticket.status, ESCALATION_REASON,
+                )
+            Ticket.objects.bulk_update(tickets, [
+                'rt_breached_at',
+                'is_escalated',
+                'assigned_team',
+                'version',
+                'updated_at',
+            ])
+
+            emit_many(tickets, TicketEvent.Kind.ESCALATED, [
+                {'team': ticket.assigned_team_id} for ticket in tickets
+            ])
+            record_ticket_events(tickets, 'breached', now)
+            invalidate_summary(*tickets)
+        escalated.extend(ticket.pk for ticket in tickets)
+    return escalated
+
+
+def escalate_breached(ticket_ids, now=None):
+    """Escalate those of ``ticket_ids`` whose RT deadline has passed.
+
+    Returns ``(ids, errors)`` in the shape of the bulk helpers in
+    :mod:`app_tickets.services`.
+    """
+    now = now or timezone.now()
+    due = set(
+        rt_breached_tickets(now).filter(
+            pk__in=ticket_ids,
+        ).values_list('pk', flat=True)
+    )
+    errors = {
+        pk: 'O SLA de resolução deste chamado não foi estourado.'
+        for pk in ticket_ids if pk not in due
+    }
+    escalated = escalate_tickets(sorted(due), now=now)
+    for pk in due.difference(escalated):
+        errors[pk] = 'Chamado em uso por outra operação; tente novamente.'
+    return escalated, errors
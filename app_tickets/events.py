@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from app_tickets.models import EventCursor, TicketEvent
+
+
+def emit(ticket, kind, **payload):
+    """Append one event for ``ticket``, inside the change's transaction."""
+    return TicketEvent.objects.create(
+        ticket=ticket, kind=kind, payload=payload,
+    )
+
+
+def emit_many(tickets, kind, payloads=None):
+    """Append one ``kind`` event per ticket with a single insert.
+
+    ``payloads`` is a list parallel to ``tickets``, or ``None`` for
+    empty payloads.
+    """
+    if payloads is None:
+        payloads = [{}] * len(tickets)
+    now = timezone.now()
+    TicketEvent.objects.bulk_create([
+        TicketEvent(
+            ticket=ticket, kind=kind, payload=payload, created_at=now,
+        )
+        for ticket, payload in zip(tickets, payloads)
+    ])
+
+
+def read_events(after=0, limit=500):
+    """Up to ``limit`` committed events with ``id > after``, in id order.
+
+    Ids are handed out when a row is inserted but become visible when
+    its transaction commits, so a lower id can show up after a higher
+    one. Reading stops at the first gap in the sequence unless the
+    events past it are older than ``TICKET_EVENT_SETTLE_SECONDS``; by
+    then a missing id is taken to be a rolled-back insert.
+    """
+    events = list(
+        TicketEvent.objects.filter(id__gt=after).order_by('id')[:limit]
+    )
+    settled = timezone.now() - timedelta(
+        seconds=settings.TICKET_EVENT_SETTLE_SECONDS,
+    )
+    # A consumer starting from scratch has no earlier id to follow.
+    expected = after + 1 if after else None
+    for i, event in enumerate(events):
+        if (
+            expected is not None
+            and event.id != expected
+            and event.created_at > settled
+        ):
+            return events[:i]
+        expected = event.id + 1
+    return events
+
+
+def consume(name, handler, batch_size=500):
+    """Feed the next batch of events to ``handler`` for consumer ``name``.
+
+    ``handler`` receives a list of :class:`TicketEvent`. The consumer's
+    cursor is locked while the batch runs and advanced only if the
+    handler returns, in the same transaction, so a failed or killed
+    consumer picks up the same batch again (at-least-once delivery)
+    and two processes never handle the same batch concurrently.
+    Returns the number of events handled; 0 means caught up.
+    """
+    with transaction.atomic():
+        EventCursor.objects.get_or_create(name=name)
+        cursor = EventCursor.objects.select_for_update().get(name=name)
+        events = read_events(cursor.position, batch_size)
+        if events:
+            handler(events)
+            cursor.position = events[-1].id
+            cursor.save(update_fields=['position', 'updated_at'])
+    return len(events)
+
+
+def consume_all(name, handler, batch_size=500):
+    """Run :func:`consume` until caught up. Returns the events handled."""
+    total = 0
+    while handled := consume(name, handler, batch_size):
+        total += handled
+    return total
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from app_tickets.models import IdempotencyKey
+from app_tickets.services import open_ticket
+
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def created_ticket(user, key):
+    """The ticket ``user`` created under ``key``, or None.
+
+    A key past its TTL no longer counts and is dropped on the spot, so
+    it can be reused.
+    """
+    record = (
+        IdempotencyKey.objects.select_related('ticket')
+        .filter(user=user, key=key)
+        .first()
+    )
+    if record is None:
+        return None
+    if record.expires_at <= timezone.now():
+        record.delete()
+        return None
+    return record.ticket
+
+
+def open_ticket_once(ticket, user, key=None):
+    """:func:`open_ticket`, at most once per ``key`` of ``user``.
+
+    Returns ``(ticket, created)``; for a repeated key, ``ticket`` is the
+    one the first request created and nothing is written. The key is
+    inserted in the ticket's transaction, so a concurrent request with
+    the same key waits on the unique constraint until the first one
+    commits, then rolls its own ticket back and returns the first.
+    """
+    if not key:
+        return open_ticket(ticket, user), True
+    previous = created_ticket(user, key)
+    if previous is not None:
+        return previous, False
+    try:
+        with transaction.atomic():
+            open_ticket(ticket, user)
+            IdempotencyKey.objects.create(
+                user=user,
+                key=key,
+                ticket=ticket,
+                expires_at=ticket.created_at + timedelta(
+                    seconds=settings.TICKET_IDEMPOTENCY_TTL,
+                ),
+            )
+    except IntegrityError:
+        previous = created_ticket(user, key)
+        if previous is None:
+            raise
+        return previous, False
+    return ticket, True
+
+
+def purge_expired_keys(chunk_size=5000):
+    """Delete expired keys in ``chunk_size`` batches. Returns the count."""
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+    total = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.db.models import DurationField, ExpressionWrapper, Q, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from app_tickets.calendars import get_calendar
+from app_tickets.models import ACTIVE_STATUSES, SlaInterval, Ticket
+
+
+def record_status(ticket, status, at):
+    """Close ``ticket``'s open span at ``at`` and open one for ``status``.
+
+    Statuses outside :data:`ACTIVE_STATUSES` stop the clock, so they
+    only close the previous span.
+    """
+    record_statuses([ticket], status, at)
+
+
+def record_statuses(tickets, status, at):
+    """:func:`record_status` for many tickets in two statements."""
+    SlaInterval.objects.filter(
+        ticket__in=tickets, ended_at__isnull=True,
+    ).update(ended_at=at)
+    if status in ACTIVE_STATUSES:
+        state = (
+            SlaInterval.State.PAUSED
+            if status == Ticket.Status.WAITING_CUSTOMER
+            else SlaInterval.State.RUNNING
+        )
+        SlaInterval.objects.bulk_create([
+            SlaInterval(
+                ticket=ticket,
+                status=status,
+                state=state,
+                started_at=at,
+            )
+            for ticket in tickets
+        ])
+
+
+def spans_between(start, end, queryset=None):
+    """Spans overlapping ``start``..``end``, annotated with ``duration``.
+
+    ``duration`` is the part of each span inside the window, computed
+    by the database. Open spans count up to now.
+    """
+    if queryset is None:
+        queryset = SlaInterval.objects.all()
+    open_end = min(end, timezone.now())
+    return queryset.filter(
+        Q(ended_at__isnull=True) | Q(ended_at__gt=start),
+        started_at__lt=end,
+    ).annotate(
+        duration=ExpressionWrapper(
+            Least(Coalesce('ended_at', Value(open_end)), Value(end))
+            - Greatest('started_at', Value(start)),
+            output_field=DurationField(),
+        ),
+    )
+
+
+def interval_totals(start, end, *group_by, queryset=None):
+    """Running and paused time within ``start``..``end`` in one query.
+
+    Returns one row per ``group_by`` values and state, e.g.
+    ``interval_totals(q_start, q_end, 'ticket__project')`` for time
+    spent per project in a quarter. Durations are on the SLA calendar,
+    like :func:`rt_at`, so they add up to the same FRT/RT measures.
+    """
+    open_end = min(end, timezone.now())
+    keys, starts, ends = [], [], []
+    for *key, started, ended in (
+        spans_between(start, end, queryset)
+        .order_by(*group_by, 'state')
+        .values_list(*group_by, 'state', 'started_at', 'ended_at')
+    ):
+        keys.append(tuple(key))
+        starts.append(max(started, start))
+        ends.append(min(ended or open_end, end))
+    totals = {}
+    for key, seconds in zip(keys, get_calendar().elapsed_many(starts, ends)):
+        totals[key] = totals.get(key, 0) + seconds
+    fields = (*group_by, 'state')
+    return [
+        {**dict(zip(fields, key)), 'total': timedelta(seconds=seconds)}
+        for key, seconds in totals.items()
+    ]
+
+
+def rt_at(ticket, at=None):
+    """Return the RT that ``ticket`` had at ``at`` (default: now).
+
+    Sums its running spans up to ``at`` on the SLA calendar. Only
+    active statuses have spans, so the time a reopened ticket spent
+    resolved is not counted; :func:`app_tickets.sla.calculate_rt`, which
+    measures from ``created_at`` less the recorded pauses, counts it.
+    """
+    at = at or timezone.now()
+    spans = SlaInterval.objects.filter(
+        ticket=ticket,
+        state=SlaInterval.State.RUNNING,
+        started_at__lt=at,
+    ).values_list('started_at', 'ended_at')
+    starts = [started for started, _ in spans]
+    ends = [min(ended or at, at) for _, ended in spans]
+    return timedelta(
+        seconds=sum(get_calendar().elapsed_many(starts, ends)),
+    )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from app_tickets.archive import archive_old_audit_logs
+
+
+class Command(BaseCommand):
+    help = (
+        'Move os meses de log de auditoria anteriores à janela '
+        'AUDIT_HOT_MONTHS para arquivos NDJSON compactados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=None,
+            help='Meses mantidos no banco (padrão: AUDIT_HOT_MONTHS).',
+        )
+        parser.add_argument(
+            '--dir', default=None,
+            help='Diretório dos arquivos (padrão: AUDIT_ARCHIVE_DIR).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rows, files = archive_old_audit_logs(
+            hot_months=options['months'],
+            directory=options['dir'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{rows} registro(s) arquivado(s) em {files} arquivo(s).'
+        ))
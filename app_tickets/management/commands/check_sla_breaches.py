@@ -1,59 +1,41 @@
+import time
+
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 
-from app_teams.models import Team
-from app_tickets.models import AuditLog, Ticket
-from app_tickets.sla import is_rt_breached
+from app_tickets.escalation import escalate_tickets
+from app_tickets.sla import rt_breached_tickets
 
 
 class Command(BaseCommand):
     help = 'Verifica chamados com SLA de RT estourado e escalona para N2.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
     def handle(self, *args, **options):
-        active_statuses = [
-            Ticket.Status.TRIAGE,
-            Ticket.Status.IN_PROGRESS,
-            Ticket.Status.WAITING_CUSTOMER,
-        ]
-        tickets = Ticket.objects.filter(
-            status__in=active_statuses,
-            is_escalated=False,
-        ).select_related('assigned_team')
-
-        escalated = 0
-        for ticket in tickets:
-            if is_rt_breached(ticket):
-                self._escalate(ticket)
-                escalated += 1
+        now = timezone.now()
+
+        started = time.monotonic()
+        ticket_ids = list(
+            rt_breached_tickets(now)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        scanned = time.monotonic()
+
+        escalated = len(escalate_tickets(
+            ticket_ids, now=now, chunk_size=options['chunk_size'],
+        ))
+        finished = time.monotonic()
 
         self.stdout.write(
             self.style.SUCCESS(
                 f'{escalated} chamado(s) escalonado(s).'
             )
         )
-
-    def _escalate(self, ticket):
-        from django.utils import timezone
-
-        n2_team = Team.objects.filter(
-            level=Team.Level.N2,
-        ).first()
-
-        ticket.rt_breached_at = timezone.now()
-        ticket.is_escalated = True
-        if n2_team:
-            ticket.assigned_team = n2_team
-        ticket.save(update_fields=[
-            'rt_breached_at',
-            'is_escalated',
-            'assigned_team',
-        ])
-
-        AuditLog.objects.create(
-            ticket=ticket,
-            changed_by=None,
-            changed_by_name='SYSTEM',
-            old_status=ticket.status,
-            new_status=ticket.status,
-            reason='RT_BREACHED_ESCALATED — SLA estourado, '
-                   'escalonado para N2.',
+        self.stdout.write(
+            f'Busca: {len(ticket_ids)} chamado(s) em '
+            f'{(scanned - started) * 1000:.0f} ms; '
+            f'escalonamento: {(finished - scanned) * 1000:.0f} ms.'
         )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app_tickets.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove as chaves de idempotência de criação de chamados '
+        'cujo prazo (TICKET_IDEMPOTENCY_TTL) já expirou.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = purge_expired_keys(chunk_size=options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'{total} chave(s) removida(s).')
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app_tickets.activity import rebuild_comment_markers
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula a contagem de comentários e as datas do último '
+        'comentário e da última atividade dos chamados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild_comment_markers(chunk_size=options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'{total} chamado(s) atualizado(s).')
+        )
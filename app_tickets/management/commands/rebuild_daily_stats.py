@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app_tickets.models import AuditLog
+from app_tickets.stats import rebuild_daily_stats, rebuildable_since
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói as estatísticas diárias de chamados a partir do '
+        'log de auditoria.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help=(
+                'Data inicial (AAAA-MM-DD), posterior aos meses '
+                'arquivados. Padrão: primeiro log.'
+            ),
+        )
+        parser.add_argument(
+            '--until',
+            help='Data final (AAAA-MM-DD). Padrão: hoje.',
+        )
+        parser.add_argument('--chunk-days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        until = self._parse(options['until']) or timezone.localdate()
+        since = self._parse(options['since'])
+        floor = rebuildable_since()
+        if since is not None and floor is not None and since < floor:
+            raise CommandError(
+                f'Os logs anteriores a {floor:%Y-%m-%d} foram arquivados; '
+                f'use --since {floor:%Y-%m-%d} ou posterior.'
+            )
+        if since is None:
+            first = AuditLog.objects.aggregate(
+                first=Min('created_at'),
+            )['first']
+            if first is None:
+                self.stdout.write('Nenhum log de auditoria encontrado.')
+                return
+            since = timezone.localdate(first)
+            if floor is not None:
+                # A month whose archiving was interrupted still has
+                # rows, but not all of them.
+                since = max(since, floor)
+        if since > until:
+            raise CommandError('--since deve ser anterior a --until.')
+
+        written = rebuild_daily_stats(
+            since, until, chunk_days=max(options['chunk_days'], 1),
+        )
+        days = (until - since + timedelta(days=1)).days
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{written} linha(s) gravada(s) em {days} dia(s).'
+            )
+        )
+
+    def _parse(self, value):
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            # Well formed but impossible, such as 2026-02-30.
+            day = None
+        if day is None:
+            raise CommandError(f'Data inválida: {value}')
+        return day
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app_tickets.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual dos chamados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index(chunk_size=options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'{total} chamado(s) indexado(s).')
+        )
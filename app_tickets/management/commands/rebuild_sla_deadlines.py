@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from app_tickets.models import Ticket
+from app_tickets.sla import (
+    rebuild_sla_deadlines,
+    rebuild_sla_deadlines_if_changed,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula os prazos e os tempos medidos de SLA dos chamados '
+        'ativos com o calendário configurado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--if-changed', action='store_true',
+            help=(
+                'Só recalcula se o calendário ou as metas padrão mudaram '
+                'desde o último recálculo.'
+            ),
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help=(
+                'Inclui chamados resolvidos e fechados, alterando os '
+                'relatórios de meses anteriores.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['if_changed']:
+            total = rebuild_sla_deadlines_if_changed(
+                chunk_size=options['chunk_size'],
+            )
+            if total is None:
+                self.stdout.write('Configuração de SLA inalterada.')
+                return
+        else:
+            total = rebuild_sla_deadlines(
+                chunk_size=options['chunk_size'],
+                queryset=Ticket.objects.all() if options['all'] else None,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'{total} chamado(s) atualizado(s).')
+        )
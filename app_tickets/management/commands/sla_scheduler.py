@@ -0,0 +1,57 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from app_tickets.scheduler import DeadlineScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Processo contínuo que escalona chamados para N2 assim que o '
+        'prazo de RT expira.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval', type=float, default=5,
+            help='Segundos entre consultas por chamados alterados.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Executa um único ciclo e encerra.',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = DeadlineScheduler(
+            poll_interval=options['poll_interval'],
+            chunk_size=options['chunk_size'],
+        )
+
+        scheduler.load()
+
+        if options['once']:
+            escalated = scheduler.run_once()
+            self.stdout.write(
+                self.style.SUCCESS(f'{escalated} chamado(s) escalonado(s).')
+            )
+            return
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: scheduler.stop())
+
+        self.stdout.write(
+            f'Agendador de SLA iniciado '
+            f'({len(scheduler.deadlines)} prazo(s) carregado(s)).'
+        )
+
+        def report(escalated):
+            if escalated:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'{escalated} chamado(s) escalonado(s).'
+                    )
+                )
+
+        scheduler.run(on_cycle=report)
+        self.stdout.write('Agendador de SLA encerrado.')
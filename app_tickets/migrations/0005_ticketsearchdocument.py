@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:25
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_SQL = '''
+INSERT INTO app_tickets_ticketsearchdocument
+    (ticket_id, document, search_vector, updated_at)
+SELECT
+    t.id,
+    concat_ws(E'\\n', t.title, t.description, c.body),
+    setweight(to_tsvector('portuguese', t.title), 'A')
+    || setweight(to_tsvector('portuguese', t.description), 'B')
+    || setweight(to_tsvector('portuguese', coalesce(c.body, '')), 'C'),
+    now()
+FROM app_tickets_ticket t
+LEFT JOIN (
+    SELECT ticket_id, string_agg(content, E'\\n' ORDER BY created_at) AS body
+    FROM app_tickets_comment
+    GROUP BY ticket_id
+) c ON c.ticket_id = t.id
+'''
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX ticket_search_vector_gin '
+        'ON app_tickets_ticketsearchdocument USING gin (search_vector)'
+    )
+    schema_editor.execute(BACKFILL_SQL)
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS ticket_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0004_ticket_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSearchDocument',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='app_tickets.ticket', verbose_name='chamado')),
+                ('document', models.TextField(blank=True, default='', verbose_name='documento')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='vetor de busca')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+            ],
+            options={
+                'verbose_name': 'documento de busca',
+                'verbose_name_plural': 'documentos de busca',
+            },
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
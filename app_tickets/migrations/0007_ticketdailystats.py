@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_projects', '0001_initial'),
+        ('app_tickets', '0006_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='data')),
+                ('priority', models.CharField(choices=[('P1', 'P1 — Crítica'), ('P2', 'P2 — Alta'), ('P3', 'P3 — Média')], max_length=2, verbose_name='prioridade')),
+                ('category', models.CharField(choices=[('GITHUB_REPO', 'Novo Repositório no GitHub'), ('GITHUB_USER', 'Adicionar usuário em um repositório no GitHub'), ('SERVICE_OUTAGE', 'Reporte de Indisponibilidade de Serviço'), ('S3_BUCKET', 'Criação de Bucket S3 para um projeto'), ('OTHER', 'Outros')], max_length=20, verbose_name='categoria')),
+                ('opened', models.PositiveIntegerField(default=0, verbose_name='abertos')),
+                ('resolved', models.PositiveIntegerField(default=0, verbose_name='resolvidos')),
+                ('breached', models.PositiveIntegerField(default=0, verbose_name='SLA estourado')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='app_projects.project', verbose_name='projeto')),
+            ],
+            options={
+                'verbose_name': 'estatística diária',
+                'verbose_name_plural': 'estatísticas diárias',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['project', 'date'], name='ticket_daily_stats_project_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'project', 'priority', 'category'), name='ticket_daily_stats_unique', nulls_distinct=False)],
+            },
+        ),
+    ]
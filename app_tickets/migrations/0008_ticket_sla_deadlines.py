@@ -0,0 +1,76 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:34
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+# Snapshot of app_tickets.sla.SLA_TARGETS when the columns were added.
+SLA_TARGETS = {
+    'P1': {'frt': timedelta(minutes=30), 'rt': timedelta(hours=4)},
+    'P2': {'frt': timedelta(hours=2), 'rt': timedelta(hours=24)},
+    'P3': {'frt': timedelta(hours=8), 'rt': timedelta(hours=72)},
+}
+BATCH_SIZE = 1000
+
+
+def backfill_deadlines(apps, schema_editor):
+    Ticket = apps.get_model('app_tickets', 'Ticket')
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            batch = list(
+                Ticket.objects.filter(pk__gt=last_pk)
+                .only(
+                    'pk', 'priority', 'created_at',
+                    'rt_paused_at', 'rt_paused_seconds',
+                )
+                .order_by('pk')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for ticket in batch:
+                targets = SLA_TARGETS.get(ticket.priority, SLA_TARGETS['P3'])
+                ticket.frt_due_at = ticket.created_at + targets['frt']
+                due = (
+                    ticket.created_at + targets['rt']
+                    + timedelta(seconds=ticket.rt_paused_seconds)
+                )
+                if ticket.rt_paused_at and due >= ticket.rt_paused_at:
+                    due = None
+                ticket.rt_due_at = due
+            Ticket.objects.bulk_update(batch, ['frt_due_at', 'rt_due_at'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill batch commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('app_projects', '0001_initial'),
+        ('app_teams', '0001_initial'),
+        ('app_tickets', '0007_ticketdailystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='frt_due_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='prazo de FRT'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rt_due_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='prazo de RT'),
+        ),
+        migrations.RunPython(
+            backfill_deadlines, migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ['TRIAGE', 'IN_PROGRESS', 'WAITING_CUSTOMER'])), fields=['rt_due_at'], name='ticket_rt_due_active_idx'),
+        ),
+    ]
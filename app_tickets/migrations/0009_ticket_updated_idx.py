@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_projects', '0001_initial'),
+        ('app_teams', '0001_initial'),
+        ('app_tickets', '0008_ticket_sla_deadlines'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['updated_at'], name='ticket_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0009_ticket_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EscalationRequest',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='escalation_request', serialize=False, to='app_tickets.ticket', verbose_name='chamado')),
+                ('requested_at', models.DateTimeField(auto_now_add=True, verbose_name='solicitado em')),
+            ],
+            options={
+                'verbose_name': 'pedido de escalonamento',
+                'verbose_name_plural': 'pedidos de escalonamento',
+                'ordering': ['requested_at'],
+            },
+        ),
+    ]
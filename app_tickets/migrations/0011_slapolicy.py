@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_projects', '0001_initial'),
+        ('app_tickets', '0010_escalationrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlaPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, choices=[('GITHUB_REPO', 'Novo Repositório no GitHub'), ('GITHUB_USER', 'Adicionar usuário em um repositório no GitHub'), ('SERVICE_OUTAGE', 'Reporte de Indisponibilidade de Serviço'), ('S3_BUCKET', 'Criação de Bucket S3 para um projeto'), ('OTHER', 'Outros')], default='', help_text='Vazio vale para todas as categorias.', max_length=20, verbose_name='categoria')),
+                ('priority', models.CharField(choices=[('P1', 'P1 — Crítica'), ('P2', 'P2 — Alta'), ('P3', 'P3 — Média')], max_length=2, verbose_name='prioridade')),
+                ('frt_target', models.DurationField(verbose_name='meta de FRT')),
+                ('rt_target', models.DurationField(verbose_name='meta de RT')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+                ('project', models.ForeignKey(blank=True, help_text='Vazio vale para todos os projetos.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sla_policies', to='app_projects.project', verbose_name='projeto')),
+            ],
+            options={
+                'verbose_name': 'política de SLA',
+                'verbose_name_plural': 'políticas de SLA',
+                'ordering': ['project', 'category', 'priority'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'category', 'priority'), name='sla_policy_unique', nulls_distinct=False)],
+            },
+        ),
+    ]
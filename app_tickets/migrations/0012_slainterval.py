@@ -0,0 +1,86 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:42
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+# Snapshot of the statuses whose SLA clock runs, and the paused one.
+ACTIVE_STATUSES = ['TRIAGE', 'IN_PROGRESS', 'WAITING_CUSTOMER']
+PAUSED_STATUS = 'WAITING_CUSTOMER'
+BATCH_SIZE = 1000
+
+
+def backfill_intervals(apps, schema_editor):
+    """Replay each ticket's status changes from the audit log."""
+    Ticket = apps.get_model('app_tickets', 'Ticket')
+    AuditLog = apps.get_model('app_tickets', 'AuditLog')
+    SlaInterval = apps.get_model('app_tickets', 'SlaInterval')
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            created = dict(
+                Ticket.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'created_at')[:BATCH_SIZE]
+            )
+            if not created:
+                break
+            changes = (
+                AuditLog.objects.filter(ticket_id__in=list(created))
+                .exclude(old_status=models.F('new_status'))
+                .order_by('ticket_id', 'created_at', 'pk')
+                .values_list(
+                    'ticket_id', 'old_status', 'new_status', 'created_at',
+                )
+            )
+            intervals = []
+            open_span = {}
+            for ticket_id, old, new, at in changes:
+                if old in ('', 'OPEN'):
+                    at = created[ticket_id]
+                span = open_span.pop(ticket_id, None)
+                if span is not None:
+                    span.ended_at = at
+                if new in ACTIVE_STATUSES:
+                    span = SlaInterval(
+                        ticket_id=ticket_id,
+                        status=new,
+                        state='PAUSED' if new == PAUSED_STATUS else 'RUNNING',
+                        started_at=at,
+                    )
+                    intervals.append(span)
+                    open_span[ticket_id] = span
+            SlaInterval.objects.bulk_create(intervals)
+        last_pk = max(created)
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill batch commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('app_tickets', '0011_slapolicy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlaInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('OPEN', 'Aberto'), ('TRIAGE', 'Triagem'), ('IN_PROGRESS', 'Em Andamento'), ('WAITING_CUSTOMER', 'Aguardando Cliente'), ('RESOLVED', 'Resolvido'), ('CLOSED', 'Fechado')], max_length=20, verbose_name='status')),
+                ('state', models.CharField(choices=[('RUNNING', 'Em contagem'), ('PAUSED', 'Pausado')], max_length=10, verbose_name='estado')),
+                ('started_at', models.DateTimeField(verbose_name='início')),
+                ('ended_at', models.DateTimeField(blank=True, null=True, verbose_name='fim')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sla_intervals', to='app_tickets.ticket', verbose_name='chamado')),
+            ],
+            options={
+                'verbose_name': 'intervalo de SLA',
+                'verbose_name_plural': 'intervalos de SLA',
+                'ordering': ['ticket', 'started_at'],
+                'indexes': [models.Index(fields=['ticket', 'started_at'], name='sla_interval_ticket_idx'), models.Index(fields=['started_at'], name='sla_interval_started_idx')],
+            },
+        ),
+        migrations.RunPython(
+            backfill_intervals, migrations.RunPython.noop,
+        ),
+    ]
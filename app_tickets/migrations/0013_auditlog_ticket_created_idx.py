@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0012_slainterval'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['ticket', 'created_at', 'id'], name='auditlog_ticket_created_idx'),
+        ),
+    ]
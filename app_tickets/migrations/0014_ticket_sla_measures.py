@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_projects', '0001_initial'),
+        ('app_teams', '0001_initial'),
+        ('app_tickets', '0013_auditlog_ticket_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='frt_seconds',
+            field=models.IntegerField(blank=True, null=True, verbose_name='FRT medido (s)'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rt_seconds',
+            field=models.IntegerField(blank=True, null=True, verbose_name='RT medido (s)'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['first_response_at'], name='ticket_first_response_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['resolved_at'], name='ticket_resolved_idx'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:57
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+# Snapshot of author role -> marker field.
+COMMENT_MARKERS = {
+    'ADMIN': 'last_admin_comment_at',
+    'CUSTOMER': 'last_customer_comment_at',
+}
+BATCH_SIZE = 1000
+
+
+def backfill_markers(apps, schema_editor):
+    """Fill the markers from existing comments, one batch per commit."""
+    Ticket = apps.get_model('app_tickets', 'Ticket')
+    Comment = apps.get_model('app_tickets', 'Comment')
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            tickets = list(
+                Ticket.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', 'created_at')[:BATCH_SIZE]
+            )
+            if not tickets:
+                break
+            stats = {
+                row['ticket']: row
+                for row in Comment.objects.filter(ticket__in=tickets)
+                .values('ticket')
+                .annotate(
+                    count=models.Count('id'),
+                    latest=models.Max('created_at'),
+                    **{
+                        marker: models.Max(
+                            'created_at',
+                            filter=models.Q(author__role=role),
+                        )
+                        for role, marker in COMMENT_MARKERS.items()
+                    },
+                )
+                .order_by()
+            }
+            for ticket in tickets:
+                row = stats.get(ticket.pk, {})
+                ticket.comment_count = row.get('count', 0)
+                for marker in COMMENT_MARKERS.values():
+                    setattr(ticket, marker, row.get(marker))
+                ticket.last_activity_at = max(
+                    ticket.created_at,
+                    row.get('latest') or ticket.created_at,
+                )
+            Ticket.objects.bulk_update(tickets, [
+                'comment_count',
+                *COMMENT_MARKERS.values(),
+                'last_activity_at',
+            ])
+        last_pk = tickets[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill batch commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('app_projects', '0001_initial'),
+        ('app_teams', '0001_initial'),
+        ('app_tickets', '0015_ticket_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='comentários'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='última atividade'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_admin_comment_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='último comentário do suporte'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_customer_comment_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='último comentário do cliente'),
+        ),
+        migrations.RunPython(
+            backfill_markers, migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['last_activity_at', 'id'], name='ticket_activity_idx'),
+        ),
+    ]
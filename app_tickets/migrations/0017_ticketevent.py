@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0016_ticket_comment_markers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCursor',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='consumidor')),
+                ('position', models.BigIntegerField(default=0, verbose_name='último evento')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+            ],
+            options={
+                'verbose_name': 'cursor de eventos',
+                'verbose_name_plural': 'cursores de eventos',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TicketEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('CREATED', 'Criado'), ('TRANSITIONED', 'Status alterado'), ('ASSIGNED', 'Atribuído'), ('COMMENTED', 'Comentado'), ('ESCALATED', 'Escalonado')], max_length=20, verbose_name='tipo')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='dados')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='criado em')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='app_tickets.ticket', verbose_name='chamado')),
+            ],
+            options={
+                'verbose_name': 'evento de chamado',
+                'verbose_name_plural': 'eventos de chamado',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0017_ticketevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True, verbose_name='mês')),
+                ('path', models.CharField(max_length=500, verbose_name='arquivo')),
+                ('rows', models.PositiveIntegerField(verbose_name='registros')),
+                ('last_id', models.BigIntegerField(verbose_name='último registro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+            ],
+            options={
+                'verbose_name': 'arquivo de auditoria',
+                'verbose_name_plural': 'arquivos de auditoria',
+                'ordering': ['month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['created_at', 'id'], name='auditlog_created_idx'),
+        ),
+    ]
@@ -0,0 +1,157 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:20
+
+import os
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models, transaction
+
+PAUSED_STATUS = 'WAITING_CUSTOMER'
+RESUMED_STATUS = 'IN_PROGRESS'
+BATCH_SIZE = 1000
+
+# Snapshot of the business calendar of app_tickets.calendars and the
+# SLA settings when pauses moved to calendar seconds: Monday to Friday,
+# 08:00-18:00 in America/Sao_Paulo, without national holidays and the
+# extra SLA_HOLIDAYS. Read from the environment the way the settings
+# read them then, so later changes to either cannot alter this step.
+TIME_ZONE = ZoneInfo('America/Sao_Paulo')
+WORKDAYS = range(5)
+OPENS, CLOSES = time(8), time(18)
+
+
+def _easter(year):
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    weekday = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * weekday) // 451
+    month, day = divmod(h + weekday - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _national_holidays(year):
+    holidays = {
+        date(year, 1, 1),
+        _easter(year) - timedelta(days=2),
+        date(year, 4, 21),
+        date(year, 5, 1),
+        date(year, 9, 7),
+        date(year, 10, 12),
+        date(year, 11, 2),
+        date(year, 11, 15),
+        date(year, 12, 25),
+    }
+    if year >= 2024:
+        holidays.add(date(year, 11, 20))
+    return holidays
+
+
+def _business_seconds(start, end, holidays):
+    """Working seconds between ``start`` and ``end``, day by day."""
+    start, end = start.astimezone(TIME_ZONE), end.astimezone(TIME_ZONE)
+    total = 0.0
+    day = start.date()
+    while day <= end.date():
+        if day.weekday() in WORKDAYS and not (
+            day in holidays or day in _national_holidays(day.year)
+        ):
+            lower = max(start, datetime.combine(day, OPENS, TIME_ZONE))
+            upper = min(end, datetime.combine(day, CLOSES, TIME_ZONE))
+            if upper > lower:
+                total += upper.timestamp() - lower.timestamp()
+        day += timedelta(days=1)
+    return total
+
+
+def _pauses(changes):
+    """``{ticket_id: [(paused_at, resumed_at)]}`` of the counted pauses.
+
+    Only a return to ``IN_PROGRESS`` added a pause to
+    ``rt_paused_seconds``; resolving straight from a pause did not.
+    """
+    pauses = {}
+    paused_at = {}
+    for ticket_id, old, new, at in changes:
+        if new == PAUSED_STATUS:
+            paused_at[ticket_id] = at
+        elif old == PAUSED_STATUS:
+            start = paused_at.pop(ticket_id, None)
+            if start is not None and new == RESUMED_STATUS:
+                pauses.setdefault(ticket_id, []).append((start, at))
+    return pauses
+
+
+def recompute_paused_seconds(apps, schema_editor):
+    """Convert ``rt_paused_seconds`` from wall-clock to calendar seconds.
+
+    Pauses are replayed from the audit log. A ticket is only rewritten
+    when its replayed wall-clock pauses account for the stored value,
+    so tickets already counted in calendar seconds, or whose history
+    was archived, are left as they are.
+    """
+    if os.environ.get('SLA_CALENDAR', 'business') != 'business':
+        return
+    holidays = {
+        date.fromisoformat(d)
+        for d in os.environ.get('SLA_HOLIDAYS', '').split(',') if d
+    }
+    Ticket = apps.get_model('app_tickets', 'Ticket')
+    AuditLog = apps.get_model('app_tickets', 'AuditLog')
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            batch = list(
+                Ticket.objects.filter(pk__gt=last_pk, rt_paused_seconds__gt=0)
+                .only('pk', 'rt_paused_seconds')
+                .order_by('pk')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            pauses = _pauses(
+                AuditLog.objects.filter(ticket_id__in=[t.pk for t in batch])
+                .exclude(old_status=models.F('new_status'))
+                .order_by('ticket_id', 'created_at', 'pk')
+                .values_list(
+                    'ticket_id', 'old_status', 'new_status', 'created_at',
+                )
+            )
+            changed = []
+            for ticket in batch:
+                spans = pauses.get(ticket.pk, [])
+                wall = sum(
+                    int((end - start).total_seconds())
+                    for start, end in spans
+                )
+                # Audit rows are stamped a moment after the transition,
+                # which may shift each pause by a second.
+                slack = len(spans)
+                if not spans or abs(wall - ticket.rt_paused_seconds) > slack:
+                    continue
+                ticket.rt_paused_seconds = sum(
+                    int(_business_seconds(start, end, holidays))
+                    for start, end in spans
+                )
+                changed.append(ticket)
+            Ticket.objects.bulk_update(changed, ['rt_paused_seconds'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # Each batch commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('app_tickets', '0021_ticket_duplicate_of'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            recompute_paused_seconds, migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0022_ticket_rt_paused_calendar_seconds'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_sla_pending_idx',
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0023_remove_ticket_sla_pending_idx'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='EscalationRequest',
+        ),
+    ]
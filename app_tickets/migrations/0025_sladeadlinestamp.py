@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tickets', '0024_delete_escalationrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlaDeadlineStamp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='assinatura')),
+                ('rebuilt_at', models.DateTimeField(auto_now=True, verbose_name='recalculado em')),
+            ],
+            options={
+                'verbose_name': 'assinatura dos prazos de SLA',
+                'verbose_name_plural': 'assinaturas dos prazos de SLA',
+            },
+        ),
+    ]
@@ -1,5 +1,11 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
+
+# Statuses whose SLA clock is still running. Kept as plain strings so the
+# partial indexes below can reference them from Ticket.Meta.
+ACTIVE_STATUSES = ['TRIAGE', 'IN_PROGRESS', 'WAITING_CUSTOMER']
 
 
 class Ticket(models.Model):
@@ -85,6 +91,17 @@ class Ticket(models.Model):
         related_name='assigned_tickets',
         verbose_name='agente atribuído',
     )
+    # Set at creation when the text nearly matches an active ticket of
+    # the same project (see app_tickets.duplicates); always the first
+    # ticket of the group, never another duplicate.
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        verbose_name='possível duplicata de',
+    )
     first_response_at = models.DateTimeField(
         'primeira resposta em',
         null=True,
@@ -118,13 +135,114 @@ class Ticket(models.Model):
         'escalado',
         default=False,
     )
-    created_at = models.DateTimeField('criado em', auto_now_add=True)
+    frt_due_at = models.DateTimeField(
+        'prazo de FRT',
+        null=True,
+        blank=True,
+    )
+    # Null while the RT clock is paused (see app_tickets.sla).
+    rt_due_at = models.DateTimeField(
+        'prazo de RT',
+        null=True,
+        blank=True,
+    )
+    # FRT/RT measured on the SLA calendar when the ticket got its first
+    # response / was resolved, so reports can aggregate them in SQL.
+    frt_seconds = models.IntegerField(
+        'FRT medido (s)',
+        null=True,
+        blank=True,
+    )
+    rt_seconds = models.IntegerField(
+        'RT medido (s)',
+        null=True,
+        blank=True,
+    )
+    # Comment activity, kept up to date by app_tickets.activity so
+    # transition rules, list sorting and "needs reply" read the row.
+    comment_count = models.PositiveIntegerField(
+        'comentários',
+        default=0,
+    )
+    last_admin_comment_at = models.DateTimeField(
+        'último comentário do suporte',
+        null=True,
+        blank=True,
+    )
+    last_customer_comment_at = models.DateTimeField(
+        'último comentário do cliente',
+        null=True,
+        blank=True,
+    )
+    last_activity_at = models.DateTimeField(
+        'última atividade',
+        default=timezone.now,
+    )
+    # Bumped by every write to the ticket's workflow fields, so a form
+    # rendered from an older version can be refused (see
+    # app_tickets.services.lock_ticket).
+    version = models.PositiveIntegerField('versão', default=0)
+    # Not auto_now_add: creation sets it up front so the SLA deadlines
+    # go into the same INSERT (see app_tickets.services.open_ticket).
+    created_at = models.DateTimeField(
+        'criado em', default=timezone.now, editable=False,
+    )
     updated_at = models.DateTimeField('atualizado em', auto_now=True)
 
     class Meta:
         verbose_name = 'chamado'
         verbose_name_plural = 'chamados'
         ordering = ['-created_at']
+        indexes = [
+            # Default list order and keyset pagination.
+            models.Index(
+                fields=['created_at', 'id'],
+                name='ticket_created_idx',
+            ),
+            # List filters, each followed by the list order.
+            models.Index(
+                fields=['status', 'created_at'],
+                name='ticket_status_created_idx',
+            ),
+            models.Index(
+                fields=['priority', 'created_at'],
+                name='ticket_priority_created_idx',
+            ),
+            models.Index(
+                fields=['project', 'created_at'],
+                name='ticket_project_created_idx',
+            ),
+            models.Index(
+                fields=['created_by', 'created_at'],
+                name='ticket_creator_created_idx',
+            ),
+            # SLA percentile report periods.
+            models.Index(
+                fields=['first_response_at'],
+                name='ticket_first_response_idx',
+            ),
+            models.Index(
+                fields=['resolved_at'],
+                name='ticket_resolved_idx',
+            ),
+            # Breach scan and "most urgent first": range scans on the
+            # RT deadline of active tickets.
+            models.Index(
+                fields=['rt_due_at'],
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name='ticket_rt_due_active_idx',
+            ),
+            # "Most recent activity" list order.
+            models.Index(
+                fields=['last_activity_at', 'id'],
+                name='ticket_activity_idx',
+            ),
+            # Change feed polled by the SLA scheduler.
+            models.Index(
+                fields=['updated_at'],
+                name='ticket_updated_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'#{self.pk} — {self.title}'
@@ -196,6 +314,326 @@ class AuditLog(models.Model):
         verbose_name = 'log de auditoria'
         verbose_name_plural = 'logs de auditoria'
         ordering = ['-created_at']
+        indexes = [
+            # Per-ticket history in order, as read by the LEAD/LAG
+            # window in app_tickets.reports.
+            models.Index(
+                fields=['ticket', 'created_at', 'id'],
+                name='auditlog_ticket_created_idx',
+            ),
+            # Month ranges streamed out and deleted by the archiver.
+            models.Index(
+                fields=['created_at', 'id'],
+                name='auditlog_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'#{self.ticket_id}: {self.old_status} → {self.new_status}'
+
+
+class TicketSearchDocument(models.Model):
+    ticket = models.OneToOneField(
+        Ticket,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        verbose_name='chamado',
+    )
+    document = models.TextField('documento', blank=True, default='')
+    # Only populated on PostgreSQL; the GIN index is created by the
+    # migration because SQLite has no equivalent.
+    search_vector = SearchVectorField(
+        'vetor de busca',
+        null=True,
+        editable=False,
+    )
+    updated_at = models.DateTimeField('atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'documento de busca'
+        verbose_name_plural = 'documentos de busca'
+
+    def __str__(self):
+        return f'Documento de busca de #{self.ticket_id}'
+
+
+class TicketDailyStats(models.Model):
+    date = models.DateField('data')
+    project = models.ForeignKey(
+        'app_projects.Project',
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='projeto',
+        null=True,
+        blank=True,
+    )
+    priority = models.CharField(
+        'prioridade',
+        max_length=2,
+        choices=Ticket.Priority.choices,
+    )
+    category = models.CharField(
+        'categoria',
+        max_length=20,
+        choices=Ticket.Category.choices,
+    )
+    opened = models.PositiveIntegerField('abertos', default=0)
+    resolved = models.PositiveIntegerField('resolvidos', default=0)
+    breached = models.PositiveIntegerField('SLA estourado', default=0)
+
+    class Meta:
+        verbose_name = 'estatística diária'
+        verbose_name_plural = 'estatísticas diárias'
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'project', 'priority', 'category'],
+                name='ticket_daily_stats_unique',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['project', 'date'],
+                name='ticket_daily_stats_project_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.project_id} {self.priority} {self.category}'
+
+
+class SlaPolicy(models.Model):
+    """FRT/RT targets for a project, category and priority.
+
+    An empty project or category matches every project or category; the
+    most specific policy wins and tickets with no matching policy use
+    the defaults in ``app_tickets.sla.SLA_TARGETS``.
+    """
+
+    project = models.ForeignKey(
+        'app_projects.Project',
+        on_delete=models.CASCADE,
+        related_name='sla_policies',
+        verbose_name='projeto',
+        null=True,
+        blank=True,
+        help_text='Vazio vale para todos os projetos.',
+    )
+    category = models.CharField(
+        'categoria',
+        max_length=20,
+        choices=Ticket.Category.choices,
+        blank=True,
+        default='',
+        help_text='Vazio vale para todas as categorias.',
+    )
+    priority = models.CharField(
+        'prioridade',
+        max_length=2,
+        choices=Ticket.Priority.choices,
+    )
+    frt_target = models.DurationField('meta de FRT')
+    rt_target = models.DurationField('meta de RT')
+    created_at = models.DateTimeField('criado em', auto_now_add=True)
+    updated_at = models.DateTimeField('atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'política de SLA'
+        verbose_name_plural = 'políticas de SLA'
+        ordering = ['project', 'category', 'priority']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'category', 'priority'],
+                name='sla_policy_unique',
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        project = self.project or 'Todos os projetos'
+        category = self.get_category_display() or 'todas as categorias'
+        return f'{project} / {category} / {self.priority}'
+
+
+class SlaInterval(models.Model):
+    """One span of a ticket's SLA clock, running or paused.
+
+    Rows are only ever appended; the one open span of a ticket
+    (``ended_at`` empty) is closed when the ticket changes status.
+    """
+
+    class State(models.TextChoices):
+        RUNNING = 'RUNNING', 'Em contagem'
+        PAUSED = 'PAUSED', 'Pausado'
+
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name='sla_intervals',
+        verbose_name='chamado',
+    )
+    status = models.CharField(
+        'status',
+        max_length=20,
+        choices=Ticket.Status.choices,
+    )
+    state = models.CharField(
+        'estado',
+        max_length=10,
+        choices=State.choices,
+    )
+    started_at = models.DateTimeField('início')
+    ended_at = models.DateTimeField('fim', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'intervalo de SLA'
+        verbose_name_plural = 'intervalos de SLA'
+        ordering = ['ticket', 'started_at']
+        indexes = [
+            models.Index(
+                fields=['ticket', 'started_at'],
+                name='sla_interval_ticket_idx',
+            ),
+            # Period reports scan spans by start.
+            models.Index(
+                fields=['started_at'],
+                name='sla_interval_started_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'#{self.ticket_id} {self.state} {self.started_at}'
+
+
+class SlaDeadlineStamp(models.Model):
+    """The SLA settings the stored deadlines were last rebuilt with.
+
+    A single row, holding a digest written by
+    :func:`app_tickets.sla.rebuild_sla_deadlines_if_changed`.
+    """
+
+    fingerprint = models.CharField('assinatura', max_length=64)
+    rebuilt_at = models.DateTimeField('recalculado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'assinatura dos prazos de SLA'
+        verbose_name_plural = 'assinaturas dos prazos de SLA'
+
+    def __str__(self):
+        return self.fingerprint[:12]
+
+
+class TicketEvent(models.Model):
+    """A ticket change, written in the same transaction as the change.
+
+    The outbox read by ``app_tickets.events`` consumers in ``id`` order.
+    """
+
+    class Kind(models.TextChoices):
+        CREATED = 'CREATED', 'Criado'
+        TRANSITIONED = 'TRANSITIONED', 'Status alterado'
+        ASSIGNED = 'ASSIGNED', 'Atribuído'
+        COMMENTED = 'COMMENTED', 'Comentado'
+        ESCALATED = 'ESCALATED', 'Escalonado'
+
+    id = models.BigAutoField(primary_key=True)
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name='events',
+        verbose_name='chamado',
+    )
+    kind = models.CharField('tipo', max_length=20, choices=Kind.choices)
+    payload = models.JSONField('dados', default=dict, blank=True)
+    created_at = models.DateTimeField('criado em', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'evento de chamado'
+        verbose_name_plural = 'eventos de chamado'
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.id} #{self.ticket_id} {self.kind}'
+
+
+class EventCursor(models.Model):
+    """How far a named consumer has read the :class:`TicketEvent` outbox."""
+
+    name = models.CharField('consumidor', max_length=100, primary_key=True)
+    position = models.BigIntegerField('último evento', default=0)
+    updated_at = models.DateTimeField('atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'cursor de eventos'
+        verbose_name_plural = 'cursores de eventos'
+        ordering = ['name']
+
+    def __str__(self):
+        return f'{self.name} @ {self.position}'
+
+
+class AuditArchive(models.Model):
+    """One month of :class:`AuditLog` moved to a compressed file.
+
+    Written by ``app_tickets.archive`` before the month's rows are
+    deleted, so an interrupted run can finish the deletion.
+    """
+
+    month = models.DateField('mês', unique=True)
+    path = models.CharField('arquivo', max_length=500)
+    rows = models.PositiveIntegerField('registros')
+    last_id = models.BigIntegerField('último registro')
+    created_at = models.DateTimeField('criado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'arquivo de auditoria'
+        verbose_name_plural = 'arquivos de auditoria'
+        ordering = ['month']
+
+    def __str__(self):
+        return f'{self.month:%Y-%m} ({self.rows} registros)'
+
+
+class IdempotencyKey(models.Model):
+    """A client-chosen key a ticket was created under.
+
+    Repeating the key before ``expires_at`` returns the recorded ticket
+    instead of creating another one (see ``app_tickets.idempotency``).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='usuário',
+    )
+    key = models.CharField('chave', max_length=255)
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='chamado',
+    )
+    created_at = models.DateTimeField('criado em', auto_now_add=True)
+    expires_at = models.DateTimeField('expira em')
+
+    class Meta:
+        verbose_name = 'chave de idempotência'
+        verbose_name_plural = 'chaves de idempotência'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'],
+                name='idempotency_key_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['expires_at'],
+                name='idempotency_expires_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.key} -> #{self.ticket_id}'
@@ -0,0 +1,272 @@
+import time
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Aggregate, Count, F, FloatField, Q
+from django.utils import timezone
+
+from app_tickets.models import Ticket
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+# Dimension -> (key column, label column) over the joined ticket row.
+TIME_IN_STATUS_GROUPS = {
+    'ticket': ('t.id', 't.title'),
+    'team': ('t.assigned_team_id', 'tm.name'),
+    'agent': ('t.assigned_agent_id', 'u.email'),
+    'priority': ('t.priority', 't.priority'),
+}
+
+# Vendor spellings of "seconds between two timestamps" and of the
+# two-argument min/max.
+_SQL_DIALECTS = {
+    'postgresql': {
+        'seconds': 'EXTRACT(EPOCH FROM ({end} - {start}))',
+        'least': 'LEAST',
+        'greatest': 'GREATEST',
+    },
+    'sqlite': {
+        'seconds': '(julianday({end}) - julianday({start})) * 86400',
+        'least': 'MIN',
+        'greatest': 'MAX',
+    },
+}
+
+_TIME_IN_STATUS_SQL = """
+WITH spans AS (
+    SELECT
+        a.ticket_id,
+        a.new_status AS status,
+        a.created_at AS started_at,
+        LEAD(a.created_at) OVER (
+            PARTITION BY a.ticket_id ORDER BY a.created_at, a.id
+        ) AS ended_at
+    FROM app_tickets_auditlog a
+    WHERE a.old_status <> a.new_status
+      AND a.created_at < %(end)s
+      AND a.ticket_id IN (
+          SELECT id FROM app_tickets_ticket
+          WHERE created_at < %(end)s
+            AND (closed_at IS NULL OR closed_at >= %(start)s)
+      )
+), clipped AS (
+    SELECT
+        ticket_id,
+        status,
+        {greatest}(started_at, %(start)s) AS started_at,
+        {least}(COALESCE(ended_at, %(cap)s), %(end)s) AS ended_at
+    FROM spans
+    WHERE status <> %(closed)s
+)
+SELECT
+    {key} AS key,
+    {label} AS label,
+    c.status,
+    SUM({seconds}) AS seconds,
+    COUNT(DISTINCT c.ticket_id) AS tickets
+FROM clipped c
+JOIN app_tickets_ticket t ON t.id = c.ticket_id
+LEFT JOIN app_teams_team tm ON tm.id = t.assigned_team_id
+LEFT JOIN app_accounts_user u ON u.id = t.assigned_agent_id
+WHERE c.ended_at > c.started_at
+GROUP BY {key}, {label}, c.status
+ORDER BY {key}, c.status
+"""
+
+
+def time_in_status(start, end, group_by='priority', chunk_size=2000):
+    """Yield the time spent in each status between ``start`` and ``end``.
+
+    Spans come from ``LEAD`` over each ticket's status changes in the
+    audit log and are clipped to the window and summed in the database,
+    one row per ``group_by`` value and status. Rows are fetched from a
+    server-side cursor ``chunk_size`` at a time, so long ranges never
+    sit in memory. Team and agent are the ticket's current assignment.
+    """
+    key, label = TIME_IN_STATUS_GROUPS[group_by]
+    dialect = _SQL_DIALECTS[connection.vendor]
+    sql = _TIME_IN_STATUS_SQL.format(
+        key=key,
+        label=label,
+        seconds=dialect['seconds'].format(
+            start='c.started_at', end='c.ended_at',
+        ),
+        least=dialect['least'],
+        greatest=dialect['greatest'],
+    )
+    adapt = connection.ops.adapt_datetimefield_value
+    params = {
+        'start': adapt(start),
+        'end': adapt(end),
+        'cap': adapt(min(end, timezone.now())),
+        'closed': Ticket.Status.CLOSED,
+    }
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(chunk_size):
+            for key_value, label_value, status, seconds, tickets in rows:
+                yield {
+                    'key': key_value,
+                    'label': label_value,
+                    'status': status,
+                    'seconds': round(float(seconds)),
+                    'tickets': tickets,
+                }
+
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Metric -> (event that places a ticket in a month, measured seconds,
+# condition for having met the SLA).
+SLA_METRICS = {
+    'frt': (
+        'first_response_at',
+        'frt_seconds',
+        Q(first_response_at__lte=F('frt_due_at')),
+    ),
+    'rt': (
+        'resolved_at',
+        'rt_seconds',
+        # rt_breached_at is only set once the escalation ran, so it
+        # misses late tickets resolved before that. A resolved ticket
+        # has no deadline when it was resolved while paused on time.
+        Q(resolved_at__lte=F('rt_due_at')) | Q(rt_due_at__isnull=True),
+    ),
+}
+SLA_REPORT_GROUPS = {
+    'priority': 'priority',
+    'team': 'assigned_team__name',
+}
+SLA_REPORT_VERSION_KEY = 'reports:sla:version'
+
+# A resolved ticket can be reopened for this long (see
+# app_tickets.services), so a month is final only after it passes.
+REOPEN_WINDOW = timedelta(days=7)
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL ``percentile_cont(fraction) WITHIN GROUP (ORDER BY ...)``."""
+
+    function = 'percentile_cont'
+    template = (
+        '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    )
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def percentiles(values, fractions=PERCENTILES):
+    """Linear-interpolation percentiles, as ``percentile_cont`` computes."""
+    if not values:
+        return [None] * len(fractions)
+    if np is not None:
+        return np.percentile(
+            np.asarray(values, dtype=float),
+            [f * 100 for f in fractions],
+        ).tolist()
+    ordered = sorted(values)
+    result = []
+    for fraction in fractions:
+        position = fraction * (len(ordered) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        result.append(
+            ordered[lower]
+            + (ordered[upper] - ordered[lower]) * (position - lower)
+        )
+    return result
+
+
+def month_bounds(month):
+    """Aware start of ``month`` (a date) and of the following month."""
+    first = month.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return (
+        timezone.make_aware(datetime.combine(first, dt_time.min)),
+        timezone.make_aware(datetime.combine(following, dt_time.min)),
+    )
+
+
+def sla_percentiles(month, group_by='priority'):
+    """FRT and RT distribution and compliance for ``month`` per group.
+
+    Returns ``{group: {'frt': stats, 'rt': stats}}`` where ``stats`` has
+    ``count``, ``compliance`` (percent) and one ``p50``/``p90``/``p99``
+    entry per percentile, in seconds. Months that can no longer change
+    are cached for ``SLA_REPORT_FINAL_CACHE_TTL`` seconds, which bounds
+    how long a process whose cache missed an invalidation serves them;
+    the others for ``SLA_REPORT_CACHE_TTL`` seconds.
+    """
+    start, end = month_bounds(month)
+    version = cache.get_or_set(SLA_REPORT_VERSION_KEY, time.time_ns(), None)
+    key = f'reports:sla:{version}:{start:%Y-%m}:{group_by}'
+    report = cache.get(key)
+    if report is None:
+        report = _compute_sla_percentiles(start, end, group_by)
+        final = end + REOPEN_WINDOW <= timezone.now()
+        cache.set(
+            key, report,
+            settings.SLA_REPORT_FINAL_CACHE_TTL if final
+            else settings.SLA_REPORT_CACHE_TTL,
+        )
+    return report
+
+
+def invalidate_sla_percentiles():
+    """Drop every cached month, e.g. after measures were recomputed.
+
+    Called by :func:`app_tickets.sla.rebuild_sla_deadlines`, the one
+    path that rewrites deadlines and measures of past months.
+    """
+    try:
+        cache.incr(SLA_REPORT_VERSION_KEY)
+    except ValueError:
+        cache.set(SLA_REPORT_VERSION_KEY, time.time_ns(), None)
+
+
+def _compute_sla_percentiles(start, end, group_by):
+    group = SLA_REPORT_GROUPS[group_by]
+    names = [f'p{round(f * 100)}' for f in PERCENTILES]
+    report = {}
+    for metric, (event, measure, met) in SLA_METRICS.items():
+        qs = Ticket.objects.filter(**{
+            f'{event}__gte': start,
+            f'{event}__lt': end,
+            f'{measure}__isnull': False,
+        })
+        aggregates = {
+            'count': Count('id'),
+            'met': Count('id', filter=met),
+        }
+        if connection.vendor == 'postgresql':
+            aggregates.update({
+                name: PercentileCont(measure, fraction)
+                for name, fraction in zip(names, PERCENTILES)
+            })
+        rows = qs.values(group).annotate(**aggregates).order_by(group)
+
+        if connection.vendor != 'postgresql':
+            values = {}
+            for key, seconds in qs.values_list(group, measure):
+                values.setdefault(key, []).append(seconds)
+            rows = [
+                {**row, **dict(zip(names, percentiles(values[row[group]])))}
+                for row in rows
+            ]
+
+        for row in rows:
+            report.setdefault(row[group], {})[metric] = {
+                'count': row['count'],
+                'compliance': 100 * row['met'] / row['count'],
+                **{name: row[name] for name in names},
+            }
+    return report
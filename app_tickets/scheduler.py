@@ -0,0 +1,166 @@
+import heapq
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from app_tickets.escalation import escalate_tickets
+from app_tickets.models import ACTIVE_STATUSES, Ticket
+from app_tickets.sla import (
+    policy_fingerprint,
+    policy_table,
+    rebuild_sla_deadlines,
+)
+
+
+class DeadlineScheduler:
+    """Escalate tickets as their RT deadlines pass.
+
+    Keeps a min-heap of ``(rt_due_at, ticket_id)`` for every active,
+    non-escalated ticket. After one full load it only reads tickets
+    whose ``updated_at`` moved past the last one seen, so each cycle
+    costs a single indexed range query plus the escalations that are
+    actually due. Superseded heap entries are skipped lazily when popped.
+    Due tickets that could not be escalated, because another worker
+    held their row, go back on the heap for the next cycle.
+
+    ``poll_interval`` bounds how long a new or changed ticket can go
+    unseen. ``commit_lag`` re-reads a short window before the
+    watermark, so rows committed after a poll but stamped before it
+    are not missed.
+
+    When an SLA policy is saved or deleted, the deadlines of the active
+    tickets are recomputed here, off the request that changed it. Each
+    load recomputes them too, so changes made while no scheduler was
+    running are not lost. Resolved and closed tickets are left alone.
+    """
+
+    def __init__(self, poll_interval=5, commit_lag=60, chunk_size=500):
+        self.poll_interval = timedelta(seconds=poll_interval)
+        self.commit_lag = timedelta(seconds=commit_lag)
+        self.chunk_size = chunk_size
+        self.heap = []
+        self.deadlines = {}
+        self.retry = []
+        self.watermark = None
+        self.policies = None
+        self.stopped = threading.Event()
+
+    def load(self):
+        """Rebuild the heap from every pending ticket."""
+        self.heap = []
+        self.deadlines = {}
+        self.retry = []
+        self.watermark = None
+        self.policies = None
+        self._rebuild_if_policies_changed()
+        self._apply(self._pending().values_list(
+            'pk', 'rt_due_at', 'updated_at', 'status', 'is_escalated',
+        ))
+        heapq.heapify(self.heap)
+        if self.watermark is None:
+            self.watermark = timezone.now()
+
+    def refresh(self):
+        """Apply tickets changed since the last load or refresh."""
+        if self.watermark is None:
+            return self.load()
+        self._rebuild_if_policies_changed()
+        rows = Ticket.objects.filter(
+            updated_at__gte=self.watermark - self.commit_lag,
+        ).values_list(
+            'pk', 'rt_due_at', 'updated_at', 'status', 'is_escalated',
+        )
+        self._apply(rows, push=True)
+
+    def _rebuild_if_policies_changed(self):
+        policies = policy_fingerprint()
+        if policies == self.policies:
+            return
+        policy_table.clear()
+        rebuild_sla_deadlines(chunk_size=self.chunk_size)
+        # Set last, so a failed rebuild is retried on the next cycle.
+        self.policies = policies
+
+    def _pending(self):
+        return Ticket.objects.filter(
+            status__in=ACTIVE_STATUSES,
+            is_escalated=False,
+            rt_due_at__isnull=False,
+        )
+
+    def _apply(self, rows, push=False):
+        for pk, due, updated_at, status, is_escalated in rows:
+            if self.watermark is None or updated_at > self.watermark:
+                self.watermark = updated_at
+            if (
+                status not in ACTIVE_STATUSES
+                or is_escalated
+                or due is None
+            ):
+                self.deadlines.pop(pk, None)
+                continue
+            if self.deadlines.get(pk) == due:
+                continue
+            self.deadlines[pk] = due
+            if push:
+                heapq.heappush(self.heap, (due, pk))
+            else:
+                self.heap.append((due, pk))
+
+    def pop_due(self, now):
+        """Remove and return the ``(deadline, id)`` entries before ``now``."""
+        due = []
+        while self.heap and self.heap[0][0] < now:
+            deadline, pk = heapq.heappop(self.heap)
+            if self.deadlines.get(pk) == deadline:
+                del self.deadlines[pk]
+                due.append((deadline, pk))
+        return due
+
+    def next_wakeup(self, now):
+        wakeup = now + self.poll_interval
+        if self.heap and self.heap[0][0] < wakeup:
+            wakeup = self.heap[0][0]
+        return wakeup
+
+    def run_once(self):
+        """Refresh, escalate what is due and return the escalated count."""
+        self.refresh()
+        # Pushed back only now, after refresh() had a chance to drop
+        # the ones that changed, so a row held elsewhere is retried
+        # once per cycle rather than spun on.
+        for entry in self.retry:
+            heapq.heappush(self.heap, entry)
+        self.retry = []
+
+        now = timezone.now()
+        escalated = 0
+        due = self.pop_due(now)
+        if due:
+            done = set(escalate_tickets(
+                [pk for _, pk in due], now=now, chunk_size=self.chunk_size,
+            ))
+            escalated += len(done)
+            for deadline, pk in due:
+                if pk not in done:
+                    self.deadlines[pk] = deadline
+                    self.retry.append((deadline, pk))
+        return escalated
+
+    def run(self, on_cycle=None):
+        if self.watermark is None:
+            self.load()
+        while not self.stopped.is_set():
+            close_old_connections()
+            escalated = self.run_once()
+            if on_cycle:
+                on_cycle(escalated)
+            now = timezone.now()
+            delay = (self.next_wakeup(now) - now).total_seconds()
+            # Deadlines are exclusive (rt_due_at < now): wake just past it.
+            self.stopped.wait(max(delay, 0) + 0.01)
+
+    def stop(self):
+        self.stopped.set()
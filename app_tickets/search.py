@@ -0,0 +1,108 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import F, TextField, Value
+
+from app_tickets.models import Comment, Ticket, TicketSearchDocument
+
+
+SEARCH_CONFIG = 'portuguese'
+
+
+def _text(value):
+    return Value(value or '', output_field=TextField())
+
+
+class PostgresSearchEngine:
+    """Ranked full-text search over the ``tsvector`` column (GIN)."""
+
+    def build_vector(self, title, description, comments):
+        return (
+            SearchVector(_text(title), weight='A', config=SEARCH_CONFIG)
+            + SearchVector(
+                _text(description), weight='B', config=SEARCH_CONFIG,
+            )
+            + SearchVector(
+                _text(comments), weight='C', config=SEARCH_CONFIG,
+            )
+        )
+
+    def search(self, qs, q):
+        query = SearchQuery(
+            q, config=SEARCH_CONFIG, search_type='websearch',
+        )
+        return qs.filter(
+            search_document__search_vector=query,
+        ).annotate(
+            search_rank=SearchRank(
+                F('search_document__search_vector'), query,
+            ),
+        ).order_by('-search_rank', '-created_at')
+
+
+class FallbackSearchEngine:
+    """Substring match over the stored document, used on SQLite."""
+
+    def build_vector(self, title, description, comments):
+        return None
+
+    def search(self, qs, q):
+        return qs.filter(search_document__document__icontains=q)
+
+
+def get_search_engine():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchEngine()
+    return FallbackSearchEngine()
+
+
+def search_tickets(qs, q):
+    """Filter ``qs`` by ``q`` across title, description and comments."""
+    return get_search_engine().search(qs, q)
+
+
+def update_search_document(ticket):
+    """Rebuild the search document of a single ticket."""
+    comments = '\n'.join(
+        Comment.objects.filter(ticket_id=ticket.pk)
+        .order_by('created_at')
+        .values_list('content', flat=True)
+    )
+    TicketSearchDocument.objects.update_or_create(
+        ticket_id=ticket.pk,
+        defaults={
+            'document': '\n'.join(
+                [ticket.title, ticket.description, comments],
+            ),
+        },
+    )
+
+    vector = get_search_engine().build_vector(
+        ticket.title, ticket.description, comments,
+    )
+    if vector is not None:
+        TicketSearchDocument.objects.filter(
+            ticket_id=ticket.pk,
+        ).update(search_vector=vector)
+
+
+def rebuild_search_index(chunk_size=500):
+    """Rebuild every search document in chunks. Returns the count."""
+    total = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            Ticket.objects.filter(pk__gt=last_pk)
+            .only('pk', 'title', 'description')
+            .order_by('pk')[:chunk_size]
+        )
+        if not chunk:
+            break
+        for ticket in chunk:
+            update_search_document(ticket)
+        total += len(chunk)
+        last_pk = chunk[-1].pk
+    return total
@@ -1,12 +1,30 @@
+from django.db import transaction
 from django.utils import timezone
 
-from app_tickets.models import AuditLog, Comment, Ticket
+from app_tickets.audit import audit_log, buffered_audit
+from app_tickets.calendars import get_calendar
+from app_tickets.dashboard import invalidate_summary
+from app_tickets.events import emit, emit_many
+from app_tickets.ledger import record_status, record_statuses
+from app_tickets.models import Ticket, TicketEvent
+from app_tickets.sla import calculate_rt, set_sla_deadlines
+from app_tickets.stats import record_ticket_event, record_ticket_events
 
 
 class TransitionError(Exception):
     pass
 
 
+class ConcurrentUpdateError(TransitionError):
+    """The ticket changed after the user loaded it."""
+
+    def __init__(self, message=None):
+        super().__init__(message or (
+            'O chamado foi alterado por outra pessoa enquanto você o '
+            'editava. Recarregue a página e tente novamente.'
+        ))
+
+
 VALID_TRANSITIONS = {
     Ticket.Status.TRIAGE: [
         Ticket.Status.IN_PROGRESS,
@@ -33,12 +51,129 @@ REASON_REQUIRED = {
 }
 
 
-def transition_ticket(ticket, new_status, user, reason=''):
-    old_status = ticket.status
-    _validate_transition(ticket, old_status, new_status, user, reason)
+def lock_ticket(ticket, version=None):
+    """Reload ``ticket`` from its row under ``SELECT ... FOR UPDATE``.
+
+    Must run inside a transaction. Rules are then checked against the
+    committed state and concurrent writers queue up behind the lock.
+    ``version`` is the one the user's form was rendered from; if the
+    ticket moved on since, :class:`ConcurrentUpdateError` is raised.
+    """
+    ticket.refresh_from_db(from_queryset=Ticket.objects.select_for_update())
+    if version is not None and ticket.version != version:
+        raise ConcurrentUpdateError()
+
 
+def open_ticket(ticket, user):
+    """Insert the unsaved ``ticket`` from ``user`` straight into triage.
+
+    The ticket is written once, already in ``TRIAGE`` and with its SLA
+    deadlines, and its SLA span, both audit entries of the automatic
+    ``OPEN`` -> ``TRIAGE`` hand-off, its event and the daily rollup
+    commit with it or not at all.
+    """
     now = timezone.now()
+    ticket.created_by = user
+    ticket.created_at = now
+    ticket.status = Ticket.Status.TRIAGE
+    set_sla_deadlines(ticket)
+    with transaction.atomic(), buffered_audit():
+        ticket.save(force_insert=True)
+        record_status(ticket, ticket.status, now)
+        audit_log(
+            ticket, '', Ticket.Status.OPEN,
+            'Chamado criado pelo cliente.', user,
+        )
+        audit_log(
+            ticket, Ticket.Status.OPEN, Ticket.Status.TRIAGE,
+            'Transição automática para triagem.',
+        )
+        emit(
+            ticket, TicketEvent.Kind.CREATED,
+            status=ticket.status,
+            priority=ticket.priority,
+            category=ticket.category,
+            project=ticket.project_id,
+            duplicate_of=ticket.duplicate_of_id,
+            user=user.pk,
+        )
+        record_ticket_event(ticket, 'opened', now)
+        invalidate_summary(ticket)
+    return ticket
+
+
+def transition_ticket(ticket, new_status, user, reason='', version=None):
+    with transaction.atomic(), buffered_audit():
+        lock_ticket(ticket, version)
+        old_status = ticket.status
+        _validate_transition(ticket, old_status, new_status, user, reason)
+
+        now = timezone.now()
+        _apply_transition(ticket, old_status, new_status, now)
+        ticket.save(update_fields=TRANSITION_FIELDS)
+        record_status(ticket, new_status, now)
+
+        audit_log(ticket, old_status, new_status, reason, user)
+        emit(
+            ticket, TicketEvent.Kind.TRANSITIONED,
+            **_transition_payload(old_status, new_status, user, reason),
+        )
+        if new_status == Ticket.Status.RESOLVED:
+            record_ticket_event(ticket, 'resolved', now)
+        invalidate_summary(ticket)
+
+
+def assign_ticket(ticket, user, reason, version=None, **fields):
+    """Set ``assigned_team``/``assigned_agent`` on ``ticket`` and audit it.
+
+    Only the fields passed are written, under the row lock.
+    """
+    with transaction.atomic(), buffered_audit():
+        lock_ticket(ticket, version)
+        for name, value in fields.items():
+            setattr(ticket, name, value)
+        ticket.version += 1
+        ticket.save(update_fields=[*fields, 'version', 'updated_at'])
+        audit_log(ticket, ticket.status, ticket.status, reason, user)
+        emit(
+            ticket, TicketEvent.Kind.ASSIGNED,
+            **_assignment_payload(ticket, user),
+        )
+
+
+def _transition_payload(old_status, new_status, user, reason):
+    return {
+        'old_status': old_status,
+        'new_status': new_status,
+        'reason': reason,
+        'user': user.pk,
+    }
 
+
+def _assignment_payload(ticket, user):
+    return {
+        'team': ticket.assigned_team_id,
+        'agent': ticket.assigned_agent_id,
+        'user': user.pk,
+    }
+
+
+# Fields _apply_transition may change, for bulk_update.
+TRANSITION_FIELDS = [
+    'status',
+    'rt_paused_at',
+    'rt_paused_seconds',
+    'resolved_at',
+    'rt_seconds',
+    'closed_at',
+    'frt_due_at',
+    'rt_due_at',
+    'version',
+    'updated_at',
+]
+
+
+def _apply_transition(ticket, old_status, new_status, now):
     if new_status == Ticket.Status.WAITING_CUSTOMER:
         ticket.rt_paused_at = now
 
@@ -47,12 +182,13 @@ def transition_ticket(ticket, new_status, user, reason=''):
         and new_status == Ticket.Status.IN_PROGRESS
     ):
         if ticket.rt_paused_at:
-            paused = (now - ticket.rt_paused_at).total_seconds()
-            ticket.rt_paused_seconds += int(paused)
+            paused = get_calendar().elapsed(ticket.rt_paused_at, now)
+            ticket.rt_paused_seconds += int(paused.total_seconds())
             ticket.rt_paused_at = None
 
     if new_status == Ticket.Status.RESOLVED:
         ticket.resolved_at = now
+        ticket.rt_seconds = int(calculate_rt(ticket).total_seconds())
 
     if new_status == Ticket.Status.CLOSED:
         ticket.closed_at = now
@@ -62,18 +198,101 @@ def transition_ticket(ticket, new_status, user, reason=''):
         and new_status == Ticket.Status.IN_PROGRESS
     ):
         ticket.resolved_at = None
+        ticket.rt_seconds = None
 
+    set_sla_deadlines(ticket, now)
     ticket.status = new_status
-    ticket.save()
-
-    AuditLog.objects.create(
-        ticket=ticket,
-        changed_by=user,
-        changed_by_name=user.full_name or user.email,
-        old_status=old_status,
-        new_status=new_status,
-        reason=reason,
-    )
+    ticket.version += 1
+    ticket.updated_at = now
+
+
+def bulk_transition(ticket_ids, new_status, user, reason=''):
+    """Move many tickets to ``new_status`` at once.
+
+    Every ticket goes through the same rules as
+    :func:`transition_ticket`, which only read the fetched rows. The
+    valid ones are
+    written with one ``bulk_update`` and one buffered audit insert in a
+    transaction. Returns ``(tickets, errors)``, where ``errors`` maps
+    the id of each rejected ticket to the reason.
+    """
+    now = timezone.now()
+    applied = []
+    payloads = []
+    with transaction.atomic(), buffered_audit():
+        tickets = list(
+            Ticket.objects.filter(pk__in=ticket_ids)
+            .select_related('assigned_agent')
+            .select_for_update(of=('self',))
+            .order_by('pk')
+        )
+        errors = _missing(ticket_ids, tickets)
+        for ticket in tickets:
+            old_status = ticket.status
+            try:
+                _validate_transition(
+                    ticket, old_status, new_status, user, reason,
+                )
+            except TransitionError as e:
+                errors[ticket.pk] = str(e)
+                continue
+            _apply_transition(ticket, old_status, new_status, now)
+            applied.append(ticket)
+            payloads.append(
+                _transition_payload(old_status, new_status, user, reason),
+            )
+            audit_log(ticket, old_status, new_status, reason, user)
+
+        if applied:
+            Ticket.objects.bulk_update(applied, TRANSITION_FIELDS)
+            record_statuses(applied, new_status, now)
+            emit_many(applied, TicketEvent.Kind.TRANSITIONED, payloads)
+            if new_status == Ticket.Status.RESOLVED:
+                record_ticket_events(applied, 'resolved', now)
+            invalidate_summary(*applied)
+    return applied, errors
+
+
+def bulk_assign(ticket_ids, user, team=None, agent=None):
+    """Assign ``team`` and/or ``agent`` to many tickets at once.
+
+    Returns ``(tickets, errors)`` like :func:`bulk_transition`.
+    """
+    now = timezone.now()
+    with transaction.atomic(), buffered_audit():
+        tickets = list(
+            Ticket.objects.filter(pk__in=ticket_ids)
+            .select_for_update()
+            .order_by('pk')
+        )
+        errors = _missing(ticket_ids, tickets)
+        for ticket in tickets:
+            if team is not None:
+                ticket.assigned_team = team
+            if agent is not None:
+                ticket.assigned_agent = agent
+            ticket.version += 1
+            ticket.updated_at = now
+            audit_log(
+                ticket, ticket.status, ticket.status,
+                'Atribuição de time/responsável.', user,
+            )
+        if tickets:
+            Ticket.objects.bulk_update(tickets, [
+                'assigned_team', 'assigned_agent', 'version', 'updated_at',
+            ])
+            emit_many(tickets, TicketEvent.Kind.ASSIGNED, [
+                _assignment_payload(ticket, user) for ticket in tickets
+            ])
+    return tickets, errors
+
+
+def _missing(ticket_ids, tickets):
+    found = {ticket.pk for ticket in tickets}
+    return {
+        pk: 'Chamado não encontrado.'
+        for pk in ticket_ids if pk not in found
+    }
 
 
 def _validate_transition(ticket, old_status, new_status, user, reason):
@@ -134,11 +353,7 @@ def _validate_close(ticket, user):
         raise TransitionError(
             'Apenas administradores podem fechar chamados.'
         )
-    has_admin_comment = Comment.objects.filter(
-        ticket=ticket,
-        author__role='ADMIN',
-    ).exists()
-    if not has_admin_comment:
+    if ticket.last_admin_comment_at is None:
         raise TransitionError(
             'É necessário ao menos um comentário de administrador '
             'para fechar o chamado.'
@@ -159,12 +374,10 @@ def _validate_reopen(ticket, user, reason):
         raise TransitionError(
             'Não é possível reabrir chamados resolvidos há mais de 7 dias.'
         )
-    has_customer_comment = Comment.objects.filter(
-        ticket=ticket,
-        author__role='CUSTOMER',
-        created_at__gt=ticket.resolved_at,
-    ).exists()
-    if not has_customer_comment:
+    if not (
+        ticket.last_customer_comment_at
+        and ticket.last_customer_comment_at > ticket.resolved_at
+    ):
         raise TransitionError(
             'É necessário um comentário do cliente após a resolução '
             'para reabrir o chamado.'
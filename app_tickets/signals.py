@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app_tickets.activity import rebuild_comment_markers, record_comment
+from app_tickets.events import emit
+from app_tickets.models import Comment, SlaPolicy, Ticket, TicketEvent
+from app_tickets.search import update_search_document
+from app_tickets.sla import invalidate_sla_policies
+
+SEARCHABLE_TICKET_FIELDS = {'title', 'description'}
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket(sender, instance, created, update_fields, **kwargs):
+    if (
+        created
+        or update_fields is None
+        or SEARCHABLE_TICKET_FIELDS & set(update_fields)
+    ):
+        update_search_document(instance)
+
+
+def _reindex_ticket(ticket_id):
+    ticket = Ticket.objects.filter(pk=ticket_id).only(
+        'pk', 'title', 'description',
+    ).first()
+    if ticket:
+        update_search_document(ticket)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    _reindex_ticket(instance.ticket_id)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    # After commit: when the whole ticket is being deleted, rebuilding
+    # its document mid-cascade would recreate a row pointing at it.
+    ticket_id = instance.ticket_id
+    transaction.on_commit(lambda: _reindex_ticket(ticket_id))
+
+
+@receiver(post_save, sender=Comment)
+def track_comment(sender, instance, created, **kwargs):
+    if created:
+        record_comment(instance, instance.author.role)
+        emit(
+            instance.ticket, TicketEvent.Kind.COMMENTED,
+            comment=instance.pk,
+            author=instance.author_id,
+            role=instance.author.role,
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def untrack_comment(sender, instance, **kwargs):
+    rebuild_comment_markers(
+        queryset=Ticket.objects.filter(pk=instance.ticket_id),
+    )
+
+
+@receiver(post_save, sender=SlaPolicy)
+@receiver(post_delete, sender=SlaPolicy)
+def reload_sla_policies(sender, **kwargs):
+    invalidate_sla_policies()
@@ -1,8 +1,22 @@
+import hashlib
+import threading
+import time
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
 from django.utils import timezone
 
-from app_tickets.models import Ticket
+from app_tickets.calendars import get_calendar
+from app_tickets.models import (
+    ACTIVE_STATUSES,
+    SlaDeadlineStamp,
+    SlaPolicy,
+    Ticket,
+)
+from app_tickets.reports import invalidate_sla_percentiles
 
 
 SLA_TARGETS = {
@@ -21,22 +35,139 @@ SLA_TARGETS = {
 }
 
 
+POLICY_VERSION_KEY = 'sla:policies:version'
+
+
+class PolicyTable:
+    """In-process copy of every :class:`SlaPolicy`, keyed for lookup.
+
+    The table is loaded once and reused until the shared version
+    number in the cache changes. That number is read at most once every
+    ``SLA_POLICY_CHECK_SECONDS``, so resolving targets normally costs
+    no query and no cache round trip at all. A cache that is not shared
+    between processes (such as the default ``LocMemCache``) only
+    carries the new version to the process that made the change, so
+    the table is also reloaded once it is ``SLA_POLICY_MAX_AGE_SECONDS``
+    old, whatever the version says.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.version = None
+        self.checked_at = None
+        self.loaded_at = None
+        self.targets = {}
+
+    def get(self):
+        now = time.monotonic()
+        if (
+            self.checked_at is not None
+            and now - self.checked_at < settings.SLA_POLICY_CHECK_SECONDS
+        ):
+            return self.targets
+        with self.lock:
+            version = cache.get_or_set(
+                POLICY_VERSION_KEY, time.time_ns(), None,
+            )
+            if (
+                version != self.version
+                or now - self.loaded_at
+                >= settings.SLA_POLICY_MAX_AGE_SECONDS
+            ):
+                self.targets = {
+                    (p.project_id, p.category, p.priority): {
+                        'frt': p.frt_target,
+                        'rt': p.rt_target,
+                    }
+                    for p in SlaPolicy.objects.all()
+                }
+                self.version = version
+                self.loaded_at = now
+            self.checked_at = now
+        return self.targets
+
+
+policy_table = PolicyTable()
+
+
+def resolve_targets(project_id, category, priority):
+    """Return the FRT/RT targets for a project, category and priority.
+
+    The most specific :class:`SlaPolicy` wins: project and category,
+    then project, then category, then one for every project and
+    category. Without a policy the ``SLA_TARGETS`` defaults apply.
+    """
+    targets = policy_table.get()
+    for key in (
+        (project_id, category, priority),
+        (project_id, '', priority),
+        (None, category, priority),
+        (None, '', priority),
+    ):
+        if key in targets:
+            return targets[key]
+    return SLA_TARGETS.get(priority, SLA_TARGETS['P3'])
+
+
+def get_targets(ticket):
+    """Return the FRT/RT targets that apply to ``ticket``."""
+    return resolve_targets(
+        ticket.project_id, ticket.category, ticket.priority,
+    )
+
+
+def invalidate_sla_policies():
+    """Make every process reload the policy table after commit.
+
+    The deadlines persisted on active tickets are recomputed by the
+    ``sla-scheduler`` service (:mod:`app_tickets.scheduler`), which
+    watches :func:`policy_fingerprint`, rather than by the request that
+    changed the policy. Resolved and closed tickets keep theirs.
+    """
+    def bump():
+        try:
+            cache.incr(POLICY_VERSION_KEY)
+        except ValueError:
+            cache.set(POLICY_VERSION_KEY, time.time_ns(), None)
+        policy_table.clear()
+
+    transaction.on_commit(bump)
+
+
+def policy_fingerprint():
+    """A value that changes whenever a :class:`SlaPolicy` is saved or
+    deleted, read from the database so every process agrees on it."""
+    return tuple(SlaPolicy.objects.aggregate(
+        changed=Max('updated_at'), count=Count('pk'),
+    ).values())
+
+
 def calculate_frt(ticket):
     """Return FRT timedelta or None if not yet responded."""
     if ticket.first_response_at:
-        return ticket.first_response_at - ticket.created_at
+        return get_calendar().elapsed(
+            ticket.created_at, ticket.first_response_at,
+        )
     return None
 
 
 def calculate_rt(ticket):
-    """Return RT timedelta excluding paused time."""
+    """Return RT timedelta excluding paused time.
+
+    Both the elapsed and the paused time are measured on the SLA
+    calendar; ``rt_paused_seconds`` is kept in calendar seconds too.
+    """
+    calendar = get_calendar()
     now = timezone.now()
     end = ticket.resolved_at or now
-    total = end - ticket.created_at
+    total = calendar.elapsed(ticket.created_at, end)
     paused = timedelta(seconds=ticket.rt_paused_seconds)
 
     if ticket.rt_paused_at and not ticket.resolved_at:
-        paused += now - ticket.rt_paused_at
+        paused += calendar.elapsed(ticket.rt_paused_at, now)
 
     rt = total - paused
     return max(rt, timedelta(0))
@@ -44,7 +175,7 @@ def calculate_rt(ticket):
 
 def check_sla_status(ticket):
     """Return SLA status dict with breach info."""
-    targets = SLA_TARGETS.get(ticket.priority, SLA_TARGETS['P3'])
+    targets = get_targets(ticket)
 
     frt = calculate_frt(ticket)
     rt = calculate_rt(ticket)
@@ -65,6 +196,179 @@ def check_sla_status(ticket):
 
 def is_rt_breached(ticket):
     """Check if ticket RT exceeds SLA target."""
-    targets = SLA_TARGETS.get(ticket.priority, SLA_TARGETS['P3'])
+    targets = get_targets(ticket)
     rt = calculate_rt(ticket)
     return rt > targets['rt']
+
+
+def frt_due_at(ticket, now=None):
+    """Return the FRT deadline of ``ticket``."""
+    targets = get_targets(ticket)
+    start = ticket.created_at or now or timezone.now()
+    return get_calendar().add(start, targets['frt'])
+
+
+def rt_due_at(ticket, now=None):
+    """Return the RT deadline of ``ticket``, or None while it is paused.
+
+    A ticket paused after its deadline already passed keeps the
+    deadline: the breach happened and pausing does not undo it.
+    """
+    targets = get_targets(ticket)
+    start = ticket.created_at or now or timezone.now()
+    due = get_calendar().add(
+        start,
+        targets['rt'] + timedelta(seconds=ticket.rt_paused_seconds),
+    )
+    if ticket.rt_paused_at and due >= ticket.rt_paused_at:
+        return None
+    return due
+
+
+def set_sla_deadlines(ticket, now=None):
+    """Refresh the persisted ``frt_due_at``/``rt_due_at`` of ``ticket``."""
+    ticket.frt_due_at = frt_due_at(ticket, now)
+    ticket.rt_due_at = rt_due_at(ticket, now)
+
+
+def set_sla_deadlines_many(tickets):
+    """Bulk version of :func:`set_sla_deadlines` for saved tickets.
+
+    Deadlines for the whole batch are computed in two vectorised
+    calendar calls instead of one lookup per ticket.
+    """
+    calendar = get_calendar()
+    starts = [t.created_at for t in tickets]
+    targets = [get_targets(t) for t in tickets]
+    frt = calendar.add_many(
+        starts, [tg['frt'].total_seconds() for tg in targets],
+    )
+    rt = calendar.add_many(
+        starts,
+        [
+            tg['rt'].total_seconds() + t.rt_paused_seconds
+            for t, tg in zip(tickets, targets)
+        ],
+    )
+    for ticket, frt_due, rt_due in zip(tickets, frt, rt):
+        ticket.frt_due_at = frt_due
+        paused = ticket.rt_paused_at and rt_due >= ticket.rt_paused_at
+        ticket.rt_due_at = None if paused else rt_due
+
+
+def rt_breached_tickets(now=None):
+    """Active, non-escalated tickets whose RT is breached, as a queryset.
+
+    Set-based equivalent of :func:`is_rt_breached`, served by a range
+    scan on the ``rt_due_at`` partial index.
+    """
+    now = now or timezone.now()
+    return Ticket.objects.filter(
+        status__in=ACTIVE_STATUSES,
+        is_escalated=False,
+        rt_due_at__lt=now,
+    )
+
+
+def set_sla_measures_many(tickets):
+    """Recompute ``frt_seconds``/``rt_seconds`` of saved tickets in bulk."""
+    calendar = get_calendar()
+    responded = [t for t in tickets if t.first_response_at]
+    frt = calendar.elapsed_many(
+        [t.created_at for t in responded],
+        [t.first_response_at for t in responded],
+    )
+    for ticket, seconds in zip(responded, frt):
+        ticket.frt_seconds = int(seconds)
+
+    resolved = [t for t in tickets if t.resolved_at]
+    rt = calendar.elapsed_many(
+        [t.created_at for t in resolved],
+        [t.resolved_at for t in resolved],
+    )
+    for ticket, seconds in zip(resolved, rt):
+        ticket.rt_seconds = max(int(seconds) - ticket.rt_paused_seconds, 0)
+
+
+SLA_FIELDS = ['frt_due_at', 'rt_due_at', 'frt_seconds', 'rt_seconds']
+
+
+def rebuild_sla_deadlines(chunk_size=500, queryset=None):
+    """Recompute the persisted deadlines and measured FRT/RT of
+    ``queryset`` (default: active tickets). Returns the number changed.
+
+    Needed after the SLA calendar or targets change. Resolved and
+    closed tickets keep the deadlines they were measured against
+    unless passed explicitly, so past reports do not move. Each chunk is
+    locked, evaluated with :func:`set_sla_deadlines_many` and
+    :func:`set_sla_measures_many`, and the tickets whose values moved
+    are written with one ``bulk_update`` in the same transaction, so a
+    concurrent transition cannot be overwritten. Their ``version`` and
+    ``updated_at`` are bumped, so open forms notice and the SLA
+    scheduler picks up the new deadlines.
+    """
+    if queryset is None:
+        queryset = Ticket.objects.filter(status__in=ACTIVE_STATUSES)
+    total = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                queryset.filter(pk__gt=last_pk)
+                .select_for_update()
+                .only(
+                    'pk', 'created_at', 'project_id', 'category',
+                    'priority', 'rt_paused_at', 'rt_paused_seconds',
+                    'first_response_at', 'resolved_at', 'version',
+                    *SLA_FIELDS,
+                )
+                .order_by('pk')[:chunk_size]
+            )
+            if not chunk:
+                break
+            before = [
+                [getattr(ticket, f) for f in SLA_FIELDS] for ticket in chunk
+            ]
+            set_sla_deadlines_many(chunk)
+            set_sla_measures_many(chunk)
+            now = timezone.now()
+            changed = []
+            for ticket, values in zip(chunk, before):
+                if values != [getattr(ticket, f) for f in SLA_FIELDS]:
+                    ticket.version += 1
+                    ticket.updated_at = now
+                    changed.append(ticket)
+            Ticket.objects.bulk_update(
+                changed, [*SLA_FIELDS, 'version', 'updated_at'],
+            )
+        total += len(changed)
+        last_pk = chunk[-1].pk
+    if total:
+        invalidate_sla_percentiles()
+    return total
+
+
+def deadline_settings_fingerprint():
+    """Digest of the settings and default targets deadlines derive from."""
+    return hashlib.sha256(repr((
+        settings.SLA_CALENDAR,
+        sorted(settings.SLA_BUSINESS_HOURS.items()),
+        sorted(str(day) for day in settings.SLA_HOLIDAYS),
+        settings.TIME_ZONE,
+        sorted(SLA_TARGETS.items()),
+    )).encode()).hexdigest()
+
+
+def rebuild_sla_deadlines_if_changed(chunk_size=500):
+    """:func:`rebuild_sla_deadlines` if the SLA settings changed since
+    the last such rebuild. Returns the number changed, or None if the
+    settings are the same."""
+    fingerprint = deadline_settings_fingerprint()
+    stamp = SlaDeadlineStamp.objects.first()
+    if stamp is not None and stamp.fingerprint == fingerprint:
+        return None
+    total = rebuild_sla_deadlines(chunk_size=chunk_size)
+    SlaDeadlineStamp.objects.update_or_create(
+        pk=1, defaults={'fingerprint': fingerprint},
+    )
+    return total
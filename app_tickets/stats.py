@@ -0,0 +1,187 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from app_tickets.models import (
+    AuditArchive,
+    AuditLog,
+    Ticket,
+    TicketDailyStats,
+)
+
+
+STAT_FIELDS = ('opened', 'resolved', 'breached')
+
+# AuditLog rows that count towards each rollup field.
+STAT_EVENTS = {
+    'opened': Q(old_status='', new_status=Ticket.Status.OPEN),
+    'resolved': (
+        Q(new_status=Ticket.Status.RESOLVED)
+        & ~Q(old_status=Ticket.Status.RESOLVED)
+    ),
+    'breached': Q(reason__startswith='RT_BREACHED_ESCALATED'),
+}
+
+
+def record_ticket_event(ticket, field, when=None):
+    """Add one to ``field`` of the rollup row for ``ticket``'s day."""
+    record_ticket_events([ticket], field, when)
+
+
+def record_ticket_events(tickets, field, when=None):
+    """Add ``tickets`` to ``field`` of their rollup rows for the day.
+
+    Missing rows are inserted in one statement and every affected row
+    is then incremented by a single ``UPDATE``, however many tickets
+    and rollup rows are involved.
+    """
+    day = timezone.localdate(when or timezone.now())
+    groups = Counter(
+        (t.project_id, t.priority, t.category) for t in tickets
+    )
+    if not groups:
+        return
+
+    rows = _rollup_rows(day)
+    missing = [key for key in groups if key not in rows]
+    if missing:
+        TicketDailyStats.objects.bulk_create(
+            [
+                TicketDailyStats(
+                    date=day,
+                    project_id=project_id,
+                    priority=priority,
+                    category=category,
+                )
+                for project_id, priority, category in missing
+            ],
+            ignore_conflicts=True,
+        )
+        rows = _rollup_rows(day)
+
+    increments = Case(
+        *[When(pk=rows[key], then=Value(n)) for key, n in groups.items()],
+        default=Value(0),
+    )
+    TicketDailyStats.objects.filter(
+        pk__in=[rows[key] for key in groups],
+    ).update(**{field: F(field) + increments})
+
+
+def _rollup_rows(day):
+    return {
+        (project_id, priority, category): pk
+        for pk, project_id, priority, category
+        in TicketDailyStats.objects.filter(date=day).values_list(
+            'pk', 'project_id', 'priority', 'category',
+        )
+    }
+
+
+def daily_trend(days=14, project=None):
+    """Return one dict per day (oldest first) with the summed counters."""
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+
+    qs = TicketDailyStats.objects.filter(date__range=(start, end))
+    if project is not None:
+        qs = qs.filter(project=project)
+    rows = {
+        row['date']: row
+        for row in qs.values('date').annotate(
+            **{f: Sum(f) for f in STAT_FIELDS},
+        ).order_by('date')
+    }
+
+    trend = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {})
+        trend.append({
+            'date': day,
+            **{f: row.get(f) or 0 for f in STAT_FIELDS},
+        })
+    return trend
+
+
+def rebuildable_since():
+    """First day the audit table still holds in full, or None.
+
+    Months moved to an :class:`AuditArchive` are no longer in the
+    table, so rebuilding them would replace their counters with zeros.
+    """
+    last = AuditArchive.objects.aggregate(last=Max('month'))['last']
+    if last is None:
+        return None
+    return (last + timedelta(days=32)).replace(day=1)
+
+
+def rebuild_daily_stats(start, end, chunk_days=7):
+    """Recompute the rollup for ``start``..``end`` from the audit log.
+
+    Works one chunk of days at a time, each in its own transaction, so
+    rebuilding a long history never holds more than a chunk in memory.
+    Returns the number of rollup rows written. Raises ``ValueError`` if
+    ``start`` falls in an archived month (see :func:`rebuildable_since`).
+    """
+    floor = rebuildable_since()
+    if floor is not None and start < floor:
+        raise ValueError(
+            f'Os logs de auditoria anteriores a {floor:%d/%m/%Y} foram '
+            f'arquivados.'
+        )
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        written += _rebuild_chunk(chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def _rebuild_chunk(start, end):
+    lower = timezone.make_aware(datetime.combine(start, time.min))
+    upper = timezone.make_aware(
+        datetime.combine(end + timedelta(days=1), time.min),
+    )
+    logs = AuditLog.objects.filter(
+        created_at__gte=lower,
+        created_at__lt=upper,
+    ).annotate(day=TruncDate('created_at'))
+
+    totals = {}
+    for field, condition in STAT_EVENTS.items():
+        grouped = logs.filter(condition).values(
+            'day',
+            'ticket__project_id',
+            'ticket__priority',
+            'ticket__category',
+        ).annotate(n=Count('id')).order_by()
+        for row in grouped:
+            key = (
+                row['day'],
+                row['ticket__project_id'],
+                row['ticket__priority'],
+                row['ticket__category'],
+            )
+            totals.setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+            totals[key][field] = row['n']
+
+    with transaction.atomic():
+        TicketDailyStats.objects.filter(date__range=(start, end)).delete()
+        TicketDailyStats.objects.bulk_create([
+            TicketDailyStats(
+                date=day,
+                project_id=project_id,
+                priority=priority,
+                category=category,
+                **counters,
+            )
+            for (day, project_id, priority, category), counters
+            in totals.items()
+        ])
+    return len(totals)
@@ -1,3 +1,2378 @@
-from django.test import TestCase
+import base64
+import gzip
+import importlib
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Sum
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app_accounts.models import User
+from app_projects.models import Project
+from app_teams.models import Team
+from app_tickets.activity import needs_reply
+from app_tickets.archive import archive_old_audit_logs, audit_history
+from app_tickets.audit import audit_log, buffered_audit
+from app_tickets import calendars
+from app_tickets.calendars import BusinessCalendar, easter
+from app_tickets import duplicates
+from app_tickets.escalation import escalate_breached, escalate_tickets
+from app_tickets.events import consume, consume_all, read_events
+from app_tickets.idempotency import open_ticket_once
+from app_tickets.ledger import interval_totals, record_status, rt_at
+from app_tickets import reports
+from app_tickets.reports import percentiles, sla_percentiles, time_in_status
+from app_tickets.models import (
+    ACTIVE_STATUSES,
+    AuditArchive,
+    AuditLog,
+    Comment,
+    IdempotencyKey,
+    SlaInterval,
+    SlaPolicy,
+    Ticket,
+    TicketDailyStats,
+    TicketEvent,
+    TicketSearchDocument,
+)
+from app_tickets.scheduler import DeadlineScheduler
+from app_tickets.search import FallbackSearchEngine, search_tickets
+from app_tickets.stats import (
+    STAT_FIELDS,
+    rebuild_daily_stats,
+    rebuildable_since,
+)
+from app_tickets.services import (
+    ConcurrentUpdateError,
+    TransitionError,
+    assign_ticket,
+    bulk_assign,
+    bulk_transition,
+    open_ticket,
+    transition_ticket,
+)
+from app_tickets.sla import (
+    calculate_rt,
+    check_sla_status,
+    get_targets,
+    is_rt_breached,
+    policy_table,
+    rebuild_sla_deadlines,
+    rebuild_sla_deadlines_if_changed,
+    rt_breached_tickets,
+    set_sla_deadlines,
+)
+from app_tickets.views import TicketListView
+from helpdesk.pagination import (
+    EstimatedCountPaginator,
+    InvalidCursor,
+    KeysetPaginator,
+)
+
+
+class TicketSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+
+    def ticket(self, title, description='descrição'):
+        return Ticket.objects.create(
+            title=title, description=description, created_by=self.customer,
+        )
+
+    def found(self, q):
+        return list(search_tickets(Ticket.objects.all(), q))
+
+    def test_document_follows_ticket_and_comments(self):
+        ticket = self.ticket('Banco fora do ar')
+        self.assertEqual(self.found('banco'), [ticket])
+
+        ticket.description = 'Certificado expirado no balanceador.'
+        ticket.save(update_fields=['description', 'updated_at'])
+        self.assertEqual(self.found('certificado'), [ticket])
+
+        comment = Comment.objects.create(
+            ticket=ticket, author=self.admin, content='Renovação agendada',
+        )
+        self.assertEqual(self.found('renovação'), [ticket])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+        self.assertEqual(self.found('renovação'), [])
+
+    def test_deleting_a_ticket_with_comments(self):
+        ticket = self.ticket('Banco fora do ar')
+        Comment.objects.create(ticket=ticket, author=self.admin, content='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        self.assertFalse(TicketSearchDocument.objects.exists())
+
+    def test_fallback_engine_matches_substrings(self):
+        ticket = self.ticket('Fila de pedidos parada')
+        self.ticket('Outro assunto')
+        found = FallbackSearchEngine().search(Ticket.objects.all(), 'PEDID')
+        self.assertEqual(list(found), [ticket])
+
+    def test_rebuild_search_index(self):
+        ticket = self.ticket('Banco fora do ar')
+        TicketSearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertEqual(self.found('banco'), [ticket])
+
+    @skipUnless(
+        connection.vendor == 'postgresql',
+        'Ranking só existe na busca do PostgreSQL.',
+    )
+    def test_title_matches_rank_first_in_every_pagination_mode(self):
+        in_title = self.ticket('Lentidão no banco')
+        in_body = self.ticket('Outro assunto', 'o banco caiu ontem')
+        self.assertEqual(self.found('banco'), [in_title, in_body])
+
+        self.client.force_login(self.admin)
+        for params in ({'q': 'banco'}, {'q': 'banco', 'cursor': ''}):
+            with override_settings(TICKET_LIST_PAGINATION='cursor'):
+                response = self.client.get(reverse('tickets:list'), params)
+            self.assertEqual(
+                list(response.context['tickets']), [in_title, in_body],
+            )
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        Ticket.objects.bulk_create([
+            Ticket(title=f'Chamado {i}', created_by=cls.admin)
+            for i in range(7)
+        ])
+        # Three tickets share a timestamp: only the id tells them apart.
+        start = timezone.now() - timedelta(days=1)
+        for i, pk in enumerate(
+            Ticket.objects.order_by('pk').values_list('pk', flat=True),
+        ):
+            Ticket.objects.filter(pk=pk).update(
+                created_at=start + timedelta(minutes=min(i, 3)),
+            )
+        cls.expected = list(
+            Ticket.objects.order_by('-created_at', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+    def paginator(self):
+        return KeysetPaginator(Ticket.objects.all(), 3)
+
+    def pks(self, page):
+        return [ticket.pk for ticket in page]
+
+    def test_forward_pages_cover_every_row_once(self):
+        paginator = self.paginator()
+        page = paginator.page()
+        self.assertFalse(page.has_previous())
+        seen = self.pks(page)
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            self.assertTrue(page.has_previous())
+            seen += self.pks(page)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(page), 1)
+
+    def test_backward_cursor_returns_the_previous_page(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(
+            self.pks(paginator.page(third.previous_cursor)),
+            self.pks(second),
+        )
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(self.pks(back), self.pks(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_pages_cost_one_query_and_no_count(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        with CaptureQueriesContext(connection) as ctx:
+            paginator.page(cursor)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('COUNT(', ctx.captured_queries[0]['sql'])
+
+    def test_invalid_cursors_are_rejected(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        tampered = [
+            'lixo',
+            cursor[:-4],
+            base64.urlsafe_b64encode(b'["x",[1,2]]').decode(),
+            base64.urlsafe_b64encode(b'["n",["ontem",2]]').decode(),
+        ]
+        for value in tampered:
+            with self.assertRaises(InvalidCursor):
+                paginator.page(value)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('tickets:list'), {
+            'cursor': 'lixo',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        Ticket.objects.bulk_create([
+            Ticket(title=f'Chamado {i}', created_by=cls.customer)
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def fake_postgres(self, *rows):
+        """Stand-in connection whose cursor returns ``rows`` in order."""
+        cursor = mock.MagicMock()
+        cursor.fetchone.side_effect = rows
+        fake = mock.MagicMock(vendor='postgresql')
+        fake.cursor.return_value.__enter__.return_value = cursor
+        patcher = mock.patch(
+            'helpdesk.pagination.connections',
+            {'default': fake},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return cursor
+
+    def test_unfiltered_listing_reads_reltuples(self):
+        cursor = self.fake_postgres((12345,))
+        paginator = EstimatedCountPaginator(Ticket.objects.all(), 10)
+        self.assertEqual(paginator._estimate_count(), 12345)
+        self.assertIn('reltuples', cursor.execute.call_args[0][0])
+
+    def test_filtered_listing_reads_the_plan_estimate(self):
+        plan = [{'Plan': {'Plan Rows': 777}}]
+        for row in (plan, json.dumps(plan)):
+            cursor = self.fake_postgres((row,))
+            paginator = EstimatedCountPaginator(
+                Ticket.objects.filter(status=Ticket.Status.OPEN), 10,
+            )
+            self.assertEqual(paginator._estimate_count(), 777)
+            self.assertTrue(
+                cursor.execute.call_args[0][0].startswith('EXPLAIN'),
+            )
+
+    def test_unanalyzed_table_falls_back_to_the_plan(self):
+        self.fake_postgres((-1,), ([{'Plan': {'Plan Rows': 42}}],))
+        paginator = EstimatedCountPaginator(Ticket.objects.all(), 10)
+        self.assertEqual(paginator._estimate_count(), 42)
+
+    def test_other_databases_have_no_estimate(self):
+        fake = mock.MagicMock(vendor='sqlite')
+        with mock.patch(
+            'helpdesk.pagination.connections', {'default': fake},
+        ):
+            paginator = EstimatedCountPaginator(Ticket.objects.all(), 10)
+            self.assertIsNone(paginator._estimate_count())
+        fake.cursor.assert_not_called()
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=1000)
+    def test_large_estimates_are_used_as_is(self):
+        with mock.patch.object(
+            EstimatedCountPaginator, '_estimate_count', return_value=5000,
+        ):
+            paginator = EstimatedCountPaginator(Ticket.objects.all(), 2)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 5000)
+            self.assertTrue(paginator.count_is_approximate)
+            # Pages past the real end render empty instead of failing.
+            self.assertEqual(len(paginator.page(100)), 0)
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=1000)
+    def test_small_estimates_get_a_cached_exact_count(self):
+        with mock.patch.object(
+            EstimatedCountPaginator, '_estimate_count', return_value=50,
+        ):
+            paginator = EstimatedCountPaginator(Ticket.objects.all(), 2)
+            self.assertEqual(paginator.count, 5)
+            self.assertFalse(paginator.count_is_approximate)
+            with self.assertNumQueries(0):
+                again = EstimatedCountPaginator(Ticket.objects.all(), 2)
+                self.assertEqual(again.count, 5)
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=0)
+    def test_zero_threshold_always_counts_exactly(self):
+        with mock.patch.object(
+            EstimatedCountPaginator, '_estimate_count',
+        ) as estimate:
+            paginator = EstimatedCountPaginator(Ticket.objects.all(), 2)
+            self.assertEqual(paginator.count, 5)
+        estimate.assert_not_called()
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    'Planos de EXPLAIN só são verificados no PostgreSQL.',
+)
+class TicketQueryPlanTests(TestCase):
+    """Guard the hot ticket queries against losing their indexes.
+
+    Sequential scans are disabled for each EXPLAIN so the assertions
+    check that a suitable index exists and is usable, independent of
+    the (tiny) size of the test tables.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.project = Project.objects.create(name='Projeto')
+        Ticket.objects.bulk_create([
+            Ticket(
+                title=f'Chamado {i}',
+                description='descrição',
+                created_by=cls.customer,
+                project=cls.project,
+                status=Ticket.Status.TRIAGE,
+            )
+            for i in range(20)
+        ])
+        # Fixed statistics, rather than whatever autovacuum last saw,
+        # keep the plans the same from run to run.
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE app_tickets_ticket')
+
+    def explain(self, qs):
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def list_queryset(self, user, **params):
+        request = RequestFactory().get('/tickets/', params)
+        request.user = user
+        view = TicketListView()
+        view.setup(request)
+        return view.get_queryset()[:10]
+
+    def assertUsesIndex(self, qs, index_name):
+        plan = self.explain(qs)
+        self.assertIn(index_name, plan, plan)
+        self.assertNotIn('Seq Scan on app_tickets_ticket', plan, plan)
+
+    def test_default_list_order(self):
+        self.assertUsesIndex(
+            self.list_queryset(self.admin), 'ticket_created_idx',
+        )
+
+    def test_customer_list(self):
+        self.assertUsesIndex(
+            self.list_queryset(self.customer),
+            'ticket_creator_created_idx',
+        )
+
+    def test_status_filter(self):
+        self.assertUsesIndex(
+            self.list_queryset(self.admin, status='TRIAGE'),
+            'ticket_status_created_idx',
+        )
+
+    def test_priority_filter(self):
+        self.assertUsesIndex(
+            self.list_queryset(self.admin, priority='P1'),
+            'ticket_priority_created_idx',
+        )
+
+    def test_project_filter(self):
+        self.assertUsesIndex(
+            self.list_queryset(self.admin, project=self.project.pk),
+            'ticket_project_created_idx',
+        )
+
+    def test_date_range_is_sargable(self):
+        qs = self.list_queryset(
+            self.admin, date_from='2026-01-01', date_to='2026-01-31',
+        )
+        plan = self.explain(qs)
+        self.assertIn('ticket_created_idx', plan, plan)
+        self.assertIn('Index Cond', plan, plan)
+
+    def test_urgent_sort_uses_deadline_index(self):
+        self.assertUsesIndex(
+            self.list_queryset(self.admin, sort='urgent'),
+            'ticket_rt_due_active_idx',
+        )
+
+    # The scan below drops the model's -created_at ordering: on tiny,
+    # freshly analyzed tables the planner would otherwise rather walk
+    # ticket_created_idx backwards than sort.
+
+    def test_breach_scan_uses_deadline_index(self):
+        self.assertUsesIndex(
+            rt_breached_tickets().order_by(), 'ticket_rt_due_active_idx',
+        )
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+})
+class DashboardQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        statuses = [
+            Ticket.Status.TRIAGE,
+            Ticket.Status.IN_PROGRESS,
+            Ticket.Status.RESOLVED,
+            Ticket.Status.CLOSED,
+        ]
+        Ticket.objects.bulk_create([
+            Ticket(
+                title=f'Chamado {i}',
+                description='descrição',
+                created_by=cls.customer,
+                status=statuses[i % len(statuses)],
+                priority=Ticket.Priority.P1 if i % 2 else Ticket.Priority.P3,
+                rt_breached_at=timezone.now() if i % 3 == 0 else None,
+            )
+            for i in range(12)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_admin_dashboard_query_budget(self):
+        self.client.force_login(self.admin)
+        # session + user + summary aggregate + daily trend + recent tickets
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('dashboard'))
+
+        ctx = response.context
+        self.assertEqual(ctx['total'], 12)
+        self.assertEqual(ctx['open_count'], 6)
+        self.assertEqual(ctx['resolved_count'], 3)
+        self.assertEqual(ctx['closed_count'], 3)
+        self.assertEqual(ctx['breached_count'], 3)
+        self.assertEqual(ctx['by_status'][Ticket.Status.TRIAGE], 3)
+        self.assertEqual(ctx['by_status'][Ticket.Status.OPEN], 0)
+        self.assertEqual(ctx['by_priority'][Ticket.Priority.P1], 6)
+        self.assertEqual(len(ctx['recent_tickets']), 5)
+
+    def test_customer_dashboard_is_scoped(self):
+        other = User.objects.create_user('outro@example.com', 'x')
+        self.client.force_login(other)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total'], 0)
+
+    def test_summary_is_cached_until_a_ticket_changes(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('dashboard'))
+        # session + user + daily trend + recent tickets; the summary
+        # comes from cache
+        with self.assertNumQueries(4):
+            self.client.get(reverse('dashboard'))
+
+        ticket = Ticket.objects.filter(
+            status=Ticket.Status.RESOLVED,
+        ).first()
+        Comment.objects.create(
+            ticket=ticket, author=self.admin, content='ok',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_ticket(
+                ticket, Ticket.Status.CLOSED, self.admin,
+            )
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['closed_count'], 4)
+        self.assertEqual(response.context['resolved_count'], 2)
+
+
+class DailyStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.project = Project.objects.create(name='Projeto')
+
+    def open(self, priority=Ticket.Priority.P3):
+        return open_ticket(
+            Ticket(
+                title='Chamado', description='descrição',
+                project=self.project, priority=priority,
+            ),
+            self.customer,
+        )
+
+    def counters(self):
+        return sorted(
+            TicketDailyStats.objects.values_list(
+                'date', 'project_id', 'priority', 'category',
+                *STAT_FIELDS,
+            )
+        )
+
+    def totals(self):
+        return TicketDailyStats.objects.aggregate(
+            **{f: Sum(f) for f in STAT_FIELDS},
+        )
+
+    def test_opening_and_resolving_update_the_rollup(self):
+        first = self.open()
+        second = self.open()
+        self.open(priority=Ticket.Priority.P1)
+        self.assertEqual(
+            self.totals(), {'opened': 3, 'resolved': 0, 'breached': 0},
+        )
+
+        transition_ticket(first, Ticket.Status.RESOLVED, self.admin, 'ok')
+        bulk_transition([second.pk], Ticket.Status.RESOLVED, self.admin, 'ok')
+        self.assertEqual(
+            self.totals(), {'opened': 3, 'resolved': 2, 'breached': 0},
+        )
+        row = TicketDailyStats.objects.get(priority=Ticket.Priority.P3)
+        self.assertEqual((row.opened, row.resolved), (2, 2))
+        self.assertEqual(row.date, timezone.localdate())
+
+    def test_rebuild_reproduces_the_live_counters(self):
+        tickets = [self.open() for _ in range(3)]
+        tickets.append(self.open(priority=Ticket.Priority.P1))
+        transition_ticket(
+            tickets[0], Ticket.Status.RESOLVED, self.admin, 'ok',
+        )
+        bulk_transition(
+            [t.pk for t in tickets[1:3]],
+            Ticket.Status.RESOLVED, self.admin, 'ok',
+        )
+        Ticket.objects.filter(pk=tickets[3].pk).update(
+            rt_due_at=timezone.now() - timedelta(hours=1),
+        )
+        escalate_tickets([tickets[3].pk])
+        live = self.counters()
+        self.assertEqual(
+            self.totals(), {'opened': 4, 'resolved': 3, 'breached': 1},
+        )
+
+        TicketDailyStats.objects.all().delete()
+        call_command('rebuild_daily_stats', stdout=StringIO())
+        self.assertEqual(self.counters(), live)
+
+    def test_rebuild_rejects_invalid_dates(self):
+        for value in ('2026-02-30', 'ontem'):
+            with self.assertRaisesMessage(
+                CommandError, f'Data inválida: {value}',
+            ):
+                call_command(
+                    'rebuild_daily_stats', '--since', value,
+                    stdout=StringIO(),
+                )
+
+    def test_rebuild_refuses_archived_months(self):
+        AuditArchive.objects.create(
+            month=date(2026, 1, 1), path='auditlog-2026-01.ndjson.gz',
+            rows=0, last_id=0,
+        )
+        with self.assertRaises(CommandError):
+            call_command(
+                'rebuild_daily_stats', '--since', '2026-01-31',
+                stdout=StringIO(),
+            )
+        with self.assertRaises(ValueError):
+            rebuild_daily_stats(date(2026, 1, 31), date(2026, 2, 1))
+        self.assertEqual(rebuildable_since(), date(2026, 2, 1))
+        call_command(
+            'rebuild_daily_stats', '--since', '2026-02-01',
+            '--until', '2026-02-28', stdout=StringIO(),
+        )
+
+
+@override_settings(SLA_CALENDAR='24x7')
+class SlaBreachScanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.n2 = Team.objects.create(name='N2', level=Team.Level.N2)
+        now = timezone.now()
+        cases = [
+            # (priority, age, paused seconds, paused for)
+            (Ticket.Priority.P1, timedelta(hours=5), 0, None),
+            (Ticket.Priority.P1, timedelta(hours=3), 0, None),
+            (Ticket.Priority.P1, timedelta(hours=5), 7200, None),
+            (Ticket.Priority.P2, timedelta(hours=30), 0, None),
+            (Ticket.Priority.P2, timedelta(hours=30), 0, timedelta(hours=10)),
+            (Ticket.Priority.P3, timedelta(hours=80), 0, timedelta(hours=1)),
+            (Ticket.Priority.P3, timedelta(hours=10), 0, None),
+        ]
+        tickets = Ticket.objects.bulk_create([
+            Ticket(
+                title=f'Chamado {i}',
+                description='descrição',
+                created_by=cls.customer,
+                status=(
+                    Ticket.Status.WAITING_CUSTOMER if paused_for
+                    else Ticket.Status.IN_PROGRESS
+                ),
+                priority=priority,
+                rt_paused_seconds=paused_seconds,
+                rt_paused_at=now - paused_for if paused_for else None,
+            )
+            for i, (priority, _, paused_seconds, paused_for)
+            in enumerate(cases)
+        ])
+        for ticket, (_, age, _, _) in zip(tickets, cases):
+            ticket.created_at = now - age
+            set_sla_deadlines(ticket)
+            Ticket.objects.filter(pk=ticket.pk).update(
+                created_at=ticket.created_at,
+                frt_due_at=ticket.frt_due_at,
+                rt_due_at=ticket.rt_due_at,
+            )
+
+    def test_set_based_scan_matches_python_check(self):
+        expected = {
+            t.pk for t in Ticket.objects.all() if is_rt_breached(t)
+        }
+        found = set(rt_breached_tickets().values_list('pk', flat=True))
+        self.assertEqual(found, expected)
+        self.assertEqual(len(found), 3)
+
+    def test_command_escalates_in_bulk(self):
+        out = StringIO()
+        # scan + N2 lookup, then one chunk: savepoint, lock, bulk
+        # update, event insert, rollup (select, insert, select, update),
+        # buffered audit insert and release.
+        with self.assertNumQueries(12):
+            call_command('check_sla_breaches', stdout=out)
+        self.assertIn('3 chamado(s) escalonado(s).', out.getvalue())
+
+        escalated = Ticket.objects.filter(is_escalated=True)
+        self.assertEqual(escalated.count(), 3)
+        self.assertFalse(
+            escalated.exclude(assigned_team=self.n2).exists(),
+        )
+        self.assertEqual(
+            AuditLog.objects.filter(
+                reason__startswith='RT_BREACHED_ESCALATED',
+            ).count(),
+            3,
+        )
+
+        call_command('check_sla_breaches', stdout=StringIO())
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+    def test_escalation_rechecks_the_breach_under_the_lock(self):
+        resolved, extended, due = rt_breached_tickets().order_by('pk')
+        # Both changed after the scan that picked them.
+        Ticket.objects.filter(pk=resolved.pk).update(
+            status=Ticket.Status.RESOLVED,
+        )
+        Ticket.objects.filter(pk=extended.pk).update(
+            rt_due_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertEqual(
+            escalate_tickets([resolved.pk, extended.pk, due.pk]),
+            [due.pk],
+        )
+        self.assertEqual(
+            list(Ticket.objects.filter(is_escalated=True)), [due],
+        )
+
+    def test_deadline_follows_pauses(self):
+        admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        ticket = Ticket.objects.create(
+            title='Chamado',
+            description='descrição',
+            created_by=self.customer,
+            status=Ticket.Status.IN_PROGRESS,
+            priority=Ticket.Priority.P2,
+        )
+        set_sla_deadlines(ticket)
+        ticket.save()
+        due = ticket.rt_due_at
+        self.assertEqual(due, ticket.created_at + timedelta(hours=24))
+
+        transition_ticket(
+            ticket, Ticket.Status.WAITING_CUSTOMER, admin, 'aguardando',
+        )
+        self.assertIsNone(ticket.rt_due_at)
+
+        # Transitions read the locked row, so backdate it there.
+        Ticket.objects.filter(pk=ticket.pk).update(
+            rt_paused_at=ticket.rt_paused_at - timedelta(hours=2),
+        )
+        transition_ticket(ticket, Ticket.Status.IN_PROGRESS, admin)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.rt_paused_seconds, 7200)
+        self.assertEqual(ticket.rt_due_at, due + timedelta(hours=2))
+
+    def test_scheduler_escalates_due_tickets(self):
+        scheduler = DeadlineScheduler()
+        scheduler.load()
+        self.assertEqual(
+            len(scheduler.deadlines),
+            Ticket.objects.filter(rt_due_at__isnull=False).count(),
+        )
+
+        self.assertEqual(scheduler.run_once(), 3)
+        self.assertEqual(
+            Ticket.objects.filter(is_escalated=True).count(), 3,
+        )
+        # Escalated tickets are dropped on the next refresh.
+        self.assertEqual(scheduler.run_once(), 0)
+        self.assertEqual(len(scheduler.deadlines), 3)
+
+    def test_escalate_breached_reports_what_was_left(self):
+        due = list(
+            rt_breached_tickets().order_by('pk').values_list('pk', flat=True)
+        )
+        on_time = Ticket.objects.exclude(pk__in=due).first()
+        held = due[0]
+        with mock.patch(
+            'app_tickets.escalation.escalate_tickets',
+            return_value=due[1:],
+        ):
+            escalated, errors = escalate_breached([*due, on_time.pk])
+        self.assertEqual(escalated, due[1:])
+        self.assertEqual(set(errors), {held, on_time.pk})
+        self.assertIn('outra operação', errors[held])
+
+    def test_scheduler_retries_rows_held_elsewhere(self):
+        scheduler = DeadlineScheduler()
+        scheduler.load()
+        held = rt_breached_tickets().order_by('pk').first()
+
+        def escalate_all_but_held(ids, **kwargs):
+            return escalate_tickets(
+                [pk for pk in ids if pk != held.pk], **kwargs,
+            )
+
+        with mock.patch(
+            'app_tickets.scheduler.escalate_tickets',
+            side_effect=escalate_all_but_held,
+        ):
+            self.assertEqual(scheduler.run_once(), 2)
+        self.assertEqual(scheduler.retry, [(held.rt_due_at, held.pk)])
+        # Not left on the heap, which would wake the loop at once.
+        now = timezone.now()
+        self.assertGreater(scheduler.next_wakeup(now), now)
+
+        self.assertEqual(scheduler.run_once(), 1)
+        held.refresh_from_db()
+        self.assertTrue(held.is_escalated)
+        self.assertEqual(scheduler.retry, [])
+
+    def test_detail_view_writes_nothing(self):
+        cache.clear()
+        admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        ticket = rt_breached_tickets().order_by('pk').first()
+        self.client.force_login(admin)
+        url = reverse('tickets:detail', args=[ticket.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        writes = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            and 'django_session' not in q['sql']
+        ]
+        self.assertEqual(writes, [])
+        ticket.refresh_from_db()
+        self.assertFalse(ticket.is_escalated)
+
+
+class BusinessCalendarTests(SimpleTestCase):
+    def setUp(self):
+        self.calendar = BusinessCalendar(
+            {weekday: [('08:00', '18:00')] for weekday in range(5)},
+            tz='America/Sao_Paulo',
+        )
+
+    def local(self, *args):
+        return timezone.make_aware(datetime(*args), self.calendar.tz)
+
+    def test_easter(self):
+        self.assertEqual(easter(2026), date(2026, 4, 5))
+        self.assertEqual(easter(2027), date(2027, 3, 28))
+
+    def test_elapsed_skips_nights_weekends_and_holidays(self):
+        # Friday 17:00 to Monday 09:00
+        self.assertEqual(
+            self.calendar.elapsed(
+                self.local(2026, 4, 17, 17), self.local(2026, 4, 20, 9),
+            ),
+            timedelta(hours=2),
+        )
+        # Thursday 17:00 to Monday 09:00 across Sexta-feira Santa
+        self.assertEqual(
+            self.calendar.elapsed(
+                self.local(2026, 4, 2, 17), self.local(2026, 4, 6, 9),
+            ),
+            timedelta(hours=2),
+        )
+
+    def test_add_lands_on_next_working_time(self):
+        # Monday 17:00 + 2h skips Tiradentes (Tuesday)
+        self.assertEqual(
+            self.calendar.add(
+                self.local(2026, 4, 20, 17), timedelta(hours=2),
+            ),
+            self.local(2026, 4, 22, 9),
+        )
+        # Saturday: the clock starts on Monday morning
+        self.assertEqual(
+            self.calendar.add(
+                self.local(2026, 4, 25, 10), timedelta(minutes=30),
+            ),
+            self.local(2026, 4, 27, 8, 30),
+        )
+
+    def test_bulk_evaluation_matches_scalar(self):
+        rng = random.Random(42)
+        origin = self.local(2025, 12, 1)
+        starts = [
+            origin + timedelta(minutes=rng.randrange(0, 60 * 24 * 90))
+            for _ in range(200)
+        ]
+        ends = [
+            s + timedelta(minutes=rng.randrange(0, 60 * 24 * 30))
+            for s in starts
+        ]
+        seconds = [rng.randrange(0, 72 * 3600) for _ in starts]
+
+        self.assertEqual(
+            self.calendar.elapsed_many(starts, ends),
+            [
+                self.calendar.elapsed(s, e).total_seconds()
+                for s, e in zip(starts, ends)
+            ],
+        )
+        self.assertEqual(
+            self.calendar.add_many(starts, seconds),
+            [
+                self.calendar.add(s, timedelta(seconds=n))
+                for s, n in zip(starts, seconds)
+            ],
+        )
+
+    def test_pure_python_path_matches_numpy(self):
+        self.assertIsNotNone(calendars.np)
+        rng = random.Random(7)
+        origin = self.local(2026, 1, 1)
+        starts = [
+            origin + timedelta(minutes=rng.randrange(0, 60 * 24 * 365))
+            for _ in range(100)
+        ]
+        ends = [s + timedelta(hours=rng.randrange(0, 200)) for s in starts]
+        seconds = [rng.randrange(0, 72 * 3600) for _ in starts]
+        hours = {weekday: [('08:00', '18:00')] for weekday in range(5)}
+
+        vectorised = BusinessCalendar(hours, tz='America/Sao_Paulo')
+        with mock.patch('app_tickets.calendars.np', None):
+            pure = BusinessCalendar(hours, tz='America/Sao_Paulo')
+            elapsed = pure.elapsed_many(starts, ends)
+            deadlines = pure.add_many(starts, seconds)
+        self.assertIsNone(pure._table[-1])
+        self.assertEqual(elapsed, vectorised.elapsed_many(starts, ends))
+        self.assertEqual(deadlines, vectorised.add_many(starts, seconds))
+
+
+# The migration reads the calendar from the environment, not settings.
+@mock.patch.dict(os.environ, {'SLA_CALENDAR': 'business', 'SLA_HOLIDAYS': ''})
+class PausedSecondsMigrationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+
+    def ticket_paused(self, stored, pauses):
+        ticket = Ticket.objects.create(
+            title='Chamado', description='descrição',
+            created_by=self.customer, status=Ticket.Status.IN_PROGRESS,
+            rt_paused_seconds=stored,
+        )
+        for paused_at, resumed_at in pauses:
+            for old, new, at in [
+                (
+                    Ticket.Status.IN_PROGRESS,
+                    Ticket.Status.WAITING_CUSTOMER,
+                    paused_at,
+                ),
+                (
+                    Ticket.Status.WAITING_CUSTOMER,
+                    Ticket.Status.IN_PROGRESS,
+                    resumed_at,
+                ),
+            ]:
+                entry = audit_log(ticket, old, new, 'pausa')
+                AuditLog.objects.filter(pk=entry.pk).update(created_at=at)
+        return ticket
+
+    def migrate(self):
+        migration = importlib.import_module(
+            'app_tickets.migrations.0022_ticket_rt_paused_calendar_seconds',
+        )
+        migration.recompute_paused_seconds(
+            django_apps, mock.Mock(connection=connection),
+        )
+
+    def test_wall_clock_pauses_become_calendar_seconds(self):
+        # Friday 17:00 to Monday 09:00, and Monday 12:00 to 12:30.
+        pauses = [
+            (
+                timezone.make_aware(datetime(2026, 10, 16, 17)),
+                timezone.make_aware(datetime(2026, 10, 19, 9)),
+            ),
+            (
+                timezone.make_aware(datetime(2026, 10, 19, 12)),
+                timezone.make_aware(datetime(2026, 10, 19, 12, 30)),
+            ),
+        ]
+        wall = self.ticket_paused(64 * 3600 + 1800, pauses)
+        converted = self.ticket_paused(2 * 3600 + 1800, pauses)
+        archived = self.ticket_paused(900, [])
+
+        self.migrate()
+        for ticket in (wall, converted, archived):
+            ticket.refresh_from_db()
+        self.assertEqual(wall.rt_paused_seconds, 2 * 3600 + 1800)
+        self.assertEqual(converted.rt_paused_seconds, 2 * 3600 + 1800)
+        self.assertEqual(archived.rt_paused_seconds, 900)
+
+    @mock.patch.dict(os.environ, {'SLA_CALENDAR': '24x7'})
+    def test_wall_clock_calendar_is_left_alone(self):
+        start = timezone.make_aware(datetime(2026, 10, 9, 17))
+        ticket = self.ticket_paused(
+            3600, [(start, start + timedelta(hours=1))],
+        )
+        with self.assertNumQueries(0):
+            self.migrate()
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.rt_paused_seconds, 3600)
+
+
+@override_settings(SLA_CALENDAR='24x7')
+class SlaPolicyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.project = Project.objects.create(name='Projeto')
+        cls.other = Project.objects.create(name='Outro')
+
+    def setUp(self):
+        cache.clear()
+        policy_table.clear()
+        self.addCleanup(policy_table.clear)
+
+    def ticket(self, project, category, priority=Ticket.Priority.P1):
+        return Ticket(
+            title='Chamado',
+            description='descrição',
+            created_by=self.customer,
+            project=project,
+            category=category,
+            priority=priority,
+            created_at=timezone.now(),
+        )
+
+    def add_policy(self, project, category, frt):
+        with self.captureOnCommitCallbacks(execute=True):
+            SlaPolicy.objects.create(
+                project=project,
+                category=category,
+                priority=Ticket.Priority.P1,
+                frt_target=frt,
+                rt_target=timedelta(hours=1),
+            )
+
+    def test_most_specific_policy_wins(self):
+        outage = Ticket.Category.SERVICE_OUTAGE
+        repo = Ticket.Category.GITHUB_REPO
+        self.add_policy(None, outage, timedelta(minutes=10))
+        self.add_policy(self.project, '', timedelta(minutes=20))
+        self.add_policy(self.project, outage, timedelta(minutes=5))
+
+        def frt(project, category, priority=Ticket.Priority.P1):
+            return get_targets(self.ticket(project, category, priority))['frt']
+
+        self.assertEqual(frt(self.project, outage), timedelta(minutes=5))
+        self.assertEqual(frt(self.project, repo), timedelta(minutes=20))
+        self.assertEqual(frt(self.other, outage), timedelta(minutes=10))
+        self.assertEqual(frt(self.other, repo), timedelta(minutes=30))
+        self.assertEqual(
+            frt(self.project, outage, Ticket.Priority.P2),
+            timedelta(hours=2),
+        )
+
+    def test_resolution_is_cached_in_process(self):
+        tickets = [
+            self.ticket(self.project, Ticket.Category.SERVICE_OUTAGE)
+            for _ in range(20)
+        ]
+        check_sla_status(tickets[0])
+        with self.assertNumQueries(0):
+            for ticket in tickets:
+                check_sla_status(ticket)
+
+    def test_policy_change_updates_active_deadlines(self):
+        ticket = self.ticket(self.project, Ticket.Category.SERVICE_OUTAGE)
+        ticket.status = Ticket.Status.TRIAGE
+        ticket.save()
+        set_sla_deadlines(ticket)
+        ticket.save()
+        self.assertEqual(
+            ticket.frt_due_at, ticket.created_at + timedelta(minutes=30),
+        )
+
+        scheduler = DeadlineScheduler()
+        scheduler.load()
+        version = ticket.version
+
+        # The request saving the policy leaves the tickets alone.
+        self.add_policy(
+            self.project, Ticket.Category.SERVICE_OUTAGE,
+            timedelta(minutes=5),
+        )
+        ticket.refresh_from_db()
+        self.assertEqual(
+            ticket.frt_due_at, ticket.created_at + timedelta(minutes=30),
+        )
+
+        scheduler.run_once()
+        ticket.refresh_from_db()
+        self.assertEqual(
+            ticket.frt_due_at, ticket.created_at + timedelta(minutes=5),
+        )
+        self.assertEqual(
+            ticket.rt_due_at, ticket.created_at + timedelta(hours=1),
+        )
+        self.assertEqual(ticket.version, version + 1)
+        self.assertEqual(scheduler.deadlines[ticket.pk], ticket.rt_due_at)
+
+        # Nothing moved since, so nothing is written again.
+        self.assertEqual(rebuild_sla_deadlines(), 0)
+        with self.assertNumQueries(1):
+            scheduler._rebuild_if_policies_changed()
+
+    def test_scheduler_load_applies_policies_saved_while_down(self):
+        active = self.ticket(self.project, Ticket.Category.SERVICE_OUTAGE)
+        active.status = Ticket.Status.IN_PROGRESS
+        closed = self.ticket(self.project, Ticket.Category.SERVICE_OUTAGE)
+        closed.status = Ticket.Status.CLOSED
+        for ticket in (active, closed):
+            set_sla_deadlines(ticket)
+            ticket.save()
+        self.add_policy(
+            self.project, Ticket.Category.SERVICE_OUTAGE,
+            timedelta(minutes=5),
+        )
+
+        scheduler = DeadlineScheduler()
+        scheduler.load()
+        active.refresh_from_db()
+        closed.refresh_from_db()
+        self.assertEqual(
+            active.frt_due_at, active.created_at + timedelta(minutes=5),
+        )
+        self.assertEqual(
+            closed.frt_due_at, closed.created_at + timedelta(minutes=30),
+        )
+        self.assertEqual(scheduler.deadlines[active.pk], active.rt_due_at)
+
+    def test_startup_rebuild_follows_the_settings(self):
+        active = self.ticket(self.project, Ticket.Category.SERVICE_OUTAGE)
+        resolved = self.ticket(self.project, Ticket.Category.SERVICE_OUTAGE)
+        active.status = Ticket.Status.IN_PROGRESS
+        resolved.status = Ticket.Status.RESOLVED
+        for ticket in (active, resolved):
+            set_sla_deadlines(ticket)
+            ticket.save()
+        stale = active.created_at + timedelta(days=1)
+        Ticket.objects.update(frt_due_at=stale)
+
+        self.assertEqual(rebuild_sla_deadlines_if_changed(), 1)
+        active.refresh_from_db()
+        resolved.refresh_from_db()
+        self.assertEqual(
+            active.frt_due_at, active.created_at + timedelta(minutes=30),
+        )
+        # Closed history keeps the deadlines it was measured against.
+        self.assertEqual(resolved.frt_due_at, stale)
+
+        Ticket.objects.filter(pk=active.pk).update(frt_due_at=stale)
+        with self.assertNumQueries(1):
+            self.assertIsNone(rebuild_sla_deadlines_if_changed())
+        with override_settings(SLA_HOLIDAYS=['2026-12-24']):
+            self.assertEqual(rebuild_sla_deadlines_if_changed(), 1)
+
+    @override_settings(SLA_POLICY_CHECK_SECONDS=0)
+    def test_table_expires_without_a_shared_version(self):
+        ticket = self.ticket(self.project, Ticket.Category.SERVICE_OUTAGE)
+        self.assertEqual(get_targets(ticket)['frt'], timedelta(minutes=30))
+        # Saved by another process: its version bump never reaches
+        # this one, as with a per-process cache.
+        SlaPolicy.objects.create(
+            project=self.project,
+            category='',
+            priority=Ticket.Priority.P1,
+            frt_target=timedelta(minutes=5),
+            rt_target=timedelta(hours=1),
+        )
+        self.assertEqual(get_targets(ticket)['frt'], timedelta(minutes=30))
+        with override_settings(SLA_POLICY_MAX_AGE_SECONDS=0):
+            self.assertEqual(
+                get_targets(ticket)['frt'], timedelta(minutes=5),
+            )
+
+
+@override_settings(SLA_CALENDAR='24x7')
+class SlaLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.project = Project.objects.create(name='Projeto')
+        cls.start = timezone.now() - timedelta(days=10)
+        cls.tickets = []
+        # (hours running, hours waiting on the customer, hours running)
+        for first, paused, second in [(2, 5, 1), (4, 0, 0), (1, 3, 6)]:
+            ticket = Ticket.objects.create(
+                title='Chamado',
+                description='descrição',
+                created_by=cls.customer,
+                project=cls.project,
+            )
+            at = cls.start
+            for status, hours in [
+                (Ticket.Status.TRIAGE, first),
+                (Ticket.Status.WAITING_CUSTOMER, paused),
+                (Ticket.Status.IN_PROGRESS, second),
+            ]:
+                if hours:
+                    record_status(ticket, status, at)
+                    at += timedelta(hours=hours)
+            record_status(ticket, Ticket.Status.RESOLVED, at)
+            cls.tickets.append(ticket)
+
+    def test_rt_at_point_in_time(self):
+        ticket = self.tickets[0]
+        self.assertEqual(
+            rt_at(ticket, self.start + timedelta(hours=1)),
+            timedelta(hours=1),
+        )
+        self.assertEqual(
+            rt_at(ticket, self.start + timedelta(hours=4)),
+            timedelta(hours=2),
+        )
+        self.assertEqual(rt_at(ticket), timedelta(hours=3))
+
+    def test_rt_at_skips_time_spent_resolved(self):
+        start = timezone.now() - timedelta(hours=8)
+        ticket = Ticket.objects.create(
+            title='Chamado',
+            description='descrição',
+            created_by=self.customer,
+            status=Ticket.Status.IN_PROGRESS,
+        )
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=start)
+        ticket.refresh_from_db()
+        # Two hours of work, resolved for five, then reopened.
+        record_status(ticket, Ticket.Status.IN_PROGRESS, start)
+        record_status(
+            ticket, Ticket.Status.RESOLVED, start + timedelta(hours=2),
+        )
+        record_status(
+            ticket, Ticket.Status.IN_PROGRESS, start + timedelta(hours=7),
+        )
+
+        at = start + timedelta(hours=8)
+        self.assertEqual(rt_at(ticket, at), timedelta(hours=3))
+        self.assertAlmostEqual(
+            calculate_rt(ticket), timedelta(hours=8),
+            delta=timedelta(seconds=5),
+        )
+
+    def test_totals_are_one_grouped_query(self):
+        window = (self.start + timedelta(hours=1), timezone.now())
+        with self.assertNumQueries(1):
+            rows = list(interval_totals(*window, 'ticket__project'))
+        totals = {row['state']: row['total'] for row in rows}
+        self.assertEqual(
+            totals[SlaInterval.State.RUNNING], timedelta(hours=11),
+        )
+        self.assertEqual(
+            totals[SlaInterval.State.PAUSED], timedelta(hours=8),
+        )
+
+    @override_settings(
+        SLA_CALENDAR='business',
+        SLA_BUSINESS_HOURS={
+            weekday: [('08:00', '18:00')] for weekday in range(5)
+        },
+        SLA_HOLIDAYS=[],
+    )
+    def test_totals_use_the_sla_calendar(self):
+        ticket = Ticket.objects.create(
+            title='Chamado',
+            description='descrição',
+            created_by=self.customer,
+        )
+        # Friday 17:00 to Monday 09:00: two business hours.
+        friday = timezone.make_aware(datetime(2026, 10, 16, 17))
+        record_status(ticket, Ticket.Status.IN_PROGRESS, friday)
+        record_status(
+            ticket, Ticket.Status.RESOLVED, friday + timedelta(hours=64),
+        )
+        rows = interval_totals(
+            friday - timedelta(days=1), friday + timedelta(days=4),
+            queryset=SlaInterval.objects.filter(ticket=ticket),
+        )
+        self.assertEqual(rows, [
+            {'state': SlaInterval.State.RUNNING, 'total': timedelta(hours=2)},
+        ])
+
+    def test_transitions_append_spans(self):
+        admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        ticket = Ticket.objects.create(
+            title='Chamado',
+            description='descrição',
+            created_by=self.customer,
+            status=Ticket.Status.IN_PROGRESS,
+        )
+        record_status(ticket, ticket.status, ticket.created_at)
+        transition_ticket(
+            ticket, Ticket.Status.WAITING_CUSTOMER, admin, 'aguardando',
+        )
+        transition_ticket(ticket, Ticket.Status.RESOLVED, admin, 'ok')
+
+        spans = list(ticket.sla_intervals.values_list(
+            'state', 'ended_at',
+        ))
+        self.assertEqual(
+            [state for state, _ in spans],
+            [SlaInterval.State.RUNNING, SlaInterval.State.PAUSED],
+        )
+        self.assertTrue(all(ended for _, ended in spans))
+
+
+class TimeInStatusReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.start = timezone.now() - timedelta(days=3)
+        history = {
+            Ticket.Priority.P1: [
+                ('', Ticket.Status.OPEN, 0),
+                (Ticket.Status.OPEN, Ticket.Status.TRIAGE, 0),
+                (Ticket.Status.TRIAGE, Ticket.Status.IN_PROGRESS, 2),
+                # Not a status change: ignored.
+                (Ticket.Status.IN_PROGRESS, Ticket.Status.IN_PROGRESS, 3),
+                (Ticket.Status.IN_PROGRESS, Ticket.Status.RESOLVED, 5),
+                (Ticket.Status.RESOLVED, Ticket.Status.CLOSED, 6),
+            ],
+            Ticket.Priority.P2: [
+                ('', Ticket.Status.OPEN, 0),
+                (Ticket.Status.OPEN, Ticket.Status.TRIAGE, 0),
+                (Ticket.Status.TRIAGE, Ticket.Status.IN_PROGRESS, 1),
+                (
+                    Ticket.Status.IN_PROGRESS,
+                    Ticket.Status.WAITING_CUSTOMER,
+                    4,
+                ),
+                (
+                    Ticket.Status.WAITING_CUSTOMER,
+                    Ticket.Status.RESOLVED,
+                    10,
+                ),
+                (Ticket.Status.RESOLVED, Ticket.Status.CLOSED, 12),
+            ],
+        }
+        for priority, changes in history.items():
+            ticket = Ticket.objects.create(
+                title='Chamado',
+                description='descrição',
+                created_by=cls.customer,
+                priority=priority,
+                status=Ticket.Status.CLOSED,
+            )
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=cls.start)
+            for old, new, hours in changes:
+                log = AuditLog.objects.create(
+                    ticket=ticket,
+                    changed_by_name='SYSTEM',
+                    old_status=old,
+                    new_status=new,
+                )
+                AuditLog.objects.filter(pk=log.pk).update(
+                    created_at=cls.start + timedelta(hours=hours),
+                )
+
+    def report(self, start, end, group_by='priority'):
+        return {
+            (row['key'], row['status']): row['seconds']
+            for row in time_in_status(start, end, group_by)
+        }
+
+    def test_time_per_status_and_priority(self):
+        rows = self.report(self.start, timezone.now())
+        hour = 3600
+        self.assertEqual(rows[('P1', Ticket.Status.TRIAGE)], 2 * hour)
+        self.assertEqual(rows[('P1', Ticket.Status.IN_PROGRESS)], 3 * hour)
+        self.assertEqual(rows[('P1', Ticket.Status.RESOLVED)], 1 * hour)
+        self.assertEqual(
+            rows[('P2', Ticket.Status.WAITING_CUSTOMER)], 6 * hour,
+        )
+        self.assertNotIn(('P1', Ticket.Status.CLOSED), rows)
+
+    def test_spans_are_clipped_to_the_window(self):
+        rows = self.report(
+            self.start + timedelta(hours=3),
+            self.start + timedelta(hours=8),
+        )
+        self.assertEqual(rows[('P1', Ticket.Status.IN_PROGRESS)], 7200)
+        self.assertEqual(rows[('P2', Ticket.Status.IN_PROGRESS)], 3600)
+        self.assertEqual(
+            rows[('P2', Ticket.Status.WAITING_CUSTOMER)], 4 * 3600,
+        )
+
+    def test_page_and_json_endpoint(self):
+        params = {
+            'date_from': timezone.localdate(self.start).isoformat(),
+            'group_by': 'ticket',
+        }
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('tickets:time_in_status'), params,
+        )
+        self.assertEqual(len(response.context['rows']), 2)
+
+        response = self.client.get(
+            reverse('tickets:time_in_status_json'), params,
+        )
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['group_by'], 'ticket')
+        # Zero-length OPEN spans are dropped.
+        self.assertEqual(len(data['rows']), 7)
+
+    def test_report_is_admin_only(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('tickets:time_in_status_json'))
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+})
+class SlaPercentileReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.month = (
+            timezone.localdate().replace(day=1) - timedelta(days=40)
+        ).replace(day=1)
+        start, _ = reports.month_bounds(cls.month)
+        cls.at = start + timedelta(days=3)
+        tickets = []
+        for i, minutes in enumerate([10, 20, 30, 40, 100]):
+            tickets.append(Ticket(
+                title=f'Chamado {i}',
+                description='descrição',
+                created_by=cls.admin,
+                priority=Ticket.Priority.P1,
+                status=Ticket.Status.RESOLVED,
+                first_response_at=cls.at,
+                frt_due_at=cls.at if minutes < 40 else cls.at - timedelta(1),
+                frt_seconds=minutes * 60,
+                resolved_at=cls.at,
+                rt_seconds=minutes * 600,
+                # Both miss the deadline; only the first was escalated.
+                rt_due_at=cls.at - timedelta(hours=1) if i < 2 else cls.at,
+                rt_breached_at=cls.at if i == 0 else None,
+            ))
+        Ticket.objects.bulk_create(tickets)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_percentiles_and_compliance(self):
+        report = sla_percentiles(self.month)
+        frt = report[Ticket.Priority.P1]['frt']
+        self.assertEqual(frt['count'], 5)
+        self.assertEqual(frt['compliance'], 60)
+        self.assertAlmostEqual(frt['p50'], 30 * 60)
+        self.assertAlmostEqual(frt['p90'], 76 * 60)
+        self.assertAlmostEqual(frt['p99'], 97.6 * 60)
+        self.assertEqual(report[Ticket.Priority.P1]['rt']['compliance'], 60)
+
+    def test_closed_month_is_cached(self):
+        sla_percentiles(self.month)
+        with self.assertNumQueries(0):
+            sla_percentiles(self.month)
+
+    @override_settings(SLA_REPORT_FINAL_CACHE_TTL=123)
+    def test_closed_month_cache_expires(self):
+        with mock.patch.object(
+            reports.cache, 'set', wraps=reports.cache.set,
+        ) as cache_set:
+            sla_percentiles(self.month)
+        self.assertEqual(cache_set.call_args[0][2], 123)
+
+    def test_rebuilt_deadlines_drop_the_cache(self):
+        sla_percentiles(self.month)
+        self.assertGreater(
+            rebuild_sla_deadlines(queryset=Ticket.objects.all()), 0,
+        )
+        with mock.patch.object(
+            reports, '_compute_sla_percentiles', return_value={},
+        ) as compute:
+            sla_percentiles(self.month)
+        compute.assert_called_once()
+
+    def test_python_fallback_matches(self):
+        values = [600, 1200, 1800, 2400, 6000]
+        with mock.patch.object(reports, 'np', None):
+            fallback = percentiles(values)
+        self.assertEqual(
+            [round(v, 6) for v in fallback], [1800, 4560, 5856],
+        )
+
+    def test_page(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('tickets:sla_percentiles'), {'months': 3},
+        )
+        self.assertEqual(len(response.context['rows']), 1)
+        self.assertContains(response, '60,0%')
+
+
+class BulkActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.team = Team.objects.create(name='N1')
+        cls.project = Project.objects.create(name='Projeto')
+
+    def _tickets(self, n, **fields):
+        return [
+            Ticket.objects.create(
+                title='Chamado',
+                description='descrição',
+                created_by=self.customer,
+                project=self.project,
+                **fields,
+            )
+            for _ in range(n)
+        ]
+
+    def _close_batch(self, n):
+        resolved = {
+            'status': Ticket.Status.RESOLVED,
+            'resolved_at': timezone.now(),
+        }
+        commented = self._tickets(n, **resolved)
+        for ticket in commented:
+            Comment.objects.create(
+                ticket=ticket, author=self.admin, content='Feito.',
+            )
+        return commented, self._tickets(n, **resolved)
+
+    def test_transition_applies_valid_and_reports_the_rest(self):
+        commented, silent = self._close_batch(2)
+        ids = [t.pk for t in commented + silent] + [0]
+        applied, errors = bulk_transition(
+            ids, Ticket.Status.CLOSED, self.admin,
+        )
+        self.assertEqual(
+            sorted(t.pk for t in applied), [t.pk for t in commented],
+        )
+        self.assertEqual(set(errors), {0, *(t.pk for t in silent)})
+        self.assertEqual(
+            Ticket.objects.filter(
+                status=Ticket.Status.CLOSED, closed_at__isnull=False,
+            ).count(),
+            2,
+        )
+        self.assertEqual(
+            AuditLog.objects.filter(
+                new_status=Ticket.Status.CLOSED,
+            ).count(),
+            2,
+        )
+
+    def test_transition_queries_do_not_grow_with_selection(self):
+        def count(n):
+            commented, silent = self._close_batch(n)
+            with CaptureQueriesContext(connection) as ctx:
+                bulk_transition(
+                    [t.pk for t in commented + silent],
+                    Ticket.Status.CLOSED,
+                    self.admin,
+                )
+            return len(ctx)
+
+        self.assertEqual(count(2), count(6))
+
+    def test_assign_keeps_unset_fields(self):
+        tickets = self._tickets(3, assigned_agent=self.admin)
+        applied, errors = bulk_assign(
+            [t.pk for t in tickets], self.admin, team=self.team,
+        )
+        self.assertEqual((len(applied), errors), (3, {}))
+        self.assertEqual(
+            Ticket.objects.filter(
+                assigned_team=self.team, assigned_agent=self.admin,
+            ).count(),
+            3,
+        )
+
+    def test_view_requires_admin(self):
+        ticket, = self._tickets(1)
+        self.client.force_login(self.customer)
+        self.client.post(reverse('tickets:bulk_action'), {
+            'action': 'assign',
+            'ticket_ids': [ticket.pk],
+            'assigned_team': self.team.pk,
+        })
+        ticket.refresh_from_db()
+        self.assertIsNone(ticket.assigned_team_id)
+
+    def test_view_reports_per_ticket_errors(self):
+        ready = self._tickets(
+            1,
+            status=Ticket.Status.TRIAGE,
+            assigned_team=self.team,
+            assigned_agent=self.admin,
+        )
+        unassigned = self._tickets(1, status=Ticket.Status.TRIAGE)
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('tickets:bulk_action'), {
+            'action': 'transition',
+            'new_status': Ticket.Status.IN_PROGRESS,
+            'ticket_ids': [ready[0].pk, unassigned[0].pk],
+            'next': 'https://example.com/',
+        }, follow=True)
+        self.assertRedirects(response, reverse('tickets:list'))
+        self.assertEqual(
+            [str(m) for m in response.context['messages']],
+            [
+                '1 chamado(s) atualizado(s).',
+                f'#{unassigned[0].pk}: É necessário atribuir um time '
+                'antes de iniciar.',
+            ],
+        )
+
+
+def _ticket_in_progress(customer, agent):
+    team = Team.objects.create(name=f'N1 {Team.objects.count()}')
+    return Ticket.objects.create(
+        title='Chamado',
+        description='descrição',
+        created_by=customer,
+        status=Ticket.Status.IN_PROGRESS,
+        assigned_team=team,
+        assigned_agent=agent,
+    )
+
+
+class TicketVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+
+    def setUp(self):
+        self.ticket = _ticket_in_progress(self.customer, self.admin)
+
+    def test_stale_version_is_refused(self):
+        transition_ticket(
+            self.ticket, Ticket.Status.WAITING_CUSTOMER, self.admin,
+            'aguardando', version=0,
+        )
+        self.assertEqual(self.ticket.version, 1)
+        with self.assertRaises(ConcurrentUpdateError):
+            assign_ticket(
+                Ticket.objects.get(pk=self.ticket.pk), self.admin,
+                'Atribuição do responsável.', version=0,
+                assigned_agent=None,
+            )
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.assigned_agent, self.admin)
+        self.assertEqual(self.ticket.version, 1)
+
+    def test_transition_keeps_concurrent_assignment(self):
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        assign_ticket(
+            self.ticket, self.admin, 'Atribuição do responsável.',
+            assigned_agent=None,
+        )
+        transition_ticket(
+            stale, Ticket.Status.WAITING_CUSTOMER, self.admin, 'aguardando',
+        )
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.assigned_agent)
+        self.assertEqual(self.ticket.status, Ticket.Status.WAITING_CUSTOMER)
+
+    def test_view_asks_to_retry(self):
+        Ticket.objects.filter(pk=self.ticket.pk).update(version=3)
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse('tickets:transition', args=[self.ticket.pk]),
+            {
+                'new_status': Ticket.Status.WAITING_CUSTOMER,
+                'reason': 'aguardando',
+                'version': 2,
+            },
+            follow=True,
+        )
+        self.assertContains(response, 'Recarregue a página')
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, Ticket.Status.IN_PROGRESS)
+
+    def test_assign_form_only_writes_posted_fields(self):
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse('tickets:assign', args=[self.ticket.pk]),
+            {'assigned_agent': '', 'version': 0},
+        )
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.assigned_agent)
+        self.assertIsNotNone(self.ticket.assigned_team)
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    'Bloqueio de linhas concorrente só é verificado no PostgreSQL.',
+)
+class TicketConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        self.admins = [
+            User.objects.create_user(
+                f'admin{i}@example.com', 'x', role=User.Role.ADMIN,
+            )
+            for i in range(2)
+        ]
+        self.ticket = _ticket_in_progress(self.customer, self.admins[0])
+
+    def _race(self, *actions):
+        """Run ``actions`` at once, each in its own thread and connection."""
+        barrier = threading.Barrier(len(actions))
+        results = [None] * len(actions)
+
+        def run(i, action):
+            try:
+                barrier.wait()
+                action()
+                results[i] = 'ok'
+            except TransitionError as e:
+                results[i] = e
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [
+            threading.Thread(target=run, args=(i, action))
+            for i, action in enumerate(actions)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _transition(self, admin, new_status, version=None):
+        def action():
+            transition_ticket(
+                Ticket.objects.get(pk=self.ticket.pk),
+                new_status, admin, 'motivo', version=version,
+            )
+        return action
+
+    def test_same_transition_applies_once(self):
+        results = self._race(*(
+            self._transition(admin, Ticket.Status.WAITING_CUSTOMER)
+            for admin in self.admins
+        ))
+        self.assertEqual(results.count('ok'), 1)
+        self.assertEqual(
+            AuditLog.objects.filter(
+                new_status=Ticket.Status.WAITING_CUSTOMER,
+            ).count(),
+            1,
+        )
+
+    def test_conflicting_forms_get_a_retry(self):
+        results = self._race(
+            self._transition(
+                self.admins[0], Ticket.Status.WAITING_CUSTOMER, version=0,
+            ),
+            self._transition(
+                self.admins[1], Ticket.Status.RESOLVED, version=0,
+            ),
+        )
+        self.assertEqual(results.count('ok'), 1)
+        self.assertEqual(
+            sum(isinstance(r, ConcurrentUpdateError) for r in results), 1,
+        )
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.version, 1)
+
+    def test_same_idempotency_key_creates_one_ticket(self):
+        created = []
+
+        def submit():
+            ticket, _ = open_ticket_once(
+                Ticket(title='Duplo', description='descrição'),
+                self.customer,
+                'chave',
+            )
+            created.append(ticket.pk)
+
+        self.assertEqual(self._race(submit, submit), ['ok', 'ok'])
+        self.assertEqual(len(set(created)), 1)
+        self.assertEqual(Ticket.objects.filter(title='Duplo').count(), 1)
+
+
+class CommentMarkerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+
+    def setUp(self):
+        self.ticket = Ticket.objects.create(
+            title='Chamado',
+            description='descrição',
+            created_by=self.customer,
+            status=Ticket.Status.RESOLVED,
+            resolved_at=timezone.now(),
+        )
+
+    def _comment(self, author):
+        return Comment.objects.create(
+            ticket=self.ticket, author=author, content='Olá.',
+        )
+
+    def test_comments_update_markers(self):
+        self._comment(self.admin)
+        reply = self._comment(self.customer)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.comment_count, 2)
+        self.assertEqual(
+            self.ticket.last_customer_comment_at, reply.created_at,
+        )
+        self.assertEqual(self.ticket.last_activity_at, reply.created_at)
+        self.assertLess(
+            self.ticket.last_admin_comment_at, reply.created_at,
+        )
+
+    def test_rules_read_markers_only(self):
+        self._comment(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            transition_ticket(self.ticket, Ticket.Status.CLOSED, self.admin)
+        self.assertFalse(any(
+            'app_tickets_comment' in q['sql'] for q in ctx.captured_queries
+        ))
+        self.assertEqual(self.ticket.status, Ticket.Status.CLOSED)
+
+    def test_needs_reply(self):
+        Ticket.objects.filter(pk=self.ticket.pk).update(
+            status=Ticket.Status.IN_PROGRESS,
+        )
+        self._comment(self.customer)
+        self.assertEqual(
+            list(needs_reply(Ticket.objects.all())), [self.ticket],
+        )
+        self._comment(self.admin)
+        self.assertFalse(needs_reply(Ticket.objects.all()).exists())
+
+    def test_backfill_command(self):
+        self._comment(self.customer)
+        Ticket.objects.update(
+            comment_count=0, last_customer_comment_at=None,
+        )
+        out = StringIO()
+        call_command('rebuild_comment_markers', stdout=out)
+        self.assertIn('1 chamado(s)', out.getvalue())
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.comment_count, 1)
+        self.assertIsNotNone(self.ticket.last_customer_comment_at)
+
+    def test_deleting_a_comment_recounts(self):
+        self._comment(self.admin).delete()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.comment_count, 0)
+        self.assertIsNone(self.ticket.last_admin_comment_at)
+        self.assertEqual(self.ticket.last_activity_at, self.ticket.created_at)
+
+
+class TicketEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.team = Team.objects.create(name='N1')
+
+    def setUp(self):
+        self.ticket = Ticket.objects.create(
+            title='Chamado',
+            description='descrição',
+            created_by=self.customer,
+            status=Ticket.Status.TRIAGE,
+        )
+
+    def test_changes_write_events(self):
+        bulk_assign(
+            [self.ticket.pk], self.admin,
+            team=self.team, agent=self.admin,
+        )
+        Comment.objects.create(
+            ticket=self.ticket, author=self.admin, content='Olá.',
+        )
+        transition_ticket(self.ticket, Ticket.Status.IN_PROGRESS, self.admin)
+        events = read_events()
+        self.assertEqual(
+            [event.kind for event in events],
+            [
+                TicketEvent.Kind.ASSIGNED,
+                TicketEvent.Kind.COMMENTED,
+                TicketEvent.Kind.TRANSITIONED,
+            ],
+        )
+        self.assertEqual(events[2].payload['new_status'], 'IN_PROGRESS')
+
+    def test_rejected_change_writes_nothing(self):
+        with self.assertRaises(TransitionError):
+            transition_ticket(
+                self.ticket, Ticket.Status.IN_PROGRESS, self.admin,
+            )
+        self.assertFalse(TicketEvent.objects.exists())
+
+    def test_consumer_resumes_from_its_cursor(self):
+        for _ in range(5):
+            Comment.objects.create(
+                ticket=self.ticket, author=self.customer, content='Olá.',
+            )
+        seen = []
+        self.assertEqual(consume('test', seen.extend, batch_size=2), 2)
+
+        def fail(events):
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            consume('test', fail, batch_size=2)
+        self.assertEqual(consume_all('test', seen.extend, batch_size=2), 3)
+        self.assertEqual(
+            [event.id for event in seen],
+            list(TicketEvent.objects.values_list('id', flat=True)),
+        )
+        self.assertEqual(consume('test', seen.extend), 0)
+
+    def test_reading_waits_on_a_fresh_gap(self):
+        first, second, third = (
+            TicketEvent.objects.create(
+                ticket=self.ticket, kind=TicketEvent.Kind.COMMENTED,
+            )
+            for _ in range(3)
+        )
+        second.delete()
+        self.assertEqual(read_events(), [first])
+        TicketEvent.objects.filter(pk=third.pk).update(
+            created_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(read_events(), [first, third])
+
+
+class AuditArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        old = timezone.now() - timedelta(days=500)
+        cls.ticket = Ticket.objects.create(
+            title='Chamado antigo',
+            description='descrição',
+            created_by=cls.customer,
+            status=Ticket.Status.CLOSED,
+        )
+        Ticket.objects.filter(pk=cls.ticket.pk).update(
+            created_at=old, closed_at=old + timedelta(days=40),
+        )
+        cls.ticket.refresh_from_db()
+        for days, reason in [(0, 'criado'), (1, 'triagem'), (40, 'fechado')]:
+            log = AuditLog.objects.create(
+                ticket=cls.ticket, changed_by_name='SYSTEM', reason=reason,
+            )
+            AuditLog.objects.filter(pk=log.pk).update(
+                created_at=old + timedelta(days=days),
+            )
+        AuditLog.objects.create(
+            ticket=cls.ticket, changed_by_name='SYSTEM', reason='recente',
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_old_months_move_to_files(self):
+        rows, files = archive_old_audit_logs(12, self.directory)
+        self.assertEqual(rows, 3)
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertEqual(
+            AuditArchive.objects.aggregate(total=Sum('rows'))['total'], 3,
+        )
+        archive = AuditArchive.objects.order_by('month').first()
+        with gzip.open(archive.path, 'rt', encoding='utf-8') as lines:
+            first = json.loads(next(lines))
+        self.assertEqual(first['reason'], 'criado')
+        self.assertEqual(archive_old_audit_logs(12, self.directory), (0, 0))
+
+    def test_history_reads_archives_on_demand(self):
+        archive_old_audit_logs(12, self.directory)
+        self.assertEqual(
+            [log.reason for log in audit_history(self.ticket)], ['recente'],
+        )
+        self.assertEqual(
+            [log.reason for log in audit_history(self.ticket, True)],
+            ['criado', 'triagem', 'fechado', 'recente'],
+        )
+
+        self.client.force_login(self.admin)
+        url = reverse('tickets:detail', args=[self.ticket.pk])
+        self.assertContains(self.client.get(url), 'Ver histórico arquivado')
+        self.assertContains(
+            self.client.get(url, {'history': 'all'}), 'triagem',
+        )
+
+    def test_interrupted_run_finishes_deleting(self):
+        with mock.patch(
+            'app_tickets.archive.transaction.atomic',
+            side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                archive_old_audit_logs(12, self.directory)
+        self.assertEqual(AuditArchive.objects.count(), 1)
+        self.assertEqual(AuditLog.objects.count(), 4)
+
+        archive_old_audit_logs(12, self.directory)
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertEqual(
+            [log.reason for log in audit_history(self.ticket, True)],
+            ['criado', 'triagem', 'fechado', 'recente'],
+        )
+
+
+class BufferedAuditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.project = Project.objects.create(name='Projeto')
+        cls.project.members.add(cls.customer)
+        cls.ticket = Ticket.objects.create(
+            title='Chamado',
+            description='descrição',
+            created_by=cls.customer,
+        )
+
+    def _audit_inserts(self, ctx):
+        return [
+            q for q in ctx.captured_queries
+            if q['sql'].startswith('INSERT INTO "app_tickets_auditlog"')
+        ]
+
+    def test_nested_blocks_write_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with buffered_audit():
+                audit_log(self.ticket, '', 'OPEN', 'um')
+                with buffered_audit():
+                    audit_log(self.ticket, 'OPEN', 'TRIAGE', 'dois')
+                self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual(len(self._audit_inserts(ctx)), 1)
+        self.assertEqual(
+            list(
+                AuditLog.objects.order_by('created_at', 'id')
+                .values_list('reason', 'changed_by_name')
+            ),
+            [('um', 'SYSTEM'), ('dois', 'SYSTEM')],
+        )
+
+    def test_failed_block_writes_nothing(self):
+        with self.assertRaises(ValueError):
+            with buffered_audit():
+                audit_log(self.ticket, '', 'OPEN', 'um')
+                raise ValueError
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_ticket_creation_audits_in_one_insert(self):
+        self.client.force_login(self.customer)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('tickets:create'), {
+                'title': 'Novo',
+                'description': 'descrição',
+                'project': self.project.pk,
+                'priority': Ticket.Priority.P3,
+                'category': 'OTHER',
+            })
+        self.assertEqual(len(self._audit_inserts(ctx)), 1)
+        ticket = Ticket.objects.get(title='Novo')
+        self.assertEqual(
+            list(
+                ticket.audit_logs.order_by('created_at', 'id')
+                .values_list('old_status', 'new_status')
+            ),
+            [('', 'OPEN'), ('OPEN', 'TRIAGE')],
+        )
+
+
+class TicketCreationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.project = Project.objects.create(name='Projeto')
+        cls.project.members.add(cls.customer)
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+
+    def post_outage(self, follow=False, idempotency_key='', **headers):
+        return self.client.post(reverse('tickets:create'), {
+            'category': Ticket.Category.SERVICE_OUTAGE,
+            'project': self.project.pk,
+            'priority': Ticket.Priority.P1,
+            'service_name': 'API de Pagamentos',
+            'outage_start': '2026-10-18T09:00',
+            'impact': 'erro 500',
+            'environment': 'Produção',
+            'detailed_description': 'Fora do ar.',
+            'idempotency_key': idempotency_key,
+        }, follow=follow, **headers)
+
+    def test_ticket_is_inserted_in_triage(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.post_outage()
+        ticket_writes = [
+            q['sql'].split()[0] for q in ctx.captured_queries
+            if q['sql'].startswith((
+                'INSERT INTO "app_tickets_ticket" ',
+                'UPDATE "app_tickets_ticket" ',
+            ))
+        ]
+        self.assertEqual(ticket_writes, ['INSERT'])
+
+        ticket = Ticket.objects.get()
+        self.assertEqual(ticket.status, Ticket.Status.TRIAGE)
+        expected = Ticket.objects.get()
+        set_sla_deadlines(expected)
+        self.assertEqual(ticket.frt_due_at, expected.frt_due_at)
+        self.assertEqual(ticket.rt_due_at, expected.rt_due_at)
+        self.assertEqual(
+            list(ticket.sla_intervals.values_list('status', 'started_at')),
+            [(Ticket.Status.TRIAGE, ticket.created_at)],
+        )
+        self.assertEqual(
+            list(
+                ticket.audit_logs.order_by('created_at', 'id')
+                .values_list('old_status', 'new_status')
+            ),
+            [('', 'OPEN'), ('OPEN', 'TRIAGE')],
+        )
+
+    def test_failed_creation_leaves_nothing_behind(self):
+        with mock.patch(
+            'app_tickets.services.emit', side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post_outage()
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(AuditLog.objects.exists())
+        self.assertFalse(SlaInterval.objects.exists())
+
+    def test_repeated_form_token_returns_the_first_ticket(self):
+        token = self.client.get(
+            reverse('tickets:create'),
+            {'category': Ticket.Category.SERVICE_OUTAGE},
+        ).context['idempotency_key']
+        self.post_outage(idempotency_key=token)
+        response = self.post_outage(idempotency_key=token, follow=True)
+
+        ticket = Ticket.objects.get()
+        self.assertEqual(ticket.audit_logs.count(), 2)
+        self.assertEqual(
+            str(list(response.context['messages'])[-1]),
+            f'Este envio já havia criado o chamado #{ticket.pk}.',
+        )
+
+    def test_idempotency_header_is_honoured(self):
+        for _ in range(2):
+            self.post_outage(HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.post_outage(HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    @override_settings(TICKET_IDEMPOTENCY_TTL=0)
+    def test_expired_key_is_dropped(self):
+        self.post_outage(HTTP_IDEMPOTENCY_KEY='retry')
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('1 chave(s) removida(s).', out.getvalue())
+        self.post_outage(HTTP_IDEMPOTENCY_KEY='retry')
+        self.post_outage(HTTP_IDEMPOTENCY_KEY='retry')
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_oversized_key_is_rejected(self):
+        response = self.post_outage(HTTP_IDEMPOTENCY_KEY='x' * 256)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Ticket.objects.exists())
+
+
+class DuplicateDetectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            'cliente@example.com', 'x',
+        )
+        cls.other = User.objects.create_user('outro@example.com', 'x')
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'x', role=User.Role.ADMIN,
+        )
+        cls.project = Project.objects.create(name='Projeto')
+        cls.elsewhere = Project.objects.create(name='Outro projeto')
+        for project in (cls.project, cls.elsewhere):
+            project.members.add(cls.customer, cls.other)
+
+    def setUp(self):
+        patcher = mock.patch.object(duplicates, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.customer)
+
+    def post_outage(self, description, project=None, headers=None,
+                    **extra):
+        return self.client.post(reverse('tickets:create'), {
+            'category': Ticket.Category.SERVICE_OUTAGE,
+            'project': (project or self.project).pk,
+            'priority': Ticket.Priority.P1,
+            'service_name': 'API de Pagamentos',
+            'outage_start': '2026-10-18T09:00',
+            'impact': 'erro 500',
+            'environment': 'Produção',
+            'detailed_description': description,
+            **extra,
+        }, headers=headers)
+
+    def test_pure_python_signatures_match_numpy(self):
+        self.assertIsNotNone(duplicates.np)
+        hashes = duplicates.shingles('API de pagamentos retorna erro 500')
+        vectorised = duplicates.signature(hashes)
+        with mock.patch.object(duplicates, 'np', None):
+            pure = duplicates.signature(hashes)
+        self.assertEqual(pure, vectorised)
+        self.assertEqual(len(pure), duplicates.NUM_PERM)
+
+    def test_warm_up_builds_in_the_background(self):
+        threads = []
+
+        def build():
+            threads.append(threading.current_thread())
+            raise DatabaseError('indisponível')
+
+        with mock.patch.object(
+            duplicates, 'duplicate_index', side_effect=build,
+        ):
+            warming = duplicates.warm_up()
+            warming.join(timeout=5)
+        self.assertTrue(warming.daemon)
+        self.assertEqual(threads, [warming])
+        self.assertIsNot(warming, threading.main_thread())
+
+    def test_signature_estimates_jaccard(self):
+        a = duplicates.shingles('a API de pagamentos retorna erro 500')
+        b = duplicates.shingles('API de pagamentos devolvendo erro 500')
+        exact = len(a & b) / len(a | b)
+        estimate = duplicates.similarity(
+            duplicates.signature(a), duplicates.signature(b),
+        )
+        self.assertAlmostEqual(estimate, exact, delta=0.15)
+
+    def test_duplicate_is_shown_then_linked(self):
+        self.post_outage('Pagamentos retornam erro 500 desde as 9h.')
+        first = Ticket.objects.get()
+
+        response = self.post_outage(
+            'Pagamentos retornando erro 500 desde 9h.',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [match for match, _ in response.context['duplicates']],
+            [first],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+        self.post_outage(
+            'Pagamentos retornando erro 500 desde 9h.',
+            confirm_duplicate='1',
+        )
+        second = Ticket.objects.exclude(pk=first.pk).get()
+        self.assertEqual(second.duplicate_of, first)
+        self.assertEqual(
+            TicketEvent.objects.get(
+                ticket=second, kind=TicketEvent.Kind.CREATED,
+            ).payload['duplicate_of'],
+            first.pk,
+        )
+
+        self.post_outage('Pagamentos com erro 500.', confirm_duplicate='1')
+        third = Ticket.objects.latest('pk')
+        self.assertEqual(third.duplicate_of, first)
+
+    def test_scripted_clients_are_linked_without_asking(self):
+        self.post_outage('Pagamentos retornam erro 500.')
+        self.post_outage(
+            'Pagamentos retornam erro 500.',
+            headers={'Idempotency-Key': 'retry'},
+        )
+        first, second = Ticket.objects.order_by('pk')
+        self.assertEqual(second.duplicate_of, first)
+
+    def test_unrelated_tickets_are_not_flagged(self):
+        self.post_outage('Pagamentos retornam erro 500.')
+        self.post_outage(
+            'Pagamentos retornam erro 500.', project=self.elsewhere,
+        )
+        self.client.post(reverse('tickets:create'), {
+            'title': 'Acesso ao repositório',
+            'description': 'Preciso de permissão de escrita no repo.',
+            'project': self.project.pk,
+            'priority': Ticket.Priority.P3,
+            'category': 'OTHER',
+        })
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.assertFalse(
+            Ticket.objects.filter(duplicate_of__isnull=False).exists(),
+        )
+
+    def test_other_customers_tickets_are_not_linked(self):
+        self.post_outage('Pagamentos retornam erro 500.')
+        first = Ticket.objects.get()
+        self.client.force_login(self.other)
+        response = self.post_outage('Pagamentos retornam erro 500.')
+        self.assertContains(response, f'#{first.pk}')
+        self.assertNotContains(
+            response, reverse('tickets:detail', args=[first.pk]),
+        )
+
+    def test_index_follows_transitions(self):
+        self.post_outage('Pagamentos retornam erro 500.')
+        first = Ticket.objects.get()
+        transition_ticket(
+            first, Ticket.Status.RESOLVED, self.admin, 'normalizado',
+        )
+        self.post_outage('Pagamentos retornam erro 500.')
+        self.assertEqual(Ticket.objects.count(), 2)
+        self.assertNotIn(first.pk, duplicates.duplicate_index().entries)
+
+        Comment.objects.create(
+            ticket=first, author=self.customer, content='voltou',
+        )
+        first.refresh_from_db()
+        transition_ticket(
+            first, Ticket.Status.IN_PROGRESS, self.customer, 'voltou',
+        )
+        response = self.post_outage('Pagamentos retornam erro 500.')
+        self.assertIn(
+            first,
+            [match for match, _ in response.context['duplicates']],
+        )
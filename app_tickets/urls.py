@@ -23,4 +23,24 @@ urlpatterns = [
         views.TicketAssignView.as_view(),
         name='assign',
     ),
+    path(
+        'bulk/',
+        views.TicketBulkActionView.as_view(),
+        name='bulk_action',
+    ),
+    path(
+        'reports/time-in-status/',
+        views.TimeInStatusReportView.as_view(),
+        name='time_in_status',
+    ),
+    path(
+        'reports/time-in-status.json',
+        views.TimeInStatusJsonView.as_view(),
+        name='time_in_status_json',
+    ),
+    path(
+        'reports/sla/',
+        views.SlaPercentileReportView.as_view(),
+        name='sla_percentiles',
+    ),
 ]
@@ -1,10 +1,34 @@
+import json
+from contextlib import closing
+from datetime import datetime, time, timedelta
+from uuid import uuid4
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect, render
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views import View
-from django.views.generic import DetailView, ListView
-
+from django.views.generic import DetailView, ListView, TemplateView
+
+from app_accounts.views import AdminRequiredMixin
+from app_tickets.activity import needs_reply
+from app_tickets.archive import audit_history, has_archived_history
+from app_tickets.calendars import get_calendar
+from app_tickets.duplicates import find_duplicates
+from app_tickets.escalation import escalate_breached
 from app_tickets.forms import (
     AssignForm,
     CATEGORY_FORMS,
@@ -13,13 +37,31 @@ from app_tickets.forms import (
     TicketCreateForm,
     TransitionForm,
 )
-from app_tickets.models import AuditLog, Comment, Ticket
+from app_tickets.idempotency import (
+    MAX_KEY_LENGTH,
+    created_ticket,
+    open_ticket_once,
+)
+from app_tickets.models import ACTIVE_STATUSES, Comment, Ticket
+from app_tickets.reports import (
+    PERCENTILES,
+    SLA_REPORT_GROUPS,
+    TIME_IN_STATUS_GROUPS,
+    sla_percentiles,
+    time_in_status,
+)
+from app_tickets.search import search_tickets
 from app_tickets.services import (
     VALID_TRANSITIONS,
+    ConcurrentUpdateError,
     TransitionError,
+    assign_ticket,
+    bulk_assign,
+    bulk_transition,
     transition_ticket,
 )
-from app_tickets.sla import check_sla_status, is_rt_breached
+from app_tickets.sla import calculate_frt, check_sla_status
+from helpdesk.pagination import EstimatedCountPaginator, KeysetPaginator
 
 
 class TicketSelectCategoryView(LoginRequiredMixin, View):
@@ -52,9 +94,18 @@ class TicketCreateView(LoginRequiredMixin, View):
             or self.request.GET.get('category', 'OTHER')
         )
 
+    def _get_idempotency_key(self):
+        # Scripted clients send the header; the create forms post the
+        # token they were rendered with.
+        return (
+            self.request.headers.get('Idempotency-Key')
+            or self.request.POST.get('idempotency_key', '')
+        ).strip()
+
     def get(self, request):
         category = self._get_category()
         FormClass = CATEGORY_FORMS.get(category)
+        idempotency_key = uuid4().hex
 
         if FormClass:
             form = FormClass(user=request.user)
@@ -66,6 +117,7 @@ class TicketCreateView(LoginRequiredMixin, View):
                     'form': form,
                     'category': category,
                     'category_title': title,
+                    'idempotency_key': idempotency_key,
                 },
             )
 
@@ -75,24 +127,42 @@ class TicketCreateView(LoginRequiredMixin, View):
         )
         return render(
             request, 'tickets/create.html',
-            {'form': form},
+            {'form': form, 'idempotency_key': idempotency_key},
         )
 
     def post(self, request):
         category = self._get_category()
         FormClass = CATEGORY_FORMS.get(category)
 
+        idempotency_key = self._get_idempotency_key()
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return HttpResponseBadRequest(
+                f'Idempotency-Key deve ter no máximo '
+                f'{MAX_KEY_LENGTH} caracteres.'
+            )
+        if idempotency_key:
+            ticket = created_ticket(request.user, idempotency_key)
+            if ticket is not None:
+                return self._created(ticket, created=False)
+        else:
+            idempotency_key = uuid4().hex
+
+        ticket = None
         if FormClass:
             form = FormClass(
                 request.POST, request.FILES,
                 user=request.user,
             )
+            template = 'tickets/create_category.html'
+            context = {
+                'form': form,
+                'category': category,
+                'category_title': CATEGORY_TITLES.get(category, ''),
+            }
             if form.is_valid():
-                title = CATEGORY_TITLES.get(category, '')
-                description = form.compose_description()
-                ticket = Ticket.objects.create(
-                    title=title,
-                    description=description,
+                ticket = Ticket(
+                    title=context['category_title'],
+                    description=form.compose_description(),
                     category=category,
                     project=form.cleaned_data['project'],
                     priority=form.cleaned_data[
@@ -101,71 +171,65 @@ class TicketCreateView(LoginRequiredMixin, View):
                     attachment=form.cleaned_data.get(
                         'attachment',
                     ),
-                    created_by=request.user,
-                    status=Ticket.Status.OPEN,
-                )
-                self._create_audit_logs(
-                    ticket, request.user,
-                )
-                messages.success(
-                    request,
-                    f'Chamado #{ticket.pk} criado '
-                    f'com sucesso.',
                 )
-                return redirect('tickets:list')
-            title = CATEGORY_TITLES.get(category, '')
-            return render(
-                request,
-                'tickets/create_category.html',
-                {
-                    'form': form,
-                    'category': category,
-                    'category_title': title,
-                },
+        else:
+            form = TicketCreateForm(
+                request.POST, request.FILES,
+                user=request.user,
             )
-
-        form = TicketCreateForm(
-            request.POST, request.FILES,
-            user=request.user,
+            template = 'tickets/create.html'
+            context = {'form': form}
+            if form.is_valid():
+                ticket = form.save(commit=False)
+                ticket.category = 'OTHER'
+        context['idempotency_key'] = idempotency_key
+        if ticket is None:
+            return render(request, template, context)
+
+        duplicates = find_duplicates(ticket)
+        if duplicates:
+            # Form users see the likely duplicates first and submit
+            # again to go ahead; scripted clients cannot, so their
+            # ticket is only linked.
+            confirmed = (
+                'Idempotency-Key' in request.headers
+                or request.POST.get('confirm_duplicate')
+            )
+            if not confirmed:
+                context['duplicates'] = duplicates
+                return render(request, template, context)
+            original = duplicates[0][0]
+            ticket.duplicate_of_id = original.duplicate_of_id or original.pk
+        ticket, created = open_ticket_once(
+            ticket, request.user, idempotency_key,
         )
-        if form.is_valid():
-            ticket = form.save(commit=False)
-            ticket.created_by = request.user
-            ticket.status = Ticket.Status.OPEN
-            ticket.category = 'OTHER'
-            ticket.save()
-            self._create_audit_logs(ticket, request.user)
+        return self._created(ticket, created)
+
+    def _created(self, ticket, created=True):
+        if created:
             messages.success(
-                request,
+                self.request,
                 f'Chamado #{ticket.pk} criado com sucesso.',
             )
-            return redirect('tickets:list')
-        return render(
-            request, 'tickets/create.html',
-            {'form': form},
-        )
+        else:
+            messages.info(
+                self.request,
+                f'Este envio já havia criado o chamado #{ticket.pk}.',
+            )
+        return redirect('tickets:list')
 
-    def _create_audit_logs(self, ticket, user):
-        AuditLog.objects.create(
-            ticket=ticket,
-            changed_by=user,
-            changed_by_name=(
-                user.full_name or user.email
-            ),
-            old_status='',
-            new_status=Ticket.Status.OPEN,
-            reason='Chamado criado pelo cliente.',
-        )
-        ticket.status = Ticket.Status.TRIAGE
-        ticket.save(update_fields=['status'])
-        AuditLog.objects.create(
-            ticket=ticket,
-            changed_by=None,
-            changed_by_name='SYSTEM',
-            old_status=Ticket.Status.OPEN,
-            new_status=Ticket.Status.TRIAGE,
-            reason='Transição automática para triagem.',
-        )
+
+def _local_day_start(value, days=0):
+    """Return the aware start of local day ``value`` (YYYY-MM-DD) + days."""
+    try:
+        day = parse_date(value or '')
+    except ValueError:
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(
+        datetime.combine(day + timedelta(days=days), time.min),
+    )
 
 
 class TicketListView(LoginRequiredMixin, ListView):
@@ -173,6 +237,7 @@ class TicketListView(LoginRequiredMixin, ListView):
     template_name = 'tickets/list.html'
     context_object_name = 'tickets'
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
 
     def get_queryset(self):
         qs = Ticket.objects.select_related(
@@ -184,11 +249,7 @@ class TicketListView(LoginRequiredMixin, ListView):
 
         q = self.request.GET.get('q', '').strip()
         if q:
-            from django.db.models import Q
-            qs = qs.filter(
-                Q(title__icontains=q)
-                | Q(description__icontains=q)
-            )
+            qs = search_tickets(qs, q)
 
         status = self.request.GET.get('status')
         if status:
@@ -202,16 +263,53 @@ class TicketListView(LoginRequiredMixin, ListView):
         if project_id:
             qs = qs.filter(project_id=project_id)
 
-        date_from = self.request.GET.get('date_from')
+        # Local-day bounds as plain timestamp ranges so the created_at
+        # indexes apply (created_at__date wraps the column in a cast).
+        date_from = _local_day_start(self.request.GET.get('date_from'))
         if date_from:
-            qs = qs.filter(created_at__date__gte=date_from)
+            qs = qs.filter(created_at__gte=date_from)
 
-        date_to = self.request.GET.get('date_to')
+        date_to = _local_day_start(self.request.GET.get('date_to'), days=1)
         if date_to:
-            qs = qs.filter(created_at__date__lte=date_to)
+            qs = qs.filter(created_at__lt=date_to)
+
+        if self.request.GET.get('sort') == 'urgent':
+            # Served by the rt_due_at partial index on active tickets.
+            qs = qs.filter(status__in=ACTIVE_STATUSES).order_by(
+                F('rt_due_at').asc(nulls_last=True), 'pk',
+            )
+        elif self.request.GET.get('sort') == 'activity':
+            qs = qs.order_by('-last_activity_at', '-pk')
+
+        if self.request.GET.get('needs_reply'):
+            qs = needs_reply(qs)
 
         return qs
 
+    def get_pagination_mode(self):
+        # Cursors are keyed on (created_at, id) and cannot follow the
+        # deadline, activity or search-rank order.
+        if self.request.GET.get('sort') in ('urgent', 'activity'):
+            return 'offset'
+        if self.request.GET.get('q', '').strip():
+            return 'offset'
+        if 'cursor' in self.request.GET:
+            return 'cursor'
+        return settings.TICKET_LIST_PAGINATION
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.get_pagination_mode() != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as e:
+            # A cursor is only ever built by us: a bad one is a bad
+            # request, not a missing page.
+            raise BadRequest(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_context_data(self, **kwargs):
         from app_projects.models import Project
         ctx = super().get_context_data(**kwargs)
@@ -221,6 +319,8 @@ class TicketListView(LoginRequiredMixin, ListView):
         ctx['current_priority'] = self.request.GET.get('priority', '')
         ctx['current_q'] = self.request.GET.get('q', '')
         ctx['current_project'] = self.request.GET.get('project', '')
+        ctx['current_sort'] = self.request.GET.get('sort', '')
+        ctx['current_needs_reply'] = self.request.GET.get('needs_reply', '')
         ctx['current_date_from'] = self.request.GET.get(
             'date_from', '',
         )
@@ -236,6 +336,9 @@ class TicketListView(LoginRequiredMixin, ListView):
             ctx['projects'] = user.projects.filter(
                 is_active=True,
             )
+        if user.is_admin:
+            ctx['bulk_status_choices'] = Ticket.Status.choices
+            ctx['bulk_assign_form'] = AssignForm()
         return ctx
 
 
@@ -252,39 +355,6 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
             qs = qs.filter(created_by=self.request.user)
         return qs
 
-    def get_object(self, queryset=None):
-        obj = super().get_object(queryset)
-        self._check_escalation(obj)
-        return obj
-
-    def _check_escalation(self, ticket):
-        if (
-            not ticket.is_escalated
-            and ticket.status not in (
-                Ticket.Status.RESOLVED,
-                Ticket.Status.CLOSED,
-            )
-            and is_rt_breached(ticket)
-        ):
-            from app_teams.models import Team
-            n2 = Team.objects.filter(level=Team.Level.N2).first()
-            ticket.rt_breached_at = timezone.now()
-            ticket.is_escalated = True
-            if n2:
-                ticket.assigned_team = n2
-            ticket.save(update_fields=[
-                'rt_breached_at', 'is_escalated',
-                'assigned_team',
-            ])
-            AuditLog.objects.create(
-                ticket=ticket,
-                changed_by=None,
-                changed_by_name='SYSTEM',
-                old_status=ticket.status,
-                new_status=ticket.status,
-                reason='RT_BREACHED_ESCALATED',
-            )
-
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ticket = self.object
@@ -294,7 +364,14 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
             ticket.comments.select_related('author')
             .order_by('created_at')
         )
-        ctx['audit_logs'] = ticket.audit_logs.order_by('created_at')
+        # Months moved out by archive_audit_logs are only read on request.
+        ctx['show_archived'] = self.request.GET.get('history') == 'all'
+        ctx['audit_logs'] = audit_history(
+            ticket, archived=ctx['show_archived'],
+        )
+        ctx['has_archived_history'] = (
+            not ctx['show_archived'] and has_archived_history(ticket)
+        )
         ctx['comment_form'] = CommentForm()
         ctx['sla'] = self._build_sla_ctx()
 
@@ -307,6 +384,7 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
 
         if user.is_admin:
             ctx['assign_form'] = AssignForm(instance=ticket)
+            ctx['duplicates'] = ticket.duplicates.order_by('pk').only('pk')
 
         return ctx
 
@@ -334,7 +412,8 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
         frt_secs = (
             int(info['frt'].total_seconds()) if info['frt']
             else int(
-                (timezone.now() - ticket.created_at)
+                get_calendar()
+                .elapsed(ticket.created_at, timezone.now())
                 .total_seconds()
             )
         )
@@ -374,21 +453,33 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
         form = CommentForm(request.POST)
 
         if form.is_valid():
-            comment = Comment.objects.create(
-                ticket=self.object,
-                author=request.user,
-                content=form.cleaned_data['content'],
-            )
-
-            if (
-                request.user.is_admin
-                and self.object.first_response_at is None
-            ):
-                self.object.first_response_at = comment.created_at
-                self.object.save(
-                    update_fields=['first_response_at'],
+            # The comment and its activity markers (see signals) commit
+            # together.
+            with transaction.atomic():
+                comment = Comment.objects.create(
+                    ticket=self.object,
+                    author=request.user,
+                    content=form.cleaned_data['content'],
                 )
 
+                if (
+                    request.user.is_admin
+                    and self.object.first_response_at is None
+                ):
+                    self.object.first_response_at = comment.created_at
+                    # Conditional so concurrent first replies keep the
+                    # earliest one.
+                    Ticket.objects.filter(
+                        pk=self.object.pk, first_response_at__isnull=True,
+                    ).update(
+                        first_response_at=comment.created_at,
+                        frt_seconds=int(
+                            calculate_frt(self.object).total_seconds()
+                        ),
+                        version=F('version') + 1,
+                        updated_at=timezone.now(),
+                    )
+
             messages.success(request, 'Comentário adicionado.')
             return redirect(
                 'tickets:detail', pk=self.object.pk,
@@ -399,18 +490,25 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
         return self.render_to_response(ctx)
 
 
+def _posted_version(request):
+    """The ticket version the submitted form was rendered from."""
+    version = request.POST.get('version', '')
+    return int(version) if version.isdigit() else None
+
+
 class TicketTransitionView(LoginRequiredMixin, View):
 
     def post(self, request, pk):
-        ticket = Ticket.objects.select_related(
-            'assigned_agent',
-        ).get(pk=pk)
+        ticket = Ticket.objects.get(pk=pk)
 
         new_status = request.POST.get('new_status', '')
         reason = request.POST.get('reason', '')
 
         try:
-            transition_ticket(ticket, new_status, request.user, reason)
+            transition_ticket(
+                ticket, new_status, request.user, reason,
+                version=_posted_version(request),
+            )
             messages.success(
                 request,
                 f'Status alterado para {ticket.get_status_display()}.',
@@ -432,42 +530,308 @@ class TicketAssignView(LoginRequiredMixin, View):
             return redirect('tickets:detail', pk=pk)
 
         ticket = Ticket.objects.get(pk=pk)
+        version = _posted_version(request)
 
-        if 'assign_me' in request.POST:
-            ticket.assigned_agent = request.user
-            ticket.save(update_fields=['assigned_agent'])
-            AuditLog.objects.create(
-                ticket=ticket,
-                changed_by=request.user,
-                changed_by_name=(
-                    request.user.full_name or request.user.email
-                ),
-                old_status=ticket.status,
-                new_status=ticket.status,
-                reason='Atribuição do responsável.',
-            )
-            messages.success(request, 'Chamado atribuído a você.')
-        else:
-            form = AssignForm(request.POST, instance=ticket)
-            if form.is_valid():
-                form.save()
-                AuditLog.objects.create(
-                    ticket=ticket,
-                    changed_by=request.user,
-                    changed_by_name=(
-                        request.user.full_name
-                        or request.user.email
-                    ),
-                    old_status=ticket.status,
-                    new_status=ticket.status,
-                    reason='Atribuição de time/responsável.',
-                )
-                messages.success(
-                    request, 'Atribuição atualizada.',
+        try:
+            if 'assign_me' in request.POST:
+                assign_ticket(
+                    ticket, request.user, 'Atribuição do responsável.',
+                    version=version, assigned_agent=request.user,
                 )
+                messages.success(request, 'Chamado atribuído a você.')
             else:
-                messages.error(
-                    request, 'Erro ao atualizar atribuição.',
-                )
+                form = AssignForm(request.POST)
+                if form.is_valid():
+                    # Only what the form submitted: the detail page
+                    # posts the agent alone.
+                    fields = {
+                        name: form.cleaned_data[name]
+                        for name in form.fields if name in request.POST
+                    }
+                    assign_ticket(
+                        ticket, request.user,
+                        'Atribuição de time/responsável.',
+                        version=version, **fields,
+                    )
+                    messages.success(
+                        request, 'Atribuição atualizada.',
+                    )
+                else:
+                    messages.error(
+                        request, 'Erro ao atualizar atribuição.',
+                    )
+        except ConcurrentUpdateError as e:
+            messages.error(request, str(e))
 
         return redirect('tickets:detail', pk=pk)
+
+
+class TicketBulkActionView(AdminRequiredMixin, View):
+    """Apply one action to the tickets selected in the list.
+
+    Each ticket is checked by the same rules as the single-ticket
+    views; the ones that pass are written together and the rest are
+    reported back one message per ticket.
+    """
+
+    max_errors = 20
+
+    def post(self, request):
+        ticket_ids = sorted({
+            int(pk) for pk in request.POST.getlist('ticket_ids')
+            if pk.isdigit()
+        })
+        action = request.POST.get('action', '')
+        if not ticket_ids:
+            messages.error(request, 'Selecione ao menos um chamado.')
+        elif action == 'transition':
+            tickets, errors = bulk_transition(
+                ticket_ids,
+                request.POST.get('new_status', ''),
+                request.user,
+                request.POST.get('reason', ''),
+            )
+            self._report(request, len(tickets), errors, 'atualizado(s)')
+        elif action == 'assign':
+            form = AssignForm(request.POST)
+            if form.is_valid() and (
+                form.cleaned_data['assigned_team']
+                or form.cleaned_data['assigned_agent']
+            ):
+                tickets, errors = bulk_assign(
+                    ticket_ids,
+                    request.user,
+                    team=form.cleaned_data['assigned_team'],
+                    agent=form.cleaned_data['assigned_agent'],
+                )
+                self._report(request, len(tickets), errors, 'atribuído(s)')
+            else:
+                messages.error(request, 'Erro ao atualizar atribuição.')
+        elif action == 'escalate':
+            escalated, errors = escalate_breached(ticket_ids)
+            self._report(request, len(escalated), errors, 'escalonado(s)')
+        else:
+            messages.error(request, 'Ação inválida.')
+
+        next_url = request.POST.get('next', '')
+        if not url_has_allowed_host_and_scheme(
+            next_url,
+            allowed_hosts={request.get_host()},
+            require_https=request.is_secure(),
+        ):
+            next_url = 'tickets:list'
+        return redirect(next_url)
+
+    def _report(self, request, done, errors, verb):
+        if done:
+            messages.success(request, f'{done} chamado(s) {verb}.')
+        for pk, error in sorted(errors.items())[:self.max_errors]:
+            messages.error(request, f'#{pk}: {error}')
+        if len(errors) > self.max_errors:
+            messages.error(
+                request,
+                f'E mais {len(errors) - self.max_errors} chamado(s) '
+                'com erro.',
+            )
+
+
+REPORT_GROUPS = [
+    ('priority', 'Prioridade'),
+    ('team', 'Time'),
+    ('agent', 'Responsável'),
+    ('ticket', 'Chamado'),
+]
+REPORT_DEFAULT_DAYS = 30
+
+
+def _report_params(request):
+    """Return ``(date_from, date_to, group_by)`` from the query string."""
+    today = timezone.localdate()
+    date_from = request.GET.get('date_from') or (
+        today - timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    ).isoformat()
+    date_to = request.GET.get('date_to') or today.isoformat()
+    group_by = request.GET.get('group_by', '')
+    if group_by not in TIME_IN_STATUS_GROUPS:
+        group_by = 'priority'
+    return date_from, date_to, group_by
+
+
+def _report_window(date_from, date_to):
+    start = _local_day_start(date_from)
+    end = _local_day_start(date_to, days=1)
+    if start is None or end is None or start >= end:
+        raise Http404('Período inválido.')
+    return start, end
+
+
+class TimeInStatusReportView(AdminRequiredMixin, TemplateView):
+    """Pivot of time spent per status, one row per group.
+
+    Only the first ``max_groups`` groups are rendered; the JSON
+    endpoint streams the full report.
+    """
+
+    template_name = 'tickets/time_in_status.html'
+    max_groups = 200
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        date_from, date_to, group_by = _report_params(self.request)
+        start, end = _report_window(date_from, date_to)
+        statuses = [
+            s for s in Ticket.Status if s != Ticket.Status.CLOSED
+        ]
+
+        groups = {}
+        truncated = False
+        with closing(time_in_status(start, end, group_by)) as report:
+            for row in report:
+                if row['key'] not in groups:
+                    if len(groups) == self.max_groups:
+                        truncated = True
+                        break
+                    groups[row['key']] = {
+                        'label': self._label(group_by, row),
+                        'cells': {},
+                    }
+                groups[row['key']]['cells'][row['status']] = row
+
+        fmt = TicketDetailView._fmt
+        ctx['rows'] = [
+            {
+                'label': group['label'],
+                'cells': [
+                    fmt(group['cells'][s]['seconds'])
+                    if s in group['cells'] else '—'
+                    for s in statuses
+                ],
+            }
+            for group in groups.values()
+        ]
+        ctx['statuses'] = statuses
+        ctx['truncated'] = truncated
+        ctx['max_groups'] = self.max_groups
+        ctx['group_choices'] = REPORT_GROUPS
+        ctx['current_group_by'] = group_by
+        ctx['current_date_from'] = date_from
+        ctx['current_date_to'] = date_to
+        return ctx
+
+    @staticmethod
+    def _label(group_by, row):
+        if group_by == 'priority':
+            return Ticket.Priority(row['key']).label
+        if group_by == 'ticket':
+            return f'#{row["key"]} {row["label"]}'
+        if row['key'] is None:
+            return 'Sem time' if group_by == 'team' else 'Sem responsável'
+        return row['label']
+
+
+class TimeInStatusJsonView(AdminRequiredMixin, View):
+    """The full time-in-status report, streamed as JSON."""
+
+    def get(self, request):
+        date_from, date_to, group_by = _report_params(request)
+        start, end = _report_window(date_from, date_to)
+
+        def stream():
+            header = json.dumps({
+                'date_from': date_from,
+                'date_to': date_to,
+                'group_by': group_by,
+            })
+            yield header[:-1] + ', "rows": ['
+            separator = ''
+            for row in time_in_status(start, end, group_by):
+                yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+                separator = ', '
+            yield ']}'
+
+        return StreamingHttpResponse(
+            stream(), content_type='application/json',
+        )
+
+
+SLA_REPORT_GROUP_CHOICES = [
+    ('priority', 'Prioridade'),
+    ('team', 'Time'),
+]
+SLA_REPORT_MONTHS = 6
+
+
+class SlaPercentileReportView(AdminRequiredMixin, TemplateView):
+    """Monthly FRT/RT percentiles and compliance, newest month first.
+
+    Each month comes from :func:`sla_percentiles`, so only the current
+    month is ever recomputed on a typical visit.
+    """
+
+    template_name = 'tickets/sla_percentiles.html'
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        group_by = self.request.GET.get('group_by', '')
+        if group_by not in SLA_REPORT_GROUPS:
+            group_by = 'priority'
+        try:
+            months = int(self.request.GET.get('months', SLA_REPORT_MONTHS))
+        except ValueError:
+            months = SLA_REPORT_MONTHS
+        months = min(max(months, 1), 24)
+
+        first = timezone.localdate().replace(day=1)
+        periods = []
+        for _ in range(months + 1):
+            periods.append(first)
+            first = (first - timedelta(days=1)).replace(day=1)
+        reports = [sla_percentiles(month, group_by) for month in periods]
+
+        rows = []
+        for month, report, previous in zip(periods, reports, reports[1:]):
+            for group in sorted(report, key=lambda g: (g is None, g)):
+                rows.append({
+                    'month': month,
+                    'group': self._label(group_by, group),
+                    'metrics': [
+                        self._metric(report, previous, group, metric)
+                        for metric in ('frt', 'rt')
+                    ],
+                })
+
+        ctx['rows'] = rows
+        ctx['metric_labels'] = ['FRT', 'RT']
+        ctx['percentile_labels'] = [
+            f'p{round(f * 100)}' for f in PERCENTILES
+        ]
+        ctx['group_choices'] = SLA_REPORT_GROUP_CHOICES
+        ctx['current_group_by'] = group_by
+        ctx['current_months'] = months
+        return ctx
+
+    @staticmethod
+    def _label(group_by, group):
+        if group_by == 'priority':
+            return Ticket.Priority(group).label
+        return group or 'Sem time'
+
+    @staticmethod
+    def _metric(report, previous, group, metric):
+        stats = report[group].get(metric)
+        if stats is None:
+            return None
+        before = previous.get(group, {}).get(metric)
+        fmt = TicketDetailView._fmt
+        return {
+            'count': stats['count'],
+            'compliance': stats['compliance'],
+            'trend': (
+                stats['compliance'] - before['compliance']
+                if before else None
+            ),
+            'percentiles': [
+                fmt(round(stats[f'p{round(f * 100)}']))
+                for f in PERCENTILES
+            ],
+        }
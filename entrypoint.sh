@@ -18,8 +18,25 @@ done
 
 echo "PostgreSQL disponível!"
 
+# Any other command (e.g. the SLA scheduler) runs against the schema the
+# web container migrates, so it waits for that instead of migrating.
+if [ "$#" -gt 0 ]; then
+    echo "Aguardando as migrações..."
+    until python manage.py migrate --check >/dev/null 2>&1; do
+        sleep 2
+    done
+    exec "$@"
+fi
+
 echo "Aplicando migrações..."
 python manage.py migrate --noinput
+python manage.py createcachetable
+
+# Deadlines depend on the SLA calendar and targets in the settings,
+# which only change with a deploy; active tickets are recomputed when
+# they did.
+echo "Verificando prazos de SLA..."
+python manage.py rebuild_sla_deadlines --if-changed
 
 echo "Iniciando servidor..."
 exec gunicorn helpdesk.wsgi:application \
@@ -0,0 +1,246 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids an exact ``COUNT(*)`` on large listings.
+
+    On PostgreSQL the row count is first estimated from
+    ``pg_class.reltuples`` (unfiltered querysets) or from the planner's
+    ``EXPLAIN`` row estimate (filtered ones). Estimates at or above
+    ``settings.APPROXIMATE_COUNT_THRESHOLD`` are used as-is and flagged
+    through ``count_is_approximate`` so the UI can show "cerca de N".
+    Anything smaller gets an exact count, cached for
+    ``settings.COUNT_CACHE_TTL`` seconds per distinct query.
+    """
+
+    count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        threshold = settings.APPROXIMATE_COUNT_THRESHOLD
+        if threshold:
+            estimate = self._estimate_count()
+            if estimate is not None and estimate >= threshold:
+                self.count_is_approximate = True
+                return estimate
+        return self._cached_exact_count()
+
+    def validate_number(self, number):
+        # An estimate can be short of the real total; let page numbers
+        # past the estimated end through and render whatever is there.
+        self.count
+        if self.count_is_approximate:
+            try:
+                number = int(number)
+            except (TypeError, ValueError):
+                raise PageNotAnInteger('Número de página inválido.')
+            return max(number, 1)
+        return super().validate_number(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page],
+            number,
+            self,
+        )
+
+    def _query(self):
+        return getattr(self.object_list, 'query', None)
+
+    def _estimate_count(self):
+        query = self._query()
+        if query is None:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            if not query.where and not query.distinct:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE oid = %s::regclass',
+                    [query.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                if row and row[0] >= 0:
+                    return row[0]
+
+            sql, params = (
+                self.object_list.order_by().values('pk')
+                .query.sql_with_params()
+            )
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def _cached_exact_count(self):
+        query = self._query()
+        if query is None:
+            return super().count
+
+        sql, params = query.sql_with_params()
+        digest = hashlib.md5(
+            repr((self.object_list.db, sql, params)).encode(),
+        ).hexdigest()
+        key = f'pagination:count:{digest}'
+        total = cache.get(key)
+        if total is None:
+            total = self.object_list.count()
+            cache.set(key, total, settings.COUNT_CACHE_TTL)
+        return total
+
+
+class KeysetPage:
+    """A page of a :class:`KeysetPaginator`.
+
+    Mirrors the parts of ``django.core.paginator.Page`` the templates
+    use, replacing page numbers with opaque cursors.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Cursor pagination over a unique, descending sort key.
+
+    Every page is a single ``WHERE key < cursor ORDER BY key LIMIT n``
+    query, so deep pages cost the same as the first one and no
+    ``COUNT(*)`` is issued. The queryset ordering is replaced by
+    ``ordering``, whose last field must be unique (usually ``id``).
+    """
+
+    def __init__(self, queryset, per_page, ordering=('created_at', 'id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._forward(None, has_previous=False)
+        direction, key = self.decode_cursor(cursor)
+        if direction == 'n':
+            return self._forward(key, has_previous=True)
+        return self._backward(key)
+
+    def _forward(self, key, has_previous):
+        qs = self.queryset
+        if key is not None:
+            qs = qs.filter(self._before(key))
+        qs = qs.order_by(*[f'-{f}' for f in self.ordering])
+        rows = list(qs[:self.per_page + 1])
+
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._make_page(rows, has_next, has_previous)
+
+    def _backward(self, key):
+        qs = self.queryset.filter(self._after(key))
+        qs = qs.order_by(*self.ordering)
+        rows = list(qs[:self.per_page + 1])
+
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._make_page(rows, bool(rows), has_previous)
+
+    def _make_page(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor('n', rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor('p', rows[0])
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
+
+    def _before(self, key):
+        return self._compare(key, 'lt')
+
+    def _after(self, key):
+        return self._compare(key, 'gt')
+
+    def _compare(self, key, op):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y), with a
+        # leading inclusive bound on the first column to keep it
+        # sargable for the composite index.
+        cond = Q()
+        equal = {}
+        for field, value in zip(self.ordering, key):
+            cond |= Q(**equal, **{f'{field}__{op}': value})
+            equal[field] = value
+        first = self.ordering[0]
+        return Q(**{f'{first}__{op}e': key[0]}) & cond
+
+    def encode_cursor(self, direction, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(
+                base64.urlsafe_b64decode(padded.encode()),
+            )
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            if len(values) != len(self.ordering):
+                raise ValueError(values)
+            opts = self.queryset.model._meta
+            key = [
+                opts.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception as exc:
+            raise InvalidCursor('Cursor de paginação inválido.') from exc
+        return direction, key
@@ -67,6 +67,20 @@ DATABASES = {
     }
 }
 
+# Cache
+# The default in-process cache is per gunicorn worker; set CACHE_BACKEND
+# to django.core.cache.backends.db.DatabaseCache (LOCATION=helpdesk_cache)
+# so invalidations are seen by every worker.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -101,5 +115,82 @@ LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
+# Pagination
+# 'offset' keeps numbered pages; 'cursor' switches the ticket list to
+# keyset pagination on (created_at, id).
+TICKET_LIST_PAGINATION = os.environ.get('TICKET_LIST_PAGINATION', 'offset')
+
+# Listings whose estimated size reaches this threshold show "cerca de N"
+# instead of running an exact COUNT(*); 0 always counts exactly.
+APPROXIMATE_COUNT_THRESHOLD = int(
+    os.environ.get('APPROXIMATE_COUNT_THRESHOLD', '10000')
+)
+# Seconds an exact listing count is cached.
+COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', '60'))
+
+# Dashboard
+# Seconds a dashboard summary is cached; ticket changes invalidate it.
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', '300'))
+
+# SLA
+# 'business' counts SLA time only during SLA_BUSINESS_HOURS on working
+# days in TIME_ZONE (national holidays and SLA_HOLIDAYS are skipped);
+# '24x7' counts wall-clock time. entrypoint.sh runs
+# rebuild_sla_deadlines --if-changed on every start, so changes to these
+# reach the deadlines of active tickets with the deploy that makes them.
+SLA_CALENDAR = os.environ.get('SLA_CALENDAR', 'business')
+SLA_BUSINESS_HOURS = {
+    weekday: [('08:00', '18:00')] for weekday in range(5)
+}
+SLA_HOLIDAYS = [
+    d for d in os.environ.get('SLA_HOLIDAYS', '').split(',') if d
+]
+# Seconds a process trusts its copy of the SLA policy table before
+# checking the shared version in the cache.
+SLA_POLICY_CHECK_SECONDS = int(
+    os.environ.get('SLA_POLICY_CHECK_SECONDS', '5')
+)
+# Seconds after which the table is reloaded even if the version did not
+# change, which bounds staleness when the cache is not shared.
+SLA_POLICY_MAX_AGE_SECONDS = int(
+    os.environ.get('SLA_POLICY_MAX_AGE_SECONDS', '60')
+)
+
+# Reports
+# Seconds the SLA percentiles of a still-open month are cached, and of
+# a month that can no longer change.
+SLA_REPORT_CACHE_TTL = int(os.environ.get('SLA_REPORT_CACHE_TTL', '300'))
+SLA_REPORT_FINAL_CACHE_TTL = int(
+    os.environ.get('SLA_REPORT_FINAL_CACHE_TTL', '86400')
+)
+
+# Ticket event outbox
+# How long an event consumer waits on a gap in the event ids (an insert
+# not yet committed) before treating it as rolled back.
+TICKET_EVENT_SETTLE_SECONDS = int(
+    os.environ.get('TICKET_EVENT_SETTLE_SECONDS', '30')
+)
+
+# Audit log archive
+# Months of audit history kept in the database; older months are moved
+# to compressed NDJSON files by the archive_audit_logs command.
+AUDIT_HOT_MONTHS = int(os.environ.get('AUDIT_HOT_MONTHS', '12'))
+AUDIT_ARCHIVE_DIR = Path(
+    os.environ.get('AUDIT_ARCHIVE_DIR', BASE_DIR / 'archive' / 'auditlog')
+)
+
+# Ticket creation
+# Seconds an Idempotency-Key (or the create form's token) keeps mapping
+# to the ticket it created; purge_idempotency_keys drops expired keys.
+TICKET_IDEMPOTENCY_TTL = int(
+    os.environ.get('TICKET_IDEMPOTENCY_TTL', str(24 * 60 * 60))
+)
+# Estimated text similarity (0-1) from which a new ticket is flagged
+# as a likely duplicate of an active ticket of the same project and
+# category.
+TICKET_DUPLICATE_THRESHOLD = float(
+    os.environ.get('TICKET_DUPLICATE_THRESHOLD', '0.5')
+)
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
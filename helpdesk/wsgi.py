@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'helpdesk.settings')
 
 application = get_wsgi_application()
+
+# Gunicorn workers import this module as they start: have each start
+# building its near-duplicate ticket index in the background rather
+# than on a user's submit.
+from app_tickets.duplicates import warm_up  # noqa: E402
+
+warm_up()